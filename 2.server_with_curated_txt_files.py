@@ -9,12 +9,15 @@ import shutil
 import subprocess
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List
 from pypdf import PdfReader
 
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 
+from morpheus_eval import evaluate_and_report
+from morpheus_references import ReferenceLookupError, SectionedDocument
+
 load_dotenv()
 
 # -----------------------
@@ -46,6 +49,12 @@ REFERENCE_DOCS = {
     "morpheusml_doc": Path(__file__).parent / "morpheusml_doc.txt",
 }
 
+# The two large documents are also served by section (read_reference_section).
+SECTIONED_DOCS = {
+    name: SectionedDocument(REFERENCE_DOCS[name])
+    for name in ("model_repository", "morpheusml_doc")
+}
+
 
 # -----------------------
 # Helpers
@@ -119,161 +128,6 @@ def _write_metadata(run_id: str, data: Dict[str, Any]) -> None:
 
 
 
-def _count_xml_errors(run_path: Path) -> int:
-    """
-    Count the number of errors in model.xml.err file.
-    Returns 0 if file doesn't exist or is empty.
-    """
-    err_path = run_path / "model.xml.err"
-    
-    if not err_path.exists():
-        return 0
-    
-    err_text = err_path.read_text(errors="ignore").strip()
-    
-    if not err_text:
-        return 0
-    
-    # Count error lines - each non-empty line is considered an error
-    # You can adjust this logic based on actual error format
-    error_lines = [line for line in err_text.split('\n') if line.strip()]
-    
-    # Also count specific error patterns
-    error_patterns = [
-        r'\[ERROR\]',
-        r'\[FATAL\]',
-        r'Error:',
-        r'error:',
-        r'Exception',
-    ]
-    
-    error_count = 0
-    for line in error_lines:
-        for pattern in error_patterns:
-            if re.search(pattern, line):
-                error_count += 1
-                break
-        else:
-            # If no specific pattern matched but line exists, still count it
-            if line.strip():
-                error_count += 1
-    
-    return error_count if error_count > 0 else len(error_lines)
-
-
-def _check_model_graph(run_path: Path) -> Tuple[bool, List[str]]:
-    """
-    Check if model_graph.dot file exists in the run directory.
-    Returns (exists: bool, list of found files).
-    """
-    graph_files = list(run_path.rglob("model_graph.dot"))
-    has_graph = len(graph_files) > 0
-    return has_graph, [str(p.name) for p in graph_files]
-
-
-def _count_time_lines(out_path: Path) -> Tuple[int, List[float]]:
-    """
-    Count lines starting with "Time: " in model.xml.out AFTER "model is up".
-    Returns (count, list of time values).
-    
-    The structure has 101 lines for a complete run:
-    - Start Time: <0.0>
-    - End Time: <StopTime>
-    - 100 intervals = 101 lines starting with "Time: "
-    """
-    if not out_path.exists():
-        return 0, []
-    
-    out_text = out_path.read_text(errors="ignore")
-    lines = out_text.split('\n')
-    
-    # Find "model is up" marker to start counting after simulation begins
-    model_up_index = -1
-    for i, line in enumerate(lines):
-        if "model is up" in line.lower():
-            model_up_index = i
-            break
-    
-    # Extract time values from lines after "model is up"
-    time_values = []
-    time_pattern = re.compile(r'^Time:\s*<?([\d.eE+-]+)>?', re.IGNORECASE)
-    
-    start_index = model_up_index + 1 if model_up_index >= 0 else 0
-    
-    for line in lines[start_index:]:
-        match = time_pattern.match(line.strip())
-        if match:
-            try:
-                time_val = float(match.group(1))
-                time_values.append(time_val)
-            except ValueError:
-                continue
-    
-    return len(time_values), time_values
-
-
-def _calculate_time_score(time_line_count: int) -> int:
-    """
-    Calculate score based on number of Time: lines.
-    
-    Scoring:
-    - ==0:   score +0
-    - ==1:   score +1
-    - >1 and <101: score +2
-    - ==101: score +3
-    """
-    if time_line_count == 0:
-        return 0
-    elif time_line_count == 1:
-        return 1
-    elif time_line_count > 1 and time_line_count < 101:
-        return 2
-    elif time_line_count >= 101:
-        return 3
-    else:
-        return 0
-
-
-def _extract_stop_time(xml_path: Path) -> Optional[float]:
-    """
-    Extract StopTime value from model.xml.
-    Returns None if not found.
-    """
-    if not xml_path.exists():
-        return None
-    
-    xml_text = xml_path.read_text(errors="ignore")
-    
-    # Pattern to match <StopTime value="X"/> or <StopTime>X</StopTime>
-    patterns = [
-        r'<StopTime\s+value\s*=\s*["\']?([\d.eE+-]+)["\']?\s*/?>',
-        r'<StopTime[^>]*>([\d.eE+-]+)</StopTime>',
-        r'stop_time\s*=\s*["\']?([\d.eE+-]+)["\']?',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, xml_text, re.IGNORECASE)
-        if match:
-            try:
-                return float(match.group(1))
-            except ValueError:
-                continue
-    
-    return None
-
-
-def _check_stop_time_match(stop_time: Optional[float], time_values: List[float], tolerance: float = 1e-6) -> bool:
-    """
-    Check if the last simulation time matches the StopTime.
-    Returns True if they match within tolerance.
-    """
-    if stop_time is None or not time_values:
-        return False
-    
-    last_time = time_values[-1]
-    return abs(stop_time - last_time) < tolerance
-
-
 def _list_outputs(run_path: Path) -> Dict[str, List[str]]:
     """
     List output files (png, csv) in the run directory.
@@ -347,6 +201,9 @@ def read_reference_doc(
     - model_repository
     - model_template
     - morpheusml_doc
+
+    Only the first max_chars characters are returned; use
+    read_reference_section to reach a specific part of the document.
     """
     if name not in REFERENCE_DOCS:
         return {
@@ -369,6 +226,37 @@ def read_reference_doc(
         "content": content,
     }
 
+@mcp.tool()
+def read_reference_section(
+    doc: str,
+    section: Optional[str] = None,
+    max_chars: int = 20000
+) -> Dict[str, Any]:
+    """
+    Read one section of a consolidated reference document by heading.
+
+    doc: model_repository or morpheusml_doc.
+    section: a heading title ("VolumeConstraint", "CellSorting_2D.xml") or a
+    "Parent > Section" path when a title repeats ("VolumeConstraint > Example").
+    Without a section, returns the document outline instead.
+    """
+    if doc not in SECTIONED_DOCS:
+        return {
+            "ok": False,
+            "error": f"Unknown reference document: {doc}. "
+                     f"Valid options: {list(SECTIONED_DOCS.keys())}"
+        }
+    document = SECTIONED_DOCS[doc]
+    try:
+        if not section:
+            return {"ok": True, "doc": doc, "outline": document.outline()}
+        res = document.read(section, max_chars=max_chars)
+    except FileNotFoundError:
+        return {"ok": False, "error": f"Reference file not found: {document.path}"}
+    except ReferenceLookupError as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "doc": doc, **res}
+
 @mcp.tool()
 def generate_xml_from_text(
     model_xml: str,
@@ -624,244 +512,41 @@ def evaluation(run_id: str) -> Dict[str, Any]:
     Evaluate a Morpheus run based on execution artifacts and
     store the results as evaluation.json in the run directory.
     
-    Scoring Criteria:
-    1. XML errors in model.xml.err or stderr.log: negative score per error (best = 0)
-    2. model_graph.dot exists: +1
-    3. Time step progression (graduated scoring):
+    Scoring uses the shared rules in morpheus_eval (SCORING_RULES), so every
+    server variant gives the same score:
+    1. xml_errors: -1 per error line on stderr.log (best = 0)
+    2. model_graph: model_graph.dot exists: +1
+    3. time_progression: "Time:" lines after "model is up" (graduated scoring):
        - 0 lines:     +0
        - 1-10 lines:  +1
        - 11-50 lines: +2
        - 51+ lines:   +3
-    4. StopTime matches last Time in output: +1
-    5. Result files (png/csv) generated: +1
-    6. BONUS: Many results generated (10+ PNGs): +1
-    
+    4. stop_time: StopTime matches last Time in output: +1
+    5. results: Result files (png/csv) generated: +1
+    6. many_results (BONUS): 10+ informative PNGs, i.e. not blank and not a
+       repeat of the previous frame of their series: +1
+    Unscored rules add resources, gnuplot_errors, numerical_health and
+    model_sections to the breakdown.
+
     Maximum possible score: 7 (with 0 errors)
     """
     run_path = _run_dir(run_id)
 
-    xml_path = run_path / "model.xml"
-    stdout_path = run_path / "stdout.log"      # ← FIXED: Use stdout.log
-    stderr_path = run_path / "stderr.log"      # ← FIXED: Use stderr.log
-    eval_json_path = run_path / "evaluation.json"
-    eval_txt_path = run_path / "evaluation.txt"
-
-    score = 0
-    breakdown: Dict[str, Any] = {}
-
-    try:
-        # -------------------------------------------------
-        # 1. XML error penalty (best score = 0)
-        #    Check stderr.log for errors
-        # -------------------------------------------------
-        error_count = 0
-        if stderr_path.exists():
-            stderr_content = stderr_path.read_text(errors="ignore").strip()
-            if stderr_content:
-                # Count error lines
-                error_lines = [l for l in stderr_content.split('\n') if l.strip()]
-                error_count = len(error_lines)
-        
-        breakdown["xml_error_count"] = error_count
-        breakdown["xml_error_penalty"] = -error_count
-        breakdown["stderr_file_exists"] = stderr_path.exists()
-        score -= error_count
-
-        # -------------------------------------------------
-        # 2. Model graph existence check (+1 if exists)
-        # -------------------------------------------------
-        has_graph, graph_files = _check_model_graph(run_path)
-        breakdown["model_graph_present"] = has_graph
-        breakdown["model_graph_files"] = graph_files
-
-        if has_graph:
-            score += 1
-            breakdown["model_graph_score"] = 1
-        else:
-            breakdown["model_graph_score"] = 0
-
-        # -------------------------------------------------
-        # 3. Time-step progression check (graduated scoring)
-        #    Count lines starting with "Time:" in stdout.log
-        # -------------------------------------------------
-        time_line_count = 0
-        time_values = []
-        
-        if stdout_path.exists():
-            stdout_content = stdout_path.read_text(errors="ignore")
-            # Find "model is up" marker
-            model_up_idx = stdout_content.lower().find("model is up")
-            if model_up_idx >= 0:
-                # Only look at content after "model is up"
-                after_model_up = stdout_content[model_up_idx:]
-            else:
-                after_model_up = stdout_content
-            
-            # Count Time: lines
-            time_pattern = re.compile(r'Time:\s*<?(\d+\.?\d*)', re.IGNORECASE)
-            for match in time_pattern.finditer(after_model_up):
-                try:
-                    time_values.append(float(match.group(1)))
-                    time_line_count += 1
-                except ValueError:
-                    continue
-        
-        # Calculate time score with adjusted thresholds
-        if time_line_count == 0:
-            time_score = 0
-        elif time_line_count <= 10:
-            time_score = 1
-        elif time_line_count <= 50:
-            time_score = 2
-        else:
-            time_score = 3
-        
-        breakdown["time_lines_count"] = time_line_count
-        breakdown["time_score"] = time_score
-        breakdown["time_values_sample"] = time_values[:5] if time_values else []
-        breakdown["last_time_value"] = time_values[-1] if time_values else None
-        breakdown["stdout_file_exists"] = stdout_path.exists()
-        
-        score += time_score
-
-        # -------------------------------------------------
-        # 4. StopTime consistency check (+1 if matches)
-        # -------------------------------------------------
-        stop_time = _extract_stop_time(xml_path)
-        last_time = time_values[-1] if time_values else None
-        
-        # Check if last time matches stop time (with tolerance)
-        stop_time_match = False
-        if stop_time is not None and last_time is not None:
-            stop_time_match = abs(stop_time - last_time) < 1.0
-        
-        breakdown["stop_time"] = stop_time
-        breakdown["last_simulation_time"] = last_time
-        breakdown["stop_time_match"] = stop_time_match
-
-        if stop_time_match:
-            score += 1
-            breakdown["stop_time_score"] = 1
-        else:
-            breakdown["stop_time_score"] = 0
-
-        # -------------------------------------------------
-        # 5. Result file generation check (+1 if png or csv exists)
-        # -------------------------------------------------
-        outputs = _list_outputs(run_path)
-        png_count = len(outputs.get("png", []))
-        csv_count = len(outputs.get("csv", []))
-        has_png = png_count > 0
-        has_csv = csv_count > 0
-        has_results = has_png or has_csv
-
-        breakdown["results_generated"] = has_results
-        breakdown["has_png_files"] = has_png
-        breakdown["has_csv_files"] = has_csv
-        breakdown["png_files"] = outputs.get("png", [])[:20]  # Limit to first 20 for display
-        breakdown["csv_files"] = outputs.get("csv", [])
-        breakdown["png_count"] = png_count
-        breakdown["csv_count"] = csv_count
-
-        if has_results:
-            score += 1
-            breakdown["results_score"] = 1
-        else:
-            breakdown["results_score"] = 0
-
-        # -------------------------------------------------
-        # 6. BONUS: Many results generated (+1 if 10+ PNGs)
-        # -------------------------------------------------
-        if png_count >= 10:
-            score += 1
-            breakdown["bonus_many_results"] = 1
-        else:
-            breakdown["bonus_many_results"] = 0
-
-    except Exception as e:
-        breakdown["evaluation_exception"] = str(e)
-        breakdown["evaluation_failed"] = True
-
-    finally:
-        # -------------------------------------------------
-        # Calculate maximum possible score
-        # -------------------------------------------------
-        max_score = 7  # 0 errors + 1 graph + 3 time + 1 stoptime + 1 results + 1 bonus
-        
-        # -------------------------------------------------
-        # Final evaluation object
-        # -------------------------------------------------
-        evaluation_result = {
-            "run_id": run_id,
-            "total_score": score,
-            "max_possible_score": max_score,
-            "score_percentage": round((score / max_score) * 100, 2) if max_score > 0 else 0,
-            "breakdown": breakdown,
-            "timestamp": datetime.now().isoformat(),
-        }
-
-        eval_json_path.write_text(
-            json.dumps(evaluation_result, indent=2),
-            encoding="utf-8"
-        )
-
-        # Create human-readable summary
-        eval_txt_path.write_text(
-            (
-                f"{'='*60}\n"
-                f"MORPHEUS EVALUATION REPORT\n"
-                f"{'='*60}\n"
-                f"Run ID: {run_id}\n"
-                f"Timestamp: {datetime.now().isoformat()}\n"
-                f"\n"
-                f"TOTAL SCORE: {score} / {max_score} ({round((score / max_score) * 100, 2) if max_score > 0 else 0}%)\n"
-                f"\n"
-                f"{'-'*60}\n"
-                f"SCORING BREAKDOWN:\n"
-                f"{'-'*60}\n"
-                f"\n"
-                f"1. XML/Stderr Errors (penalty, best=0):\n"
-                f"   - Error count: {breakdown.get('xml_error_count', 'N/A')}\n"
-                f"   - Score: {breakdown.get('xml_error_penalty', 0)}\n"
-                f"\n"
-                f"2. Model Graph (model_graph.dot):\n"
-                f"   - Present: {breakdown.get('model_graph_present', False)}\n"
-                f"   - Files: {breakdown.get('model_graph_files', [])}\n"
-                f"   - Score: {breakdown.get('model_graph_score', 0)} / 1\n"
-                f"\n"
-                f"3. Time Step Progression (from stdout.log):\n"
-                f"   - Time lines count: {breakdown.get('time_lines_count', 0)}\n"
-                f"   - Scoring: 0->+0, 1-10->+1, 11-50->+2, 51+->+3\n"
-                f"   - Score: {breakdown.get('time_score', 0)} / 3\n"
-                f"\n"
-                f"4. StopTime Match:\n"
-                f"   - StopTime in XML: {breakdown.get('stop_time', 'N/A')}\n"
-                f"   - Last simulation time: {breakdown.get('last_simulation_time', 'N/A')}\n"
-                f"   - Match: {breakdown.get('stop_time_match', False)}\n"
-                f"   - Score: {breakdown.get('stop_time_score', 0)} / 1\n"
-                f"\n"
-                f"5. Result Files Generated:\n"
-                f"   - PNG files: {breakdown.get('png_count', 0)}\n"
-                f"   - CSV files: {breakdown.get('csv_count', 0)}\n"
-                f"   - Score: {breakdown.get('results_score', 0)} / 1\n"
-                f"\n"
-                f"6. BONUS - Many Results (10+ PNGs):\n"
-                f"   - Score: {breakdown.get('bonus_many_results', 0)} / 1\n"
-                f"\n"
-                f"{'='*60}\n"
-            ),
-            encoding="utf-8"
-        )
+    # Shared scoring rules (morpheus_eval), identical across server variants
+    report = evaluate_and_report(run_path, run_id)
+    score = report["total_score"]
+    max_score = report["max_possible_score"]
 
     return {
         "ok": True,
         "run_id": run_id,
         "total_score": score,
         "max_possible_score": max_score,
-        "score_percentage": round((score / max_score) * 100, 2) if max_score > 0 else 0,
-        "evaluation_json_path": str(eval_json_path),
-        "evaluation_txt_path": str(eval_txt_path),
-        "breakdown": breakdown,
+        "score_percentage": report["score_percentage"],
+        "evaluation_json_path": report["evaluation_json_path"],
+        "evaluation_txt_path": report["evaluation_txt_path"],
+        "breakdown": report["breakdown"],
+        "cache": report["cache"],
         "message": "Evaluation completed and saved to evaluation.json and evaluation.txt",
     }
 
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass evaluator (morpheus_eval) against the previous
+evaluation logic on saved run folders, and check that both agree.
+
+Both sides do the same work: the new evaluator runs only the rules the legacy
+one had (LEGACY_RULES), without the frame check, so the many-results bonus
+counts PNG files in both. --frames adds the full rule set with frame
+decoding as a separate column; it has no legacy counterpart.
+
+Usage:
+    python bench_evaluation.py
+    python bench_evaluation.py --root morpheus_results/morpheus_results_case3_final --repeat 10
+"""
+
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from morpheus_eval import evaluate_run_dir, extract_time_setting
+
+
+DEFAULT_ROOT = Path(__file__).parent / "morpheus_results" / "morpheus_results_case3_final"
+
+# The rules the legacy evaluator implemented
+LEGACY_RULES = ["xml_errors", "model_graph", "time_progression", "stop_time", "results", "many_results"]
+
+# Keys whose values may legitimately differ: the legacy regex truncates
+# scientific-notation Time: values ("1.5e+03" -> 1.5)
+EXPECTED_DIFF_KEYS = {
+    "time_values_sample",
+    "last_time_value",
+    "last_simulation_time",
+    "stop_time_match",
+    "stop_time_score",
+}
+
+
+# -----------------------
+# Legacy evaluation (as in server.py before morpheus_eval)
+# -----------------------
+def _legacy_list_outputs(run_path: Path) -> Dict[str, List[str]]:
+    outputs = {"png": [], "csv": [], "other": []}
+    for ext, key in [(".png", "png"), (".csv", "csv")]:
+        files = list(run_path.rglob(f"*{ext}"))
+        outputs[key] = [str(f.name) for f in files]
+    return outputs
+
+
+def legacy_evaluate(run_path: Path) -> Tuple[int, Dict[str, Any]]:
+    stdout_path = run_path / "stdout.log"
+    stderr_path = run_path / "stderr.log"
+    score = 0
+    breakdown: Dict[str, Any] = {}
+
+    error_count = 0
+    if stderr_path.exists():
+        stderr_content = stderr_path.read_text(errors="ignore").strip()
+        if stderr_content:
+            error_count = len([l for l in stderr_content.split("\n") if l.strip()])
+    breakdown["xml_error_count"] = error_count
+    score -= error_count
+
+    graph_files = list(run_path.rglob("model_graph.dot"))
+    breakdown["model_graph_present"] = bool(graph_files)
+    score += 1 if graph_files else 0
+
+    time_values = []
+    if stdout_path.exists():
+        stdout_content = stdout_path.read_text(errors="ignore")
+        model_up_idx = stdout_content.lower().find("model is up")
+        after_model_up = stdout_content[model_up_idx:] if model_up_idx >= 0 else stdout_content
+        time_pattern = re.compile(r"Time:\s*<?(\d+\.?\d*)", re.IGNORECASE)
+        for match in time_pattern.finditer(after_model_up):
+            try:
+                time_values.append(float(match.group(1)))
+            except ValueError:
+                continue
+    n = len(time_values)
+    time_score = 0 if n == 0 else 1 if n <= 10 else 2 if n <= 50 else 3
+    breakdown["time_lines_count"] = n
+    breakdown["time_score"] = time_score
+    breakdown["time_values_sample"] = time_values[:5]
+    breakdown["last_time_value"] = time_values[-1] if time_values else None
+    score += time_score
+
+    stop_time = extract_time_setting(run_path / "model.xml", "StopTime")
+    last_time = time_values[-1] if time_values else None
+    match = stop_time is not None and last_time is not None and abs(stop_time - last_time) < 1.0
+    breakdown["stop_time_match"] = match
+    score += 1 if match else 0
+
+    outputs = _legacy_list_outputs(run_path)
+    png_count = len(outputs["png"])
+    csv_count = len(outputs["csv"])
+    breakdown["png_count"] = png_count
+    breakdown["csv_count"] = csv_count
+    score += 1 if (png_count or csv_count) else 0
+    breakdown["bonus_many_results"] = 1 if png_count >= 10 else 0
+    score += breakdown["bonus_many_results"]
+    return score, breakdown
+
+
+# -----------------------
+# Benchmark
+# -----------------------
+def find_run_dirs(root: Path) -> List[Path]:
+    markers = ("model.xml", "stdout.log")
+    return sorted({p.parent for m in markers for p in root.rglob(m)})
+
+
+def evaluate_like_legacy(run_path: Path) -> Dict[str, Any]:
+    return evaluate_run_dir(run_path, run_path.name, use_cache=False, rules=LEGACY_RULES, check_frames=False)
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare legacy and single-pass run evaluation")
+    parser.add_argument("--root", type=Path, default=DEFAULT_ROOT, help="Folder containing run directories")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions per run (best is kept)")
+    parser.add_argument(
+        "--frames",
+        action="store_true",
+        help="Also time the full rule set with frame decoding (uncached), not compared with legacy",
+    )
+    args = parser.parse_args()
+
+    run_dirs = find_run_dirs(args.root)
+    if not run_dirs:
+        print(f"No run directories found under {args.root}")
+        return 1
+
+    total_legacy = total_new = total_full = 0.0
+    mismatches = 0
+    full_header = f" {'full ms':>9}" if args.frames else ""
+    print(f"{'run':<60} {'legacy ms':>10} {'new ms':>8} {'speedup':>8}{full_header}  agree")
+    for run_path in run_dirs:
+        legacy_score, legacy = legacy_evaluate(run_path)
+        new = evaluate_like_legacy(run_path)
+        diffs = [k for k, v in legacy.items() if k not in EXPECTED_DIFF_KEYS and new["breakdown"].get(k) != v]
+        explained = [k for k in EXPECTED_DIFF_KEYS if k in legacy and new["breakdown"].get(k) != legacy[k]]
+        if legacy_score != new["total_score"] and not explained:
+            diffs.append("total_score")
+        agree = not diffs
+        mismatches += 0 if agree else 1
+
+        t_legacy = timed(lambda: legacy_evaluate(run_path), args.repeat)
+        t_new = timed(lambda: evaluate_like_legacy(run_path), args.repeat)
+        total_legacy += t_legacy
+        total_new += t_new
+        full_col = ""
+        if args.frames:
+            t_full = timed(lambda: evaluate_run_dir(run_path, run_path.name, use_cache=False), args.repeat)
+            total_full += t_full
+            full_col = f" {t_full * 1000:>9.2f}"
+
+        name = str(run_path.relative_to(args.root))[-60:]
+        note = "yes" if agree else "NO " + ", ".join(diffs)
+        if agree and explained:
+            note += f" (expected: {', '.join(sorted(explained))})"
+        print(
+            f"{name:<60} {t_legacy * 1000:>10.2f} {t_new * 1000:>8.2f} "
+            f"{t_legacy / t_new if t_new else float('inf'):>7.1f}x{full_col}  {note}"
+        )
+
+    print("-" * 100)
+    print(
+        f"{len(run_dirs)} runs: legacy {total_legacy * 1000:.1f} ms, single-pass {total_new * 1000:.1f} ms "
+        f"({total_legacy / total_new:.1f}x), {mismatches} breakdown mismatch(es)"
+    )
+    if args.frames:
+        print(f"full rule set with frame decoding: {total_full * 1000:.1f} ms")
+    return 0 if mismatches == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Re-score every Morpheus run folder under a root in parallel and write one
+consolidated table (evaluation_summary.json plus .csv or .parquet).
+
+Usage:
+    python evaluate_all.py                                  # MORPHEUS_RUNS_DIR
+    python evaluate_all.py morpheus_results                 # case1-case3
+    python evaluate_all.py morpheus_results/morpheus_results_case3_final --pattern "4_*/*"
+    python evaluate_all.py morpheus_results --format parquet --workers 8 --no-reports
+    python evaluate_all.py morpheus_results --frames        # also decode PNG frames (slow)
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from morpheus_eval import evaluate_many, write_summary_table
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Evaluate all Morpheus run folders under a root")
+    parser.add_argument(
+        "root",
+        nargs="?",
+        type=Path,
+        default=Path(os.getenv("MORPHEUS_RUNS_DIR", ".")).expanduser(),
+        help="Folder to search for runs (default: $MORPHEUS_RUNS_DIR)",
+    )
+    parser.add_argument("--pattern", default="*", help="Glob on the run folder path relative to root, or its name")
+    parser.add_argument("--format", dest="table_format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--workers", type=int, default=None, help="Processes to use (default: all cores)")
+    parser.add_argument("--out", type=Path, default=None, help="Where to write the summary (default: root)")
+    parser.add_argument("--no-reports", action="store_true", help="Do not refresh per-run evaluation.json/.txt")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not write .evaluation_cache.json")
+    parser.add_argument(
+        "--frames",
+        action="store_true",
+        help="Check PNG frames for the many-results bonus instead of counting them (decodes every new frame)",
+    )
+    args = parser.parse_args()
+
+    if not args.root.is_dir():
+        print(f"Not a directory: {args.root}")
+        return 1
+
+    t0 = time.perf_counter()
+    rows = evaluate_many(
+        args.root,
+        pattern=args.pattern,
+        workers=args.workers,
+        write_reports=not args.no_reports,
+        use_cache=not args.no_cache,
+        check_frames=args.frames,
+    )
+    elapsed = time.perf_counter() - t0
+    if not rows:
+        print(f"No run folders matching '{args.pattern}' under {args.root}")
+        return 1
+
+    try:
+        paths = write_summary_table(rows, args.out or args.root, table_format=args.table_format, root=args.root)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+
+    for row in rows:
+        score = "ERROR" if row["error"] else f"{row['total_score']}/{row['max_possible_score']}"
+        print(f"  {row['run_dir']:<70} {score}")
+    print(f"\n✓ Evaluated {len(rows)} runs in {elapsed:.2f}s")
+    print(f"  {paths['json']}")
+    print(f"  {paths['table']}")
+    return 0 if not any(r["error"] for r in rows) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
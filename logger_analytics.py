@@ -0,0 +1,305 @@
+"""
+Vectorized analytics for Morpheus Logger output (logger*.csv).
+
+Files are read in fixed-size, line-aligned blocks and each block is parsed
+into a NumPy array, so memory stays bounded by the block size (plus the rows
+of the time point currently being aggregated) however large the file is.
+
+Morpheus writes one row per cell per time point, the rows of a time point
+are contiguous, and the "time" column is repeated at the end of each row;
+repeated columns are dropped. Per time point the engine reports the row
+(cell) count and, per column, valid count, mean, std, min, max and the
+requested quantiles.
+"""
+
+import csv
+import io
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+CHUNK_BYTES = 4 * 1024 * 1024
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+TIME_COLUMN = "time"
+
+
+class LoggerError(ValueError):
+    pass
+
+
+# -----------------------
+# Reading
+# -----------------------
+def read_header(path: Path) -> Tuple[str, List[str], List[int]]:
+    """(delimiter, column names without repeats, index of each in a row)."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        line = f.readline()
+    if not line.strip():
+        raise LoggerError(f"{Path(path).name} is empty")
+    delimiter = "\t" if "\t" in line else ","
+    names = next(csv.reader([line.rstrip("\r\n")], delimiter=delimiter))
+
+    columns: List[str] = []
+    indices: List[int] = []
+    for i, name in enumerate(names):
+        name = name.strip()
+        if name in columns:
+            continue
+        columns.append(name)
+        indices.append(i)
+    return delimiter, columns, indices
+
+
+def iter_blocks(path: Path, chunk_bytes: int = CHUNK_BYTES) -> Iterator[str]:
+    """Data rows (header skipped) in pieces of about `chunk_bytes` ending on a line boundary."""
+    with open(path, "rb") as f:
+        f.readline()
+        carry = b""
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            block = carry + block
+            cut = block.rfind(b"\n") + 1
+            if cut == 0:
+                carry = block
+                continue
+            carry = block[cut:]
+            yield block[:cut].decode("utf-8", errors="ignore")
+        if carry.strip():
+            yield carry.decode("utf-8", errors="ignore")
+
+
+def parse_rows(text: str, delimiter: str, usecols: List[int]) -> np.ndarray:
+    """Rows of `text` as a (rows, len(usecols)) float array; unparsable cells are NaN."""
+    try:
+        return np.loadtxt(io.StringIO(text), delimiter=delimiter, usecols=usecols, dtype=np.float64, ndmin=2)
+    except ValueError:
+        # Non-numeric or short rows: slower parser, unparsable cells become NaN
+        arr = np.genfromtxt(
+            io.StringIO(text),
+            delimiter=delimiter,
+            usecols=usecols,
+            dtype=np.float64,
+            invalid_raise=False,
+        )
+        return np.asarray(arr, dtype=np.float64).reshape(-1, len(usecols))
+
+
+def iter_arrays(path: Path, delimiter: str, usecols: List[int], chunk_bytes: int = CHUNK_BYTES) -> Iterator[np.ndarray]:
+    """
+    (rows, len(usecols)) float arrays, one per block; rows whose first used
+    column (the time) does not parse are dropped.
+    """
+    for text in iter_blocks(path, chunk_bytes):
+        arr = parse_rows(text, delimiter, usecols)
+        yield arr[~np.isnan(arr[:, 0])]
+
+
+# -----------------------
+# Aggregation
+# -----------------------
+def _quantile_key(q: float) -> str:
+    return f"q{q * 100:g}"
+
+
+def _group_stats(values: np.ndarray, starts: np.ndarray, quantiles: Sequence[float]) -> Dict[str, np.ndarray]:
+    """
+    Stats of contiguous row groups beginning at `starts`; `values` is
+    (rows, columns). NaN cells are ignored. Every result is (groups, columns).
+    """
+    n_rows = values.shape[0]
+    sizes = np.diff(np.append(starts, n_rows))
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+
+    n_valid = np.add.reduceat(valid, starts, axis=0).astype(np.float64)
+    total = np.add.reduceat(filled, starts, axis=0)
+    total_sq = np.add.reduceat(filled * filled, starts, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stats = {
+            "valid": n_valid,
+            "sum": total,
+            "sum_sq": total_sq,
+            "min": np.fmin.reduceat(values, starts, axis=0),
+            "max": np.fmax.reduceat(values, starts, axis=0),
+        }
+
+    # Sort each group's values (NaN last) once, then index every quantile
+    group_ids = np.repeat(np.arange(len(starts)), sizes)
+    for q in quantiles:
+        stats[_quantile_key(q)] = np.empty_like(total)
+    for c in range(values.shape[1] if quantiles else 0):
+        order = np.lexsort((values[:, c], group_ids))
+        ordered = values[order, c]
+        n = n_valid[:, c]
+        for q in quantiles:
+            pos = starts + q * np.maximum(n - 1, 0)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.minimum(lo + 1, starts + np.maximum(n - 1, 0).astype(np.int64))
+            frac = pos - lo
+            lo = np.minimum(lo, n_rows - 1)
+            hi = np.minimum(hi, n_rows - 1)
+            result = ordered[lo] * (1 - frac) + ordered[hi] * frac
+            result[n == 0] = np.nan
+            stats[_quantile_key(q)][:, c] = result
+    stats["count"] = sizes.astype(np.float64)
+    return stats
+
+
+def _merge_repeated_times(times: np.ndarray, stats: Dict[str, np.ndarray], quantile_keys: List[str]):
+    """
+    Fold time points that appear in more than one row group (rows of a time
+    point not contiguous). Counts, sums, min and max merge exactly; quantiles
+    of merged time points are unknown and become NaN.
+    """
+    unique, inverse, repeats = np.unique(times, return_inverse=True, return_counts=True)
+    merged: Dict[str, np.ndarray] = {}
+    for key in ("count", "valid", "sum", "sum_sq"):
+        shape = (len(unique),) + stats[key].shape[1:]
+        merged[key] = np.zeros(shape)
+        np.add.at(merged[key], inverse, stats[key])
+    merged["min"] = np.full((len(unique),) + stats["min"].shape[1:], np.nan)
+    merged["max"] = np.full_like(merged["min"], np.nan)
+    np.fmin.at(merged["min"], inverse, stats["min"])
+    np.fmax.at(merged["max"], inverse, stats["max"])
+    single = repeats == 1
+    source = np.zeros(len(unique), dtype=np.int64)
+    source[inverse] = np.arange(len(inverse))
+    for key in quantile_keys:
+        merged[key] = np.full_like(merged["min"], np.nan)
+        merged[key][single] = stats[key][source[single]]
+    return unique, merged
+
+
+def analyze_logger_file(
+    path: Path,
+    columns: Optional[List[str]] = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    chunk_bytes: int = CHUNK_BYTES,
+) -> Dict[str, Any]:
+    """
+    Per-time-point aggregates of `columns` (default: every column but time).
+    Returns {"file", "rows", "columns", "times", "count", "stats", "contiguous_times"}
+    where "times"/"count" are arrays over time points and stats[column] maps
+    "valid", "mean", "std", "min", "max" and "q<percent>" to arrays.
+    """
+    path = Path(path)
+    for q in quantiles:
+        if not 0 <= q <= 1:
+            raise LoggerError(f"Quantiles must be in [0, 1], got {q}")
+
+    delimiter, names, indices = read_header(path)
+    if TIME_COLUMN not in names:
+        raise LoggerError(f"{path.name} has no '{TIME_COLUMN}' column (columns: {names})")
+    if columns is None:
+        columns = [n for n in names if n != TIME_COLUMN]
+    missing = [c for c in columns if c not in names]
+    if missing:
+        raise LoggerError(f"Column(s) {missing} not in {path.name}; available: {names}")
+
+    usecols = [indices[names.index(TIME_COLUMN)]] + [indices[names.index(c)] for c in columns]
+    quantile_keys = [_quantile_key(q) for q in quantiles]
+
+    parts: List[Tuple[np.ndarray, Dict[str, np.ndarray]]] = []
+    carry = np.empty((0, len(usecols)))
+    rows = 0
+
+    def flush(block: np.ndarray, final: bool) -> np.ndarray:
+        # Aggregate every complete time group; the last one may continue
+        # in the next block unless this is the end of the file
+        if block.shape[0] == 0:
+            return block
+        t = block[:, 0]
+        starts = np.flatnonzero(np.concatenate(([True], t[1:] != t[:-1])))
+        if not final:
+            if len(starts) == 1:
+                return block
+            block, rest = block[: starts[-1]], block[starts[-1]:]
+            starts = starts[:-1]
+        else:
+            rest = block[:0]
+        parts.append((block[starts, 0], _group_stats(block[:, 1:], starts, quantiles)))
+        return rest
+
+    for arr in iter_arrays(path, delimiter, usecols, chunk_bytes):
+        rows += arr.shape[0]
+        carry = flush(np.concatenate((carry, arr)) if carry.shape[0] else arr, final=False)
+    flush(carry, final=True)
+
+    if parts:
+        times = np.concatenate([p[0] for p in parts])
+        stats = {key: np.concatenate([p[1][key] for p in parts]) for key in parts[0][1]}
+    else:
+        times = np.empty(0)
+        stats = {key: np.empty((0, len(columns))) for key in ["count", "valid", "sum", "sum_sq", "min", "max"] + quantile_keys}
+        stats["count"] = np.empty(0)
+
+    contiguous = len(np.unique(times)) == len(times)
+    if not contiguous:
+        times, stats = _merge_repeated_times(times, stats, quantile_keys)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = stats["sum"] / stats["valid"]
+        var = np.maximum(stats["sum_sq"] / stats["valid"] - mean * mean, 0.0)
+    per_column = {}
+    for c, name in enumerate(columns):
+        per_column[name] = {
+            "valid": stats["valid"][:, c],
+            "mean": mean[:, c],
+            "std": np.sqrt(var[:, c]),
+            "min": stats["min"][:, c],
+            "max": stats["max"][:, c],
+            **{key: stats[key][:, c] for key in quantile_keys},
+        }
+
+    return {
+        "file": path.name,
+        "rows": rows,
+        "columns": columns,
+        "times": times,
+        "count": stats["count"],
+        "stats": per_column,
+        "contiguous_times": contiguous,
+    }
+
+
+# -----------------------
+# JSON output
+# -----------------------
+def _jsonable(values: np.ndarray) -> List[Optional[float]]:
+    return [None if not math.isfinite(v) else float(f"{v:.6g}") for v in values.tolist()]
+
+
+def summarize_for_json(analysis: Dict[str, Any], max_time_points: int = 50) -> Dict[str, Any]:
+    """
+    JSON-friendly copy of analyze_logger_file's result, with the time axis
+    evenly thinned to at most `max_time_points` (first and last kept).
+    """
+    times = analysis["times"]
+    n = len(times)
+    if n > max_time_points > 1:
+        keep = np.unique(np.linspace(0, n - 1, max_time_points).round().astype(np.int64))
+    else:
+        keep = np.arange(n)
+
+    return {
+        "file": analysis["file"],
+        "rows": analysis["rows"],
+        "time_points": n,
+        "time_points_returned": len(keep),
+        "contiguous_times": analysis["contiguous_times"],
+        "time_range": [float(times[0]), float(times[-1])] if n else None,
+        "times": _jsonable(times[keep]),
+        "count": [int(c) for c in analysis["count"][keep].tolist()],
+        "columns": {
+            name: {
+                key: [int(v) for v in arr[keep].tolist()] if key == "valid" else _jsonable(arr[keep])
+                for key, arr in col.items()
+            }
+            for name, col in analysis["stats"].items()
+        },
+    }
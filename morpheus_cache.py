@@ -0,0 +1,263 @@
+"""
+Content-addressed cache of finished Morpheus runs.
+
+The key is a hash of the canonicalized model.xml (attribute order, comments
+and insignificant whitespace do not matter) plus the identity of the Morpheus
+binary. A cache entry holds the run's stdout/stderr logs, its output files
+and the result returned to the agent. On a hit the outputs are hardlinked
+into the new run folder (copied if linking is not possible), so re-running a
+byte-identical or whitespace-only-different model costs no simulation time.
+
+Entries live under RUNS_ROOT/.result_cache and are evicted least-recently-used
+once the cache grows past max_bytes.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+CACHE_DIR_NAME = ".result_cache"
+INDEX_FILE = "index.json"
+DEFAULT_MAX_BYTES = 5 * 1024**3
+
+# Files in a run folder that are inputs or per-run bookkeeping, never outputs
+NON_OUTPUT_FILES = {
+    "model.xml",
+    "model.thin.xml",
+    "model.posthoc.xml",
+    "posthoc_plots.json",
+    "paper.txt",
+    "metadata.json",
+    "stdout.log",
+    "stderr.log",
+    "evaluation.json",
+    "evaluation.txt",
+    ".evaluation_cache.json",
+}
+
+# (size, mtime_ns) of every file in a run folder, keyed by relative path
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def canonical_xml_hash(xml_path: Path) -> Optional[str]:
+    """sha256 of the C14N form of the model, or None if it does not parse."""
+    try:
+        canonical = ET.canonicalize(from_file=str(xml_path), strip_text=True)
+    except (ET.ParseError, OSError, ValueError):
+        return None
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def binary_identity(binary: str) -> str:
+    """Resolved path, size and mtime of the Morpheus executable."""
+    resolved = shutil.which(binary) or binary
+    try:
+        st = os.stat(resolved)
+    except OSError:
+        return f"{resolved}:missing"
+    return f"{os.path.realpath(resolved)}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def snapshot_dir(path: Path) -> Snapshot:
+    """Record every file under `path` so new/changed outputs can be found after a run."""
+    snap: Snapshot = {}
+    root = str(path)
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            snap[os.path.relpath(full, root)] = (st.st_size, st.st_mtime_ns)
+    return snap
+
+
+def detach_hardlinks(path: Path) -> int:
+    """
+    Unlink output files in `path` that share an inode with the cache.
+    Morpheus truncates existing outputs when it re-runs in place, which would
+    otherwise corrupt the cached copy through the shared link.
+    """
+    removed = 0
+    for rel, _ in snapshot_dir(path).items():
+        if os.path.basename(rel) in NON_OUTPUT_FILES:
+            continue
+        full = path / rel
+        try:
+            if full.stat().st_nlink > 1:
+                full.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class ResultCache:
+    """Size-bounded LRU cache of Morpheus run outputs. Safe to use from several threads."""
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+
+    # -----------------------
+    # Keys
+    # -----------------------
+    def key_for(self, xml_path: Path, binary: str) -> Optional[str]:
+        xml_hash = canonical_xml_hash(xml_path)
+        if xml_hash is None:
+            return None
+        return hashlib.sha256(f"{xml_hash}\n{binary_identity(binary)}".encode("utf-8")).hexdigest()
+
+    # -----------------------
+    # Index
+    # -----------------------
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if self._index is None:
+            try:
+                self._index = json.loads((self.root / INDEX_FILE).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f"{INDEX_FILE}.tmp"
+        tmp.write_text(json.dumps(self._index, indent=2), encoding="utf-8")
+        os.replace(tmp, self.root / INDEX_FILE)
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key
+
+    # -----------------------
+    # Lookup / store
+    # -----------------------
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry metadata (and bump its LRU position), or None."""
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is None or not self._entry_dir(key).is_dir():
+                if entry is not None:
+                    del index[key]
+                    self._save_index()
+                self.misses += 1
+                return None
+            entry["last_used"] = time.time()
+            entry["hits"] = entry.get("hits", 0) + 1
+            self._save_index()
+            self.hits += 1
+            return dict(entry)
+
+    def store(
+        self,
+        key: str,
+        run_path: Path,
+        before: Snapshot,
+        result: Dict[str, Any],
+        stdout_path: Path,
+        stderr_path: Path,
+    ) -> None:
+        """Add a finished run. Outputs are the files created or changed since `before`."""
+        after = snapshot_dir(run_path)
+        outputs: List[str] = sorted(
+            rel for rel, sig in after.items()
+            if before.get(rel) != sig and os.path.basename(rel) not in NON_OUTPUT_FILES
+        )
+
+        entry_dir = self._entry_dir(key)
+        staging = self.root / f".{key}.{os.getpid()}.{threading.get_ident()}"
+        if staging.exists():
+            shutil.rmtree(staging, ignore_errors=True)
+        try:
+            for rel in outputs:
+                _link_or_copy(run_path / rel, staging / "files" / rel)
+            for src, name in ((stdout_path, "stdout.log"), (stderr_path, "stderr.log")):
+                if src.exists():
+                    # Logs are rewritten on every run, so never share their inode
+                    shutil.copy2(src, staging / name)
+            (staging / "result.json").write_text(json.dumps(result, indent=2), encoding="utf-8")
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        size = sum(v[0] for v in snapshot_dir(staging).values())
+        with self._lock:
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(staging, entry_dir)
+            now = time.time()
+            index = self._load_index()
+            index[key] = {
+                "key": key,
+                "source_run_id": result.get("run_id"),
+                "bytes": size,
+                "files": outputs,
+                "created": now,
+                "last_used": now,
+                "hits": 0,
+            }
+            self._evict(keep=key)
+            self._save_index()
+
+    def materialize(self, key: str, entry: Dict[str, Any], run_path: Path) -> Dict[str, Any]:
+        """
+        Hardlink the cached outputs into `run_path` and restore stdout.log /
+        stderr.log. Returns the cached run result. Per-run files such as
+        metadata.json are never linked, even from entries stored before they
+        were listed in NON_OUTPUT_FILES.
+        """
+        entry_dir = self._entry_dir(key)
+        for rel in entry.get("files", []):
+            if os.path.basename(rel) in NON_OUTPUT_FILES:
+                continue
+            _link_or_copy(entry_dir / "files" / rel, run_path / rel)
+        for name in ("stdout.log", "stderr.log"):
+            src = entry_dir / name
+            if src.exists():
+                shutil.copy2(src, run_path / name)
+        return json.loads((entry_dir / "result.json").read_text(encoding="utf-8"))
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        index = self._load_index()
+        total = sum(e.get("bytes", 0) for e in index.values())
+        for key in sorted(index, key=lambda k: index[k].get("last_used", 0)):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= index[key].get("bytes", 0)
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            del index[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            index = self._load_index()
+            return {
+                "entries": len(index),
+                "bytes": sum(e.get("bytes", 0) for e in index.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,339 @@
+"""
+Run-to-run comparison of two Morpheus run folders.
+
+  - model.xml: structural diff. Elements are addressed by a path whose steps
+    use the identifying attribute when there is one
+    (CellType[@name='amoeba']/Property[@symbol='v']) and a position otherwise,
+    so reordering or inserting a declaration does not shift every path after it.
+  - evaluation: deltas between the two score breakdowns (cached evaluator).
+  - outputs: output files present in only one run, per-extension counts.
+  - loggers: per column of every logger*.csv present in both runs, the max
+    absolute difference and RMSE. When both files logged the same time column
+    row for row, rows are compared directly, streaming both files in parallel
+    blocks; otherwise the per-time-point means are compared on the time points
+    both runs share.
+"""
+
+import math
+import os
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from logger_analytics import CHUNK_BYTES, TIME_COLUMN, LoggerError, analyze_logger_file, iter_arrays, read_header
+from morpheus_cache import NON_OUTPUT_FILES
+from morpheus_eval import evaluate_run_dir
+
+
+ID_ATTRIBUTES = ("symbol", "name", "id", "title")
+MAX_XML_CHANGES = 200
+MAX_LISTED_FILES = 50
+LOGGER_GLOB = "logger*.csv"
+
+
+def _rounded(x: Optional[float]) -> Optional[float]:
+    if x is None or not math.isfinite(x):
+        return None
+    return float(f"{x:.6g}")
+
+
+# -----------------------
+# model.xml
+# -----------------------
+def _flatten(root: ET.Element) -> Dict[str, Tuple[Optional[str], Dict[str, str], str]]:
+    """path -> (parent path, attributes, whitespace-normalized text), document order."""
+    flat: Dict[str, Tuple[Optional[str], Dict[str, str], str]] = {}
+
+    def visit(el: ET.Element, path: str, parent: Optional[str]) -> None:
+        flat[path] = (parent, dict(el.attrib), " ".join((el.text or "").split()))
+        unkeyed: Dict[str, int] = {}
+        for child in el:
+            if not isinstance(child.tag, str):
+                continue
+            if not any(child.get(a) for a in ID_ATTRIBUTES):
+                unkeyed[child.tag] = unkeyed.get(child.tag, 0) + 1
+        seen: Dict[str, int] = {}
+        for child in el:
+            if not isinstance(child.tag, str):
+                continue
+            attr = next((a for a in ID_ATTRIBUTES if child.get(a)), None)
+            step = f"{child.tag}[@{attr}='{child.get(attr)}']" if attr else child.tag
+            seen[step] = seen.get(step, 0) + 1
+            # Positions only where the step alone is ambiguous
+            if (attr and seen[step] > 1) or (not attr and unkeyed[child.tag] > 1):
+                step = f"{step}[{seen[step]}]"
+            visit(child, f"{path}/{step}", path)
+
+    visit(root, root.tag, None)
+    return flat
+
+
+def diff_models(xml_a: Path, xml_b: Path) -> Dict[str, Any]:
+    """Elements added/removed and attribute/text changes from `xml_a` to `xml_b`."""
+    trees = []
+    for path in (xml_a, xml_b):
+        try:
+            trees.append(_flatten(ET.parse(str(path)).getroot()))
+        except (ET.ParseError, OSError) as e:
+            return {"error": f"{path}: {e}"}
+    a, b = trees
+
+    # Only the topmost added/removed element of a subtree is listed
+    added = [p for p, (parent, _, _) in b.items() if p not in a and parent in a]
+    removed = [p for p, (parent, _, _) in a.items() if p not in b and parent in b]
+    changed = []
+    for path, (_, attrs_a, text_a) in a.items():
+        if path not in b:
+            continue
+        _, attrs_b, text_b = b[path]
+        for attr in list(attrs_a) + [k for k in attrs_b if k not in attrs_a]:
+            if attrs_a.get(attr) != attrs_b.get(attr):
+                changed.append({"path": path, "attribute": attr, "a": attrs_a.get(attr), "b": attrs_b.get(attr)})
+        if text_a != text_b:
+            changed.append({"path": path, "attribute": "#text", "a": text_a, "b": text_b})
+
+    return {
+        "identical": not (added or removed or changed),
+        "elements": {"a": len(a), "b": len(b)},
+        "added_count": len(added),
+        "removed_count": len(removed),
+        "changed_count": len(changed),
+        "added": added[:MAX_XML_CHANGES],
+        "removed": removed[:MAX_XML_CHANGES],
+        "changed": changed[:MAX_XML_CHANGES],
+    }
+
+
+# -----------------------
+# Evaluation breakdown
+# -----------------------
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _scalars(breakdown: Dict[str, Any]) -> Dict[str, Any]:
+    """Scalar breakdown entries, nested dicts flattened one level ("frame_check.blank_frames")."""
+    flat = {}
+    for key, value in breakdown.items():
+        if isinstance(value, dict):
+            for sub, v in value.items():
+                if not isinstance(v, (dict, list)):
+                    flat[f"{key}.{sub}"] = v
+        elif not isinstance(value, list):
+            flat[key] = value
+    return flat
+
+
+def evaluation_deltas(run_a: Path, run_b: Path) -> Dict[str, Any]:
+    """
+    Total score and every differing scalar of the two breakdowns. Cached
+    components are reused, but nothing is written to either run folder.
+    """
+    a = evaluate_run_dir(run_a, Path(run_a).name, write_cache=False)
+    b = evaluate_run_dir(run_b, Path(run_b).name, write_cache=False)
+    flat_a, flat_b = _scalars(a["breakdown"]), _scalars(b["breakdown"])
+
+    deltas = {}
+    for key in list(flat_a) + [k for k in flat_b if k not in flat_a]:
+        va, vb = flat_a.get(key), flat_b.get(key)
+        if va == vb:
+            continue
+        entry = {"a": va, "b": vb}
+        if _is_number(va) and _is_number(vb):
+            entry["delta"] = vb - va if isinstance(va, int) and isinstance(vb, int) else _rounded(vb - va)
+        deltas[key] = entry
+
+    return {
+        "total_score": {"a": a["total_score"], "b": b["total_score"], "delta": b["total_score"] - a["total_score"]},
+        "max_possible_score": a["max_possible_score"],
+        "deltas": deltas,
+    }
+
+
+# -----------------------
+# Output files
+# -----------------------
+def list_output_files(run_path: Path) -> Dict[str, int]:
+    """Relative path -> size of every output file (inputs, reports and hidden files excluded)."""
+    files = {}
+    root = str(run_path)
+    prefix = len(os.path.join(root, ""))
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in filenames:
+            if name.startswith(".") or name in NON_OUTPUT_FILES:
+                continue
+            full = os.path.join(dirpath, name)
+            try:
+                files[full[prefix:]] = os.stat(full).st_size
+            except OSError:
+                continue
+    return files
+
+
+def diff_outputs(run_a: Path, run_b: Path) -> Dict[str, Any]:
+    a, b = list_output_files(run_a), list_output_files(run_b)
+    only_a = sorted(set(a) - set(b))
+    only_b = sorted(set(b) - set(a))
+    common = [rel for rel in a if rel in b]
+
+    by_extension: Dict[str, Dict[str, int]] = {}
+    for side, files in (("a", a), ("b", b)):
+        for rel in files:
+            ext = os.path.splitext(rel)[1].lower() or "(none)"
+            counts = by_extension.setdefault(ext, {"a": 0, "b": 0})
+            counts[side] += 1
+
+    return {
+        "files": {"a": len(a), "b": len(b), "common": len(common)},
+        "by_extension": dict(sorted(by_extension.items())),
+        "size_changed": sum(1 for rel in common if a[rel] != b[rel]),
+        "only_in_a_count": len(only_a),
+        "only_in_b_count": len(only_b),
+        "only_in_a": only_a[:MAX_LISTED_FILES],
+        "only_in_b": only_b[:MAX_LISTED_FILES],
+    }
+
+
+# -----------------------
+# Logger CSVs
+# -----------------------
+class _DiffStats:
+    """Running max |b - a|, sum of squares and count per column over finite pairs."""
+
+    def __init__(self, n_columns: int):
+        self.max_abs = np.zeros(n_columns)
+        self.sum_sq = np.zeros(n_columns)
+        self.compared = np.zeros(n_columns, dtype=np.int64)
+        self.finite_mismatch = np.zeros(n_columns, dtype=np.int64)
+
+    def add(self, a: np.ndarray, b: np.ndarray) -> None:
+        if a.shape[0] == 0:
+            return
+        finite_a, finite_b = np.isfinite(a), np.isfinite(b)
+        both = finite_a & finite_b
+        with np.errstate(invalid="ignore", over="ignore"):
+            diff = np.where(both, np.abs(b - a), 0.0)
+        self.max_abs = np.maximum(self.max_abs, diff.max(axis=0))
+        self.sum_sq += (diff * diff).sum(axis=0)
+        self.compared += both.sum(axis=0)
+        self.finite_mismatch += (finite_a != finite_b).sum(axis=0)
+
+    def result(self, columns: List[str]) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for c, name in enumerate(columns):
+            n = int(self.compared[c])
+            out[name] = {
+                "max_abs_diff": _rounded(float(self.max_abs[c])) if n else None,
+                "rmse": _rounded(math.sqrt(self.sum_sq[c] / n)) if n else None,
+                "compared": n,
+                "finite_mismatch": int(self.finite_mismatch[c]),
+            }
+        return out
+
+
+def _rowwise(arrays_a: Iterator[np.ndarray], arrays_b: Iterator[np.ndarray], n_columns: int) -> Optional[Tuple[_DiffStats, int]]:
+    """
+    Compare two row streams block by block; (stats, rows) or None as soon as
+    the time columns (first column) or the row counts disagree.
+    """
+    stats = _DiffStats(n_columns)
+    buf_a = buf_b = np.empty((0, n_columns + 1))
+    rows = 0
+    while True:
+        while buf_a.shape[0] == 0:
+            buf_a = next(arrays_a, None)
+            if buf_a is None:
+                buf_a = np.empty((0, n_columns + 1))
+                break
+        while buf_b.shape[0] == 0:
+            buf_b = next(arrays_b, None)
+            if buf_b is None:
+                buf_b = np.empty((0, n_columns + 1))
+                break
+        n = min(buf_a.shape[0], buf_b.shape[0])
+        if n == 0:
+            break
+        a, buf_a = buf_a[:n], buf_a[n:]
+        b, buf_b = buf_b[:n], buf_b[n:]
+        if not np.array_equal(a[:, 0], b[:, 0]):
+            return None
+        stats.add(a[:, 1:], b[:, 1:])
+        rows += n
+    if buf_a.shape[0] or buf_b.shape[0]:
+        return None
+    return stats, rows
+
+
+def compare_logger_files(path_a: Path, path_b: Path, chunk_bytes: int = CHUNK_BYTES) -> Dict[str, Any]:
+    """Max abs diff / RMSE per column shared by two logger CSVs."""
+    delim_a, names_a, idx_a = read_header(path_a)
+    delim_b, names_b, idx_b = read_header(path_b)
+    for path, names in ((path_a, names_a), (path_b, names_b)):
+        if TIME_COLUMN not in names:
+            raise LoggerError(f"{Path(path).name} has no '{TIME_COLUMN}' column")
+    columns = [n for n in names_a if n != TIME_COLUMN and n in names_b]
+    result: Dict[str, Any] = {
+        "only_in_a": [n for n in names_a if n not in names_b],
+        "only_in_b": [n for n in names_b if n not in names_a],
+    }
+    if not columns:
+        return {**result, "basis": None, "columns": {}}
+
+    usecols_a = [idx_a[names_a.index(c)] for c in [TIME_COLUMN] + columns]
+    usecols_b = [idx_b[names_b.index(c)] for c in [TIME_COLUMN] + columns]
+    paired = _rowwise(
+        iter_arrays(path_a, delim_a, usecols_a, chunk_bytes),
+        iter_arrays(path_b, delim_b, usecols_b, chunk_bytes),
+        len(columns),
+    )
+    if paired is not None:
+        stats, rows = paired
+        return {**result, "basis": "rows", "rows": rows, "columns": stats.result(columns)}
+
+    # Different time axes or cell counts: compare the time-point means
+    a = analyze_logger_file(path_a, columns, quantiles=(), chunk_bytes=chunk_bytes)
+    b = analyze_logger_file(path_b, columns, quantiles=(), chunk_bytes=chunk_bytes)
+    _, ia, ib = np.intersect1d(a["times"], b["times"], assume_unique=True, return_indices=True)
+    stats = _DiffStats(len(columns))
+    stats.add(
+        np.column_stack([a["stats"][c]["mean"][ia] for c in columns]),
+        np.column_stack([b["stats"][c]["mean"][ib] for c in columns]),
+    )
+    return {
+        **result,
+        "basis": "time_means",
+        "time_points": {"a": len(a["times"]), "b": len(b["times"]), "common": len(ia)},
+        "columns": stats.result(columns),
+    }
+
+
+def compare_loggers(run_a: Path, run_b: Path, chunk_bytes: int = CHUNK_BYTES) -> Dict[str, Any]:
+    names_a = {p.name for p in Path(run_a).glob(LOGGER_GLOB)}
+    names_b = {p.name for p in Path(run_b).glob(LOGGER_GLOB)}
+    files = {}
+    skipped = {}
+    for name in sorted(names_a & names_b):
+        try:
+            files[name] = compare_logger_files(Path(run_a) / name, Path(run_b) / name, chunk_bytes)
+        except (LoggerError, OSError) as e:
+            skipped[name] = str(e)
+    return {
+        "files": files,
+        "skipped": skipped,
+        "only_in_a": sorted(names_a - names_b),
+        "only_in_b": sorted(names_b - names_a),
+    }
+
+
+def compare_run_dirs(run_a: Path, run_b: Path, chunk_bytes: int = CHUNK_BYTES) -> Dict[str, Any]:
+    """Model, evaluation, output and logger differences from `run_a` to `run_b`."""
+    run_a, run_b = Path(run_a), Path(run_b)
+    return {
+        "model": diff_models(run_a / "model.xml", run_b / "model.xml"),
+        "evaluation": evaluation_deltas(run_a, run_b),
+        "outputs": diff_outputs(run_a, run_b),
+        "loggers": compare_loggers(run_a, run_b, chunk_bytes),
+    }
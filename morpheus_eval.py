@@ -0,0 +1,1084 @@
+"""
+Single-pass evaluator for Morpheus run folders.
+
+One os.scandir walk collects every output file (PNGs, CSVs, model graph) and
+stdout.log / stderr.log are streamed in bounded blocks, so large logs and folders
+with hundreds of frames are never held in memory or walked more than once.
+Scoring is a registry of rules (scoring_rule): each rule declares the
+artifacts it reads, the artifacts are gathered once per evaluation (and cached),
+and every rule runs over the same parsed data, so a new metric adds no file
+scan. Every MCP server variant scores through this module. PNG frames are quality-checked by morpheus_frames for the many-results bonus
+and gnuplot error logs are digested by morpheus_gnuplot (not scored). Logger
+CSVs and field snapshots are scanned for NaN/Inf/blow-ups by morpheus_numerics
+(not scored).
+
+evaluate_many / write_summary_table re-score every run folder under a root
+on a process pool and write one consolidated table (see evaluate_all.py).
+"""
+
+import os
+import re
+import csv
+import json
+import fnmatch
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from morpheus_frames import analyze_frames, frames_available
+from morpheus_gnuplot import digest_gnuplot_logs
+from morpheus_numerics import SNAPSHOT_SUFFIX, scan_run_numerics
+
+
+MODEL_UP_MARKER = "model is up"
+MODEL_GRAPH_FILE = "model_graph.dot"
+# model.xml sections reported by the model_sections rule
+MODEL_SECTIONS = ("Analysis", "Gnuplotter", "Logger", "ModelGraph")
+
+# "Time: 150", "Time: <0.5>", "Time: 1.5e+03". Matched against lower-cased
+# text: a case-sensitive literal prefix lets re skip ahead much faster than
+# re.IGNORECASE does.
+TIME_VALUE_RE = re.compile(r"time:\s*<?\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)")
+
+TIME_SAMPLE_SIZE = 5
+PNG_LIST_LIMIT = 20
+STOP_TIME_TOLERANCE = 1.0
+MANY_RESULTS_FRAMES = 10
+
+# Frame check used when frames are not decoded (check_frames=False)
+FRAMES_SKIPPED: Dict[str, Any] = {
+    "available": False,
+    "reason": "not requested (bulk re-scoring counts PNG files)",
+    "frames_detail": {},
+}
+
+READ_BLOCK_CHARS = 1024 * 1024
+
+# Per-run cache of component results; bump the version when scoring changes
+EVAL_CACHE_FILE = ".evaluation_cache.json"
+EVAL_CACHE_VERSION = 5
+
+
+# -----------------------
+# Model settings
+# -----------------------
+def extract_time_setting(xml_path: Path, tag: str) -> Optional[float]:
+    """Numeric value of <StopTime>/<StartTime> (attribute or text form), or None."""
+    if not xml_path.exists():
+        return None
+    return time_setting_from_text(xml_path.read_text(errors="ignore"), tag)
+
+
+def time_setting_from_text(xml_text: str, tag: str) -> Optional[float]:
+    snake = re.sub(r"(?<!^)([A-Z])", r"_\1", tag).lower()  # StopTime -> stop_time
+
+    # Pattern to match <StopTime value="X"/> or <StopTime>X</StopTime>
+    patterns = [
+        rf'<{tag}\s+value\s*=\s*["\']?([\d.eE+-]+)["\']?\s*/?>',
+        rf'<{tag}[^>]*>([\d.eE+-]+)</{tag}>',
+        rf'{snake}\s*=\s*["\']?([\d.eE+-]+)["\']?',
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, xml_text, re.IGNORECASE)
+        if match:
+            try:
+                return float(match.group(1))
+            except ValueError:
+                continue
+
+    return None
+
+
+# -----------------------
+# Directory walk
+# -----------------------
+def scan_run_dir(run_path: Path) -> Dict[str, Any]:
+    """
+    One walk over the run folder (top-down, like Path.rglob) returning the
+    names of PNG/CSV outputs, model graph files, gnuplot error logs and field
+    snapshots, plus the mtime of every
+    directory visited (taken before it is listed) so the listing can be
+    fingerprinted.
+    """
+    found: Dict[str, Any] = {
+        "png": [],
+        "png_paths": [],
+        "csv": [],
+        "csv_paths": [],
+        "model_graph": [],
+        "gnuplot_logs": [],
+        "snapshot_paths": [],
+        "dirs": {},
+    }
+    root = str(run_path)
+    prefix = len(os.path.join(root, ""))
+    stack = [root]
+    while stack:
+        path = stack.pop(0)
+        try:
+            found["dirs"][os.path.relpath(path, root)] = os.stat(path).st_mtime_ns
+            with os.scandir(path) as it:
+                subdirs = []
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            subdirs.append(entry.path)
+                            continue
+                    except OSError:
+                        continue
+                    name = entry.name
+                    if name.endswith(".png"):
+                        found["png"].append(name)
+                        found["png_paths"].append(entry.path[prefix:])
+                    elif name.endswith(".csv"):
+                        found["csv"].append(name)
+                        found["csv_paths"].append(entry.path[prefix:])
+                    elif name.endswith(SNAPSHOT_SUFFIX):
+                        found["snapshot_paths"].append(entry.path[prefix:])
+                    elif name.startswith("gnuplot_error") and name.endswith(".log"):
+                        found["gnuplot_logs"].append(entry.path[prefix:])
+                    if name == MODEL_GRAPH_FILE:
+                        found["model_graph"].append(name)
+                stack[0:0] = sorted(subdirs)
+        except OSError:
+            continue
+    return found
+
+
+# -----------------------
+# Log streaming
+# -----------------------
+class _TimeSeries:
+    """Count, first few and last value of a stream of Time: values."""
+
+    def __init__(self):
+        self.count = 0
+        self.sample: List[float] = []
+        self.last: Optional[float] = None
+
+    def add_from(self, text: str) -> None:
+        """`text` must already be lower-cased."""
+        values = TIME_VALUE_RE.findall(text)
+        if not values:
+            return
+        self.count += len(values)
+        self.last = float(values[-1])
+        if len(self.sample) < TIME_SAMPLE_SIZE:
+            self.sample.extend(float(v) for v in values[: TIME_SAMPLE_SIZE - len(self.sample)])
+
+    def extend(self, later: "_TimeSeries") -> None:
+        self.count += later.count
+        self.sample = (self.sample + later.sample)[:TIME_SAMPLE_SIZE]
+        if later.last is not None:
+            self.last = later.last
+
+
+def _read_blocks(path: Path):
+    """Yield the file in READ_BLOCK_CHARS pieces that always end on a line boundary."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        carry = ""
+        while True:
+            block = f.read(READ_BLOCK_CHARS)
+            if not block:
+                break
+            block = carry + block
+            cut = block.rfind("\n") + 1
+            if cut == 0:
+                carry = block
+                continue
+            carry = block[cut:]
+            yield block[:cut]
+        if carry:
+            yield carry
+
+
+def scan_stdout(stdout_path: Path) -> Dict[str, Any]:
+    """
+    Stream stdout.log once, block by block. Time: values are counted from the
+    "model is up" marker on; if the marker never appears the whole log counts.
+    """
+    before = _TimeSeries()
+    after = _TimeSeries()
+    model_up = False
+
+    if stdout_path.exists():
+        for block in _read_blocks(stdout_path):
+            block = block.lower()
+            if model_up:
+                after.add_from(block)
+                continue
+            idx = block.find(MODEL_UP_MARKER)
+            if idx < 0:
+                before.add_from(block)
+                continue
+            model_up = True
+            before.add_from(block[:idx])
+            after.add_from(block[idx:])
+
+    if model_up:
+        times = after
+    else:
+        times = before
+        times.extend(after)
+
+    return {
+        "exists": stdout_path.exists(),
+        "model_up": model_up,
+        "time_lines_count": times.count,
+        "time_values_sample": times.sample,
+        "last_time_value": times.last,
+    }
+
+
+def count_error_lines(stderr_path: Path) -> int:
+    """Non-blank lines in stderr.log (each one is a penalty point)."""
+    if not stderr_path.exists():
+        return 0
+    count = 0
+    with open(stderr_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            if line.strip():
+                count += 1
+    return count
+
+
+def time_score_for(time_line_count: int) -> int:
+    if time_line_count == 0:
+        return 0
+    if time_line_count <= 10:
+        return 1
+    if time_line_count <= 50:
+        return 2
+    return 3
+
+
+def _last_run_resources(run_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        meta = json.loads((run_path / "metadata.json").read_text())
+    except (OSError, ValueError):
+        return None
+    return (meta.get("morpheus_run") or {}).get("resources")
+
+
+# -----------------------
+# Fingerprinted components
+# -----------------------
+# Each scored input is computed by one component and cached in
+# EVAL_CACHE_FILE under a fingerprint of the files it reads, so re-evaluating
+# an unchanged run only stats a handful of paths and a change to one input
+# (e.g. a new stderr line) recomputes only the component that reads it.
+def _stat_sig(path: Union[str, Path]) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _dirs_sig(run_path: Path, dirs: Dict[str, int]) -> Optional[Dict[str, int]]:
+    # Adding or removing an entry bumps its parent directory's mtime, so the
+    # directory mtimes recorded by the last walk fingerprint the whole listing
+    sig = {}
+    for rel in dirs:
+        try:
+            sig[rel] = os.stat(os.path.join(run_path, rel)).st_mtime_ns
+        except OSError:
+            return None
+    return sig
+
+
+def _errors_component(run_path: Path, values: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    stderr_path = run_path / "stderr.log"
+    return {"xml_error_count": count_error_lines(stderr_path), "stderr_file_exists": stderr_path.exists()}
+
+
+def _outputs_component(run_path: Path, values: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    files = scan_run_dir(run_path)
+    return {
+        "png_files": files["png"][:PNG_LIST_LIMIT],
+        "png_count": len(files["png"]),
+        "png_paths": files["png_paths"],
+        "csv_files": files["csv"],
+        "csv_paths": files["csv_paths"],
+        "model_graph_files": files["model_graph"],
+        "gnuplot_logs": files["gnuplot_logs"],
+        "snapshot_paths": files["snapshot_paths"],
+        "dirs": files["dirs"],
+    }
+
+
+def _stdout_component(run_path: Path, values: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return scan_stdout(run_path / "stdout.log")
+
+
+def _model_component(run_path: Path, values: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    try:
+        xml_text = (run_path / "model.xml").read_text(errors="ignore")
+    except OSError:
+        return {"exists": False, "stop_time": None, "sections": {tag: False for tag in MODEL_SECTIONS}}
+    return {
+        "exists": True,
+        "stop_time": time_setting_from_text(xml_text, "StopTime"),
+        "sections": {tag: f"<{tag}" in xml_text for tag in MODEL_SECTIONS},
+    }
+
+
+def _resources_component(run_path: Path, values: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"resources": _last_run_resources(run_path), "metadata_exists": (run_path / "metadata.json").exists()}
+
+
+def _frames_component(run_path: Path, values: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # Frames whose size/mtime did not change keep their previous hash
+    paths = values["outputs"]["png_paths"]
+    return analyze_frames(
+        run_path,
+        paths,
+        previous=(previous or {}).get("frames_detail"),
+        signatures=_frames_fingerprint(run_path, None, values),
+    )
+
+
+def _gnuplot_component(run_path: Path, values: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    logs = sorted(values["outputs"]["gnuplot_logs"])
+    return digest_gnuplot_logs(run_path, [run_path / rel for rel in logs])
+
+
+def _numerics_component(run_path: Path, values: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    outputs = values["outputs"]
+    return scan_run_numerics(
+        run_path,
+        csv_paths=[run_path / rel for rel in outputs["csv_paths"]],
+        snapshot_paths=[run_path / rel for rel in outputs["snapshot_paths"]],
+    )
+
+
+def _file_fingerprint(file_name: str):
+    def fingerprint(run_path: Path, cached: Optional[Dict[str, Any]], values: Dict[str, Any]) -> Any:
+        return _stat_sig(run_path / file_name)
+    return fingerprint
+
+
+def _outputs_fingerprint(run_path: Path, cached: Optional[Dict[str, Any]], values: Dict[str, Any]) -> Any:
+    if not cached:
+        return None
+    return _dirs_sig(run_path, cached["value"]["dirs"])
+
+
+def _frames_fingerprint(run_path: Path, cached: Optional[Dict[str, Any]], values: Dict[str, Any]) -> Any:
+    if not frames_available():
+        # Nothing to decode with; recheck once Pillow is installed
+        return "unavailable"
+    root = str(run_path)
+    return {rel: _stat_sig(os.path.join(root, rel)) for rel in values["outputs"]["png_paths"]}
+
+
+def _gnuplot_fingerprint(run_path: Path, cached: Optional[Dict[str, Any]], values: Dict[str, Any]) -> Any:
+    # model.xml is read to attribute messages to its <Plot> elements
+    root = str(run_path)
+    logs = {rel: _stat_sig(os.path.join(root, rel)) for rel in values["outputs"]["gnuplot_logs"]}
+    return {"logs": logs, "model": _stat_sig(run_path / "model.xml") if logs else None}
+
+
+def _numerics_fingerprint(run_path: Path, cached: Optional[Dict[str, Any]], values: Dict[str, Any]) -> Any:
+    root = str(run_path)
+    outputs = values["outputs"]
+    return {rel: _stat_sig(os.path.join(root, rel)) for rel in outputs["csv_paths"] + outputs["snapshot_paths"]}
+
+
+# name -> (compute, fingerprint, required components), in dependency order.
+# compute(run_path, values so far, previous value) and fingerprint(run_path,
+# cached entry, values so far). The outputs listing is fingerprinted by directory mtimes,
+# the frames by the size/mtime of every PNG, the gnuplot digest by its logs
+# and model.xml, the numerics scan by every CSV and snapshot.
+_COMPONENTS = {
+    "errors": (_errors_component, _file_fingerprint("stderr.log"), ()),
+    "outputs": (_outputs_component, _outputs_fingerprint, ()),
+    "stdout": (_stdout_component, _file_fingerprint("stdout.log"), ()),
+    "model": (_model_component, _file_fingerprint("model.xml"), ()),
+    "resources": (_resources_component, _file_fingerprint("metadata.json"), ()),
+    "frames": (_frames_component, _frames_fingerprint, ("outputs",)),
+    "gnuplot": (_gnuplot_component, _gnuplot_fingerprint, ("outputs",)),
+    "numerics": (_numerics_component, _numerics_fingerprint, ("outputs",)),
+}
+
+# Bookkeeping inside component values that is not part of the scored result
+_UNSCORED_KEYS = {"dirs", "frames_detail"}
+
+
+def _load_eval_cache(run_path: Path) -> Dict[str, Any]:
+    try:
+        data = json.loads((run_path / EVAL_CACHE_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != EVAL_CACHE_VERSION:
+        return {}
+    return data.get("components") or {}
+
+
+def _save_eval_cache(run_path: Path, components: Dict[str, Any]) -> None:
+    # Written in place rather than replaced: a rename would bump the run
+    # folder's mtime and invalidate the outputs fingerprint on every call
+    try:
+        (run_path / EVAL_CACHE_FILE).write_text(
+            json.dumps({"version": EVAL_CACHE_VERSION, "components": components}),
+            encoding="utf-8",
+        )
+    except OSError:
+        pass
+
+
+def _scored_part(value: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in value.items() if k not in _UNSCORED_KEYS}
+
+
+def _with_requirements(names: Iterable[str]) -> set:
+    needed = set()
+    todo = list(names)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(_COMPONENTS[name][2])
+    return needed
+
+
+def _collect_components(
+    run_path: Path,
+    use_cache: bool,
+    needed: Optional[Iterable[str]] = None,
+    check_frames: bool = True,
+    write_cache: bool = True,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """
+    Values of the `needed` components (default: all), reusing cached ones
+    whose fingerprint matches. Without check_frames the frame check is only
+    reused, never computed: a stale or missing one is replaced by
+    FRAMES_SKIPPED and the cached entry is left alone. Without write_cache
+    the cache is read but never written.
+    """
+    needed = _with_requirements(_COMPONENTS if needed is None else needed)
+    cached = _load_eval_cache(run_path) if use_cache else {}
+    values: Dict[str, Dict[str, Any]] = {}
+    # Cached components not needed this time are kept for the next evaluation
+    fresh: Dict[str, Any] = {k: v for k, v in cached.items() if k in _COMPONENTS and k not in needed}
+    reused: List[str] = []
+    recomputed: List[str] = []
+    skipped: List[str] = []
+    changed = False
+
+    for name, (compute, fingerprint, _) in _COMPONENTS.items():
+        if name not in needed:
+            continue
+        entry = cached.get(name)
+        # Taken before computing: a write racing with the computation then
+        # leaves a stale fingerprint, never a stale value
+        sig = fingerprint(run_path, entry, values)
+        if entry is not None and sig == entry["fingerprint"]:
+            values[name] = entry["value"]
+            fresh[name] = entry
+            reused.append(name)
+            continue
+        if name == "frames" and not check_frames:
+            values[name] = FRAMES_SKIPPED
+            if entry is not None:
+                fresh[name] = entry
+            skipped.append(name)
+            continue
+        value = compute(run_path, values, entry["value"] if entry else None)
+        if name == "outputs":
+            # Directory mtimes taken by the walk itself, before listing
+            sig = value["dirs"]
+        values[name] = value
+        fresh[name] = {"fingerprint": sig, "value": value}
+        recomputed.append(name)
+        changed = changed or entry is None or _scored_part(entry["value"]) != _scored_part(value)
+
+    if use_cache and write_cache and recomputed:
+        _save_eval_cache(run_path, fresh)
+    return values, {"reused": reused, "recomputed": recomputed, "skipped": skipped, "changed": changed}
+
+
+# -----------------------
+# Scoring rules
+# -----------------------
+class ScoringRule:
+    """
+    One check of the evaluation. `check(artifacts)` gets the values of the
+    components named in `needs` and returns (points, breakdown entries);
+    max_points is its contribution to the maximum score (0 for penalties and
+    informational rules).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        needs: Sequence[str],
+        max_points: int,
+        check: Callable[[Dict[str, Dict[str, Any]]], Tuple[int, Dict[str, Any]]],
+        description: str = "",
+    ):
+        self.name = name
+        self.needs = tuple(needs)
+        self.max_points = max_points
+        self.check = check
+        self.description = description
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "needs": list(self.needs), "max_points": self.max_points, "description": self.description}
+
+
+# name -> rule, run (and merged into the breakdown) in registration order
+SCORING_RULES: Dict[str, ScoringRule] = {}
+
+
+def scoring_rule(name: str, needs: Sequence[str], max_points: int = 0, description: str = ""):
+    """Register `check(artifacts) -> (points, breakdown entries)` as a scoring rule."""
+    unknown = [n for n in needs if n not in _COMPONENTS]
+    if unknown:
+        raise ValueError(f"Rule '{name}' needs unknown artifact(s) {unknown}; available: {list(_COMPONENTS)}")
+
+    def register(check):
+        SCORING_RULES[name] = ScoringRule(name, needs, max_points, check, description)
+        return check
+    return register
+
+
+def select_rules(names: Optional[Sequence[str]] = None) -> List[ScoringRule]:
+    """Registered rules named in `names` (default: all), in registration order."""
+    if names is None:
+        return list(SCORING_RULES.values())
+    unknown = [n for n in names if n not in SCORING_RULES]
+    if unknown:
+        raise ValueError(f"Unknown scoring rule(s) {unknown}; available: {list(SCORING_RULES)}")
+    return [rule for name, rule in SCORING_RULES.items() if name in names]
+
+
+def max_score(rules: Optional[Sequence[ScoringRule]] = None) -> int:
+    return sum(rule.max_points for rule in (SCORING_RULES.values() if rules is None else rules))
+
+
+@scoring_rule("xml_errors", needs=["errors"], description="-1 per error line on stderr.log (best 0)")
+def _rule_xml_errors(artifacts: Dict[str, Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    errors = artifacts["errors"]
+    count = errors["xml_error_count"]
+    return -count, {
+        "xml_error_count": count,
+        "xml_error_penalty": -count,
+        "stderr_file_exists": errors["stderr_file_exists"],
+    }
+
+
+@scoring_rule("model_graph", needs=["outputs"], max_points=1, description="+1 if model_graph.dot was written")
+def _rule_model_graph(artifacts: Dict[str, Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    files = artifacts["outputs"]["model_graph_files"]
+    points = 1 if files else 0
+    return points, {"model_graph_present": bool(files), "model_graph_files": files, "model_graph_score": points}
+
+
+@scoring_rule(
+    "time_progression",
+    needs=["stdout"],
+    max_points=3,
+    description="Time: lines after 'model is up': 0 -> 0, 1-10 -> 1, 11-50 -> 2, 51+ -> 3",
+)
+def _rule_time_progression(artifacts: Dict[str, Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    stdout = artifacts["stdout"]
+    points = time_score_for(stdout["time_lines_count"])
+    return points, {
+        "time_lines_count": stdout["time_lines_count"],
+        "time_score": points,
+        "time_values_sample": stdout["time_values_sample"],
+        "last_time_value": stdout["last_time_value"],
+        "stdout_file_exists": stdout["exists"],
+    }
+
+
+@scoring_rule(
+    "stop_time",
+    needs=["model", "stdout"],
+    max_points=1,
+    description=f"+1 if the last Time: value is within {STOP_TIME_TOLERANCE} of StopTime",
+)
+def _rule_stop_time(artifacts: Dict[str, Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    stop_time = artifacts["model"]["stop_time"]
+    last_time = artifacts["stdout"]["last_time_value"]
+    match = stop_time is not None and last_time is not None and abs(stop_time - last_time) < STOP_TIME_TOLERANCE
+    points = 1 if match else 0
+    return points, {
+        "stop_time": stop_time,
+        "last_simulation_time": last_time,
+        "stop_time_match": match,
+        "stop_time_score": points,
+    }
+
+
+@scoring_rule("results", needs=["outputs"], max_points=1, description="+1 if any PNG or CSV was written")
+def _rule_results(artifacts: Dict[str, Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    outputs = artifacts["outputs"]
+    png_count = outputs["png_count"]
+    csv_count = len(outputs["csv_files"])
+    points = 1 if png_count or csv_count else 0
+    return points, {
+        "results_generated": bool(points),
+        "has_png_files": png_count > 0,
+        "has_csv_files": csv_count > 0,
+        "png_files": outputs["png_files"],
+        "csv_files": outputs["csv_files"],
+        "png_count": png_count,
+        "csv_count": csv_count,
+        "results_score": points,
+    }
+
+
+@scoring_rule(
+    "many_results",
+    needs=["outputs", "frames"],
+    max_points=1,
+    description=f"Bonus +1 for {MANY_RESULTS_FRAMES}+ informative PNGs (not blank, not a repeat of the previous frame)",
+)
+def _rule_many_results(artifacts: Dict[str, Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    frames = artifacts["frames"]
+    # Without Pillow, or with the frame check skipped, every PNG counts
+    informative = frames["informative_frames"] if frames["available"] else artifacts["outputs"]["png_count"]
+    points = 1 if informative >= MANY_RESULTS_FRAMES else 0
+    return points, {
+        "frame_check": {k: v for k, v in frames.items() if k != "frames_detail"},
+        "informative_png_count": informative,
+        "bonus_many_results": points,
+    }
+
+
+@scoring_rule("resources", needs=["resources"], description="Resource usage of the last Morpheus run (not scored)")
+def _rule_resources(artifacts: Dict[str, Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    return 0, {"resources": artifacts["resources"]["resources"]}
+
+
+@scoring_rule("gnuplot_errors", needs=["gnuplot"], description="Deduplicated gnuplot errors with their <Plot> (not scored)")
+def _rule_gnuplot_errors(artifacts: Dict[str, Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    return 0, {"gnuplot_errors": artifacts["gnuplot"]}
+
+
+@scoring_rule("numerical_health", needs=["numerics"], description="NaN/Inf/blow-ups in logger CSVs and field snapshots (not scored)")
+def _rule_numerical_health(artifacts: Dict[str, Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    return 0, {"numerical_health": artifacts["numerics"]}
+
+
+@scoring_rule("model_sections", needs=["model", "resources"], description="Analysis sections of model.xml and metadata.json presence (not scored)")
+def _rule_model_sections(artifacts: Dict[str, Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    sections = artifacts["model"]["sections"]
+    entries = {f"xml_has_{tag.lower()}": present for tag, present in sections.items()}
+    entries["metadata_present"] = artifacts["resources"]["metadata_exists"]
+    if artifacts["model"]["exists"] and not sections["Gnuplotter"]:
+        entries["missing_gnuplotter_warning"] = "model.xml has no <Gnuplotter> in <Analysis>, so no plots are generated"
+    return 0, entries
+
+
+MAX_SCORE = max_score()
+
+
+# -----------------------
+# Evaluation
+# -----------------------
+def evaluate_run_dir(
+    run_path: Path,
+    run_id: str,
+    use_cache: bool = True,
+    rules: Optional[Sequence[str]] = None,
+    check_frames: bool = True,
+    write_cache: bool = True,
+) -> Dict[str, Any]:
+    """
+    Score a run folder with the registered rules (or only those named in
+    `rules`). Returns {"run_id", "total_score", "max_possible_score",
+    "breakdown", "cache"}; "cache" lists the reused, recomputed and skipped
+    components and whether any scored input changed since the last
+    evaluation. Only the component cache file is written, and not with
+    write_cache=False (read-only callers such as compare_runs).
+
+    check_frames=False skips decoding PNG frames (the slow part of a cold
+    evaluation): an up-to-date cached frame check is still used, otherwise the
+    many-results bonus counts PNG files as it does without Pillow.
+    """
+    run_path = Path(run_path)
+    selected = select_rules(rules)
+
+    score = 0
+    breakdown: Dict[str, Any] = {}
+    cache_info: Dict[str, Any] = {"reused": [], "recomputed": [], "skipped": [], "changed": True}
+
+    try:
+        needed = {name for rule in selected for name in rule.needs}
+        values, cache_info = _collect_components(
+            run_path, use_cache, needed, check_frames=check_frames, write_cache=write_cache
+        )
+    except Exception as e:
+        values = None
+        breakdown["evaluation_exception"] = str(e)
+        breakdown["evaluation_failed"] = True
+
+    for rule in selected if values is not None else []:
+        try:
+            points, entries = rule.check({name: values[name] for name in rule.needs})
+        except Exception as e:
+            breakdown["evaluation_exception"] = f"{rule.name}: {e}"
+            breakdown["evaluation_failed"] = True
+            continue
+        breakdown.update(entries)
+        score += points
+
+    return {
+        "run_id": run_id,
+        "total_score": score,
+        "max_possible_score": max_score(selected),
+        "breakdown": breakdown,
+        "cache": cache_info,
+    }
+
+
+def score_percentage(score: int, max_score: int) -> float:
+    return round((score / max_score) * 100, 2) if max_score > 0 else 0
+
+
+# -----------------------
+# Reports
+# -----------------------
+def format_resources(resources: Optional[Dict[str, Any]]) -> str:
+    """Resource block for evaluation.txt (empty if the run has no accounting)."""
+    if not resources:
+        return ""
+    mib = 1024 * 1024
+    phases = resources.get("phases") or {}
+    peak = resources.get("peak_rss_bytes")
+    return (
+        f"Resources (not scored):\n"
+        f"   - Wall time: {resources.get('wall_seconds')} s\n"
+        f"   - CPU time: {resources.get('cpu_seconds')} s "
+        f"(user {resources.get('user_cpu_seconds')}, sys {resources.get('sys_cpu_seconds')})\n"
+        f"   - Peak RSS: {round(peak / mib, 1) if peak else 'N/A'} MiB\n"
+        f"   - Model up after: {phases.get('model_up_seconds')} s, "
+        f"first Time line after: {phases.get('first_time_line_seconds')} s\n"
+        f"   - Output: {resources.get('output_files')} files, "
+        f"{round((resources.get('output_bytes') or 0) / mib, 1)} MiB\n"
+        f"\n"
+    )
+
+
+def format_frame_check(frame_check: Optional[Dict[str, Any]]) -> str:
+    """Frame quality lines for evaluation.txt section 6."""
+    if not frame_check:
+        return ""
+    if not frame_check.get("available"):
+        return f"   - Frame check skipped: {frame_check.get('reason')}\n"
+    frozen = frame_check.get("frozen_series") or []
+    return (
+        f"   - Blank frames: {frame_check.get('blank_frames', 0)}, "
+        f"duplicate frames: {frame_check.get('duplicate_frames', 0)}, "
+        f"unreadable: {frame_check.get('unreadable_frames', 0)}\n"
+        f"   - Frozen series: {', '.join(frozen) if frozen else 'none'}\n"
+    )
+
+
+def format_gnuplot_errors(digest: Optional[Dict[str, Any]], limit: int = 5) -> str:
+    """Most frequent gnuplot error signatures for evaluation.txt."""
+    if not digest or not digest.get("messages"):
+        return ""
+    lines = [
+        f"GNUPLOT ERRORS (not scored): {digest['errors']} errors, {digest['warnings']} warnings "
+        f"in {digest['log_files']} log(s), {digest['distinct_signatures']} distinct\n"
+    ]
+    for sig in digest["signatures"][:limit]:
+        source = sig.get("source") or {}
+        where = source.get("element", "unknown element")
+        if source.get("title"):
+            where += f' "{source["title"]}"'
+        token = f" [{sig['token']}]" if sig.get("token") else ""
+        lines.append(f"   - {sig['count']}x {sig['level']}: {sig['message']}{token} <- {where}\n")
+    lines.append("\n")
+    return "".join(lines)
+
+
+def format_numerical_health(health: Optional[Dict[str, Any]], limit: int = 5) -> str:
+    """NaN/Inf/blow-up hits for evaluation.txt."""
+    if not health:
+        return ""
+    scanned = f"{health.get('csv_files', 0)} CSV(s), {health.get('snapshots', 0)} snapshot(s)"
+    if health.get("clean"):
+        return f"NUMERICAL HEALTH (not scored): no NaN/Inf/blow-up in {scanned}\n\n"
+    lines = [f"NUMERICAL HEALTH (not scored): {health['hit_count']} problem(s) in {scanned}\n"]
+    for hit in health["hits"][:limit]:
+        lines.append(f"   - {hit['kind']} in {hit['file']}: {hit['column']} from time {hit['first_time']}\n")
+    lines.append("\n")
+    return "".join(lines)
+
+
+def format_model_warning(warning: Optional[str]) -> str:
+    return f"WARNING: {warning}\n\n" if warning else ""
+
+
+def format_report(run_id: str, score: int, max_score: int, breakdown: Dict[str, Any]) -> str:
+    """Human-readable evaluation.txt."""
+    return (
+        f"{'='*60}\n"
+        f"MORPHEUS EVALUATION REPORT\n"
+        f"{'='*60}\n"
+        f"Run ID: {run_id}\n"
+        f"Timestamp: {datetime.now().isoformat()}\n"
+        f"\n"
+        f"TOTAL SCORE: {score} / {max_score} ({score_percentage(score, max_score)}%)\n"
+        f"\n"
+        f"{'-'*60}\n"
+        f"SCORING BREAKDOWN:\n"
+        f"{'-'*60}\n"
+        f"\n"
+        f"1. XML/Stderr Errors (penalty, best=0):\n"
+        f"   - Error count: {breakdown.get('xml_error_count', 'N/A')}\n"
+        f"   - Score: {breakdown.get('xml_error_penalty', 0)}\n"
+        f"\n"
+        f"2. Model Graph (model_graph.dot):\n"
+        f"   - Present: {breakdown.get('model_graph_present', False)}\n"
+        f"   - Files: {breakdown.get('model_graph_files', [])}\n"
+        f"   - Score: {breakdown.get('model_graph_score', 0)} / 1\n"
+        f"\n"
+        f"3. Time Step Progression (from stdout.log):\n"
+        f"   - Time lines count: {breakdown.get('time_lines_count', 0)}\n"
+        f"   - Scoring: 0->+0, 1-10->+1, 11-50->+2, 51+->+3\n"
+        f"   - Score: {breakdown.get('time_score', 0)} / 3\n"
+        f"\n"
+        f"4. StopTime Match:\n"
+        f"   - StopTime in XML: {breakdown.get('stop_time', 'N/A')}\n"
+        f"   - Last simulation time: {breakdown.get('last_simulation_time', 'N/A')}\n"
+        f"   - Match: {breakdown.get('stop_time_match', False)}\n"
+        f"   - Score: {breakdown.get('stop_time_score', 0)} / 1\n"
+        f"\n"
+        f"5. Result Files Generated:\n"
+        f"   - PNG files: {breakdown.get('png_count', 0)}\n"
+        f"   - CSV files: {breakdown.get('csv_count', 0)}\n"
+        f"   - Score: {breakdown.get('results_score', 0)} / 1\n"
+        f"\n"
+        f"6. BONUS - Many Results (10+ informative PNGs):\n"
+        f"   - Informative PNGs: {breakdown.get('informative_png_count', 0)}\n"
+        f"{format_frame_check(breakdown.get('frame_check'))}"
+        f"   - Score: {breakdown.get('bonus_many_results', 0)} / 1\n"
+        f"\n"
+        f"{format_resources(breakdown.get('resources'))}"
+        f"{format_gnuplot_errors(breakdown.get('gnuplot_errors'))}"
+        f"{format_numerical_health(breakdown.get('numerical_health'))}"
+        f"{format_model_warning(breakdown.get('missing_gnuplotter_warning'))}"
+        f"{'='*60}\n"
+    )
+
+
+def evaluate_and_report(
+    run_path: Path,
+    run_id: str,
+    use_cache: bool = True,
+    check_frames: bool = True,
+) -> Dict[str, Any]:
+    """
+    evaluate_run_dir plus evaluation.json / evaluation.txt in the run folder.
+    The reports are only rewritten when a scored input changed or one of them
+    is missing ("written" in the result).
+    """
+    run_path = Path(run_path)
+    scored = evaluate_run_dir(run_path, run_id, use_cache=use_cache, check_frames=check_frames)
+    score = scored["total_score"]
+    max_score = scored["max_possible_score"]
+    breakdown = scored["breakdown"]
+
+    eval_json_path = run_path / "evaluation.json"
+    eval_txt_path = run_path / "evaluation.txt"
+    written = scored["cache"]["changed"] or not (eval_json_path.exists() and eval_txt_path.exists())
+    if written:
+        evaluation_result = {
+            "run_id": run_id,
+            "total_score": score,
+            "max_possible_score": max_score,
+            "score_percentage": score_percentage(score, max_score),
+            "breakdown": breakdown,
+            "timestamp": datetime.now().isoformat(),
+        }
+        eval_json_path.write_text(json.dumps(evaluation_result, indent=2), encoding="utf-8")
+        eval_txt_path.write_text(format_report(run_id, score, max_score, breakdown), encoding="utf-8")
+
+    return {
+        **scored,
+        "score_percentage": score_percentage(score, max_score),
+        "evaluation_json_path": str(eval_json_path),
+        "evaluation_txt_path": str(eval_txt_path),
+        "written": written,
+    }
+
+
+# -----------------------
+# Bulk evaluation
+# -----------------------
+RUN_DIR_MARKERS = ("model.xml", "stdout.log")
+SUMMARY_STEM = "evaluation_summary"
+SUMMARY_COLUMNS = [
+    "run_id",
+    "run_dir",
+    "total_score",
+    "max_possible_score",
+    "score_percentage",
+    "xml_error_count",
+    "model_graph_present",
+    "time_lines_count",
+    "time_score",
+    "stop_time",
+    "last_simulation_time",
+    "stop_time_match",
+    "png_count",
+    "informative_png_count",
+    "csv_count",
+    "results_score",
+    "bonus_many_results",
+    "gnuplot_error_count",
+    "numeric_hits",
+    "wall_seconds",
+    "cpu_seconds",
+    "report_written",
+    "error",
+]
+
+
+def find_run_dirs(root: Path, pattern: str = "*") -> List[Path]:
+    """
+    Folders under `root` holding a model.xml or stdout.log whose path
+    relative to `root` matches the glob `pattern`. Hidden folders (e.g. the
+    result cache) are skipped.
+    """
+    root = Path(root)
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        if not any(m in filenames for m in RUN_DIR_MARKERS):
+            continue
+        rel = Path(dirpath).relative_to(root).as_posix()
+        if fnmatch.fnmatch(rel, pattern) or fnmatch.fnmatch(os.path.basename(dirpath), pattern):
+            found.append(Path(dirpath))
+    return found
+
+
+def _summary_row(root: str, run_dir: str, write_reports: bool, use_cache: bool, check_frames: bool) -> Dict[str, Any]:
+    run_path = Path(run_dir)
+    row: Dict[str, Any] = {c: None for c in SUMMARY_COLUMNS}
+    row["run_id"] = run_path.name
+    row["run_dir"] = run_path.relative_to(root).as_posix()
+    try:
+        if write_reports:
+            result = evaluate_and_report(run_path, run_path.name, use_cache=use_cache, check_frames=check_frames)
+            row["report_written"] = result["written"]
+        else:
+            result = evaluate_run_dir(run_path, run_path.name, use_cache=use_cache, check_frames=check_frames)
+            row["report_written"] = False
+    except Exception as e:
+        row["error"] = str(e)
+        return row
+
+    breakdown = result["breakdown"]
+    row["total_score"] = result["total_score"]
+    row["max_possible_score"] = result["max_possible_score"]
+    row["score_percentage"] = score_percentage(result["total_score"], result["max_possible_score"])
+    for key in SUMMARY_COLUMNS:
+        if key in breakdown:
+            row[key] = breakdown[key]
+    resources = breakdown.get("resources") or {}
+    row["wall_seconds"] = resources.get("wall_seconds")
+    row["cpu_seconds"] = resources.get("cpu_seconds")
+    row["gnuplot_error_count"] = (breakdown.get("gnuplot_errors") or {}).get("errors")
+    row["numeric_hits"] = (breakdown.get("numerical_health") or {}).get("hit_count")
+    row["error"] = breakdown.get("evaluation_exception")
+    return row
+
+
+def _summary_row_task(args: Tuple[str, str, bool, bool, bool]) -> Dict[str, Any]:
+    return _summary_row(*args)
+
+
+def evaluate_many(
+    root: Path,
+    pattern: str = "*",
+    workers: Optional[int] = None,
+    write_reports: bool = True,
+    use_cache: bool = True,
+    check_frames: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate every run folder under `root` (see find_run_dirs) across
+    `workers` processes (default: all cores). Returns one summary row per run,
+    in path order. With write_reports each run's evaluation.json/.txt is
+    refreshed as the `evaluation` tool does.
+
+    Frames are only decoded with check_frames: a cold frame check takes over
+    a second on runs with hundreds of PNGs, against a few milliseconds for
+    everything else. Without it, frame checks already cached by `evaluation`
+    are still used.
+    """
+    root = Path(root)
+    run_dirs = find_run_dirs(root, pattern)
+    if not run_dirs:
+        return []
+    tasks = [(str(root), str(d), write_reports, use_cache, check_frames) for d in run_dirs]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        return [_summary_row_task(t) for t in tasks]
+    # Run costs vary from milliseconds to seconds (frame decoding), so hand
+    # out small batches to keep the slow runs from piling up on one worker
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_summary_row_task, tasks, chunksize=chunksize))
+
+
+def write_summary_table(
+    rows: List[Dict[str, Any]],
+    out_dir: Path,
+    table_format: str = "csv",
+    root: Optional[Path] = None,
+) -> Dict[str, str]:
+    """
+    Write <out_dir>/evaluation_summary.json plus .csv or .parquet (Parquet
+    needs pandas with pyarrow or fastparquet). Returns the written paths.
+    """
+    if table_format not in ("csv", "parquet"):
+        raise ValueError("table_format must be 'csv' or 'parquet'")
+    if table_format == "parquet":
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise ValueError(f"Parquet output needs pandas with pyarrow or fastparquet: {e}") from e
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    scored = [r for r in rows if r["score_percentage"] is not None]
+    json_path = out_dir / f"{SUMMARY_STEM}.json"
+    json_path.write_text(
+        json.dumps(
+            {
+                "root": str(root) if root is not None else None,
+                "generated": datetime.now().isoformat(),
+                "runs_evaluated": len(rows),
+                "mean_score_percentage": (
+                    round(sum(r["score_percentage"] for r in scored) / len(scored), 2) if scored else None
+                ),
+                "runs": rows,
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+
+    table_path = out_dir / f"{SUMMARY_STEM}.{table_format}"
+    if table_format == "parquet":
+        try:
+            pd.DataFrame(rows, columns=SUMMARY_COLUMNS).to_parquet(table_path, index=False)
+        except ImportError as e:
+            raise ValueError(f"Parquet output needs pandas with pyarrow or fastparquet: {e}") from e
+    else:
+        with open(table_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    return {"json": str(json_path), "table": str(table_path)}
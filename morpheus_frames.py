@@ -0,0 +1,174 @@
+"""
+Quality check for the PNG frames a Morpheus run writes.
+
+Every frame is decoded and downsampled on a thread pool (Pillow releases the
+GIL while decoding and resizing), then summarized by a 256-bit difference
+hash (dHash) and the grey-level mean / standard deviation of its thumbnail.
+Frames are grouped into series by file name without the frame number
+("plot_00042.png" -> "plot_"), and each series is checked for:
+
+  - blank frames: (almost) uniform colour
+  - duplicate frames: look the same as the previous frame of the series
+  - frozen series: 3+ frames that all look the same as the first one
+
+A frame "looks the same" as another when their hashes differ in at most
+SAME_FRAME_DISTANCE bits, which tolerates a changing time label in the title.
+Frames that are not blank and not duplicates count as informative; the
+`evaluation` bonus for many results is based on that count.
+
+Pillow is optional: without it analyze_frames reports available=False and the
+evaluation falls back to counting PNG files.
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from PIL import Image, ImageStat
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+
+HASH_SIZE = 16                # dHash grid: HASH_SIZE x HASH_SIZE bits
+THUMB_SIZE = 64               # thumbnail edge used for brightness statistics
+BLANK_STDDEV = 2.0            # grey-level std (0-255) below which a frame is blank
+SAME_FRAME_DISTANCE = 6       # max differing hash bits for two frames to look the same
+FROZEN_MIN_FRAMES = 3
+FRAME_WORKERS = min(8, os.cpu_count() or 1)
+
+_FRAME_NUMBER_RE = re.compile(r"\d+$")
+
+
+def frames_available() -> bool:
+    return Image is not None
+
+
+def frame_series(rel_path: str) -> str:
+    """Series a frame belongs to: its path without extension and trailing frame number."""
+    stem = os.path.splitext(rel_path)[0]
+    return _FRAME_NUMBER_RE.sub("", stem)
+
+
+def _frame_number(rel_path: str) -> int:
+    match = _FRAME_NUMBER_RE.search(os.path.splitext(rel_path)[0])
+    return int(match.group()) if match else -1
+
+
+def hash_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def analyze_frame(path: Path) -> Dict[str, Any]:
+    """dHash (hex) and thumbnail grey-level mean/std of one PNG."""
+    try:
+        with Image.open(path) as im:
+            if im.mode not in ("L", "RGB"):
+                im = im.convert("RGB")
+            thumb = im.resize((THUMB_SIZE, THUMB_SIZE), Image.BILINEAR, reducing_gap=2.0).convert("L")
+    except Exception as e:
+        return {"error": str(e)}
+
+    stat = ImageStat.Stat(thumb)
+    small = list(thumb.resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR).getdata())
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (small[offset + col + 1] > small[offset + col])
+    return {
+        "dhash": f"{bits:0{HASH_SIZE * HASH_SIZE // 4}x}",
+        "mean": round(stat.mean[0], 3),
+        "stddev": round(stat.stddev[0], 3),
+    }
+
+
+def analyze_frame_files(
+    run_path: Path,
+    rel_paths: List[str],
+    previous: Optional[Dict[str, Dict[str, Any]]] = None,
+    signatures: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-frame results keyed by relative path. Frames whose signature (size,
+    mtime) matches the one stored in `previous` are not decoded again.
+    """
+    previous = previous or {}
+    signatures = signatures or {}
+    results: Dict[str, Dict[str, Any]] = {}
+    todo = []
+    for rel in rel_paths:
+        old = previous.get(rel)
+        if old is not None and signatures.get(rel) is not None and old.get("sig") == signatures[rel]:
+            results[rel] = old
+        else:
+            todo.append(rel)
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=FRAME_WORKERS) as pool:
+            for rel, frame in zip(todo, pool.map(lambda r: analyze_frame(Path(run_path) / r), todo)):
+                frame["sig"] = signatures.get(rel)
+                results[rel] = frame
+    return results
+
+
+def summarize_frames(frames: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Blank / duplicate / frozen verdicts per series and overall."""
+    series: Dict[str, List[str]] = {}
+    for rel in frames:
+        series.setdefault(frame_series(rel), []).append(rel)
+
+    totals = {"frames": 0, "unreadable_frames": 0, "blank_frames": 0, "duplicate_frames": 0, "informative_frames": 0}
+    per_series: Dict[str, Dict[str, Any]] = {}
+    frozen_series: List[str] = []
+    for name, members in sorted(series.items()):
+        members.sort(key=lambda r: (_frame_number(r), r))
+        stats = {"frames": len(members), "unreadable_frames": 0, "blank_frames": 0, "duplicate_frames": 0, "informative_frames": 0}
+        first_hash = None
+        prev_hash = None
+        all_same = True
+        for rel in members:
+            frame = frames[rel]
+            if "dhash" not in frame:
+                stats["unreadable_frames"] += 1
+                continue
+            h = frame["dhash"]
+            if first_hash is None:
+                first_hash = h
+            elif hash_distance(h, first_hash) > SAME_FRAME_DISTANCE:
+                all_same = False
+            if frame["stddev"] < BLANK_STDDEV:
+                stats["blank_frames"] += 1
+            elif prev_hash is not None and hash_distance(h, prev_hash) <= SAME_FRAME_DISTANCE:
+                stats["duplicate_frames"] += 1
+            else:
+                stats["informative_frames"] += 1
+            prev_hash = h
+        readable = stats["frames"] - stats["unreadable_frames"]
+        stats["frozen"] = readable >= FROZEN_MIN_FRAMES and all_same
+        if stats["frozen"]:
+            frozen_series.append(name)
+        per_series[name] = stats
+        for key in totals:
+            totals[key] += stats[key]
+
+    return {**totals, "frozen_series": frozen_series, "series": per_series}
+
+
+def analyze_frames(
+    run_path: Path,
+    rel_paths: List[str],
+    previous: Optional[Dict[str, Dict[str, Any]]] = None,
+    signatures: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Check the PNG frames `rel_paths` (relative to `run_path`). Returns
+    {"available", "frames_detail", ...summarize_frames}; frames_detail holds
+    the per-file results and can be passed back as `previous`.
+    """
+    if not frames_available():
+        return {"available": False, "reason": "Pillow is not installed", "frames_detail": {}}
+    detail = analyze_frame_files(run_path, rel_paths, previous, signatures)
+    return {"available": True, **summarize_frames(detail), "frames_detail": detail}
@@ -0,0 +1,229 @@
+"""
+Digest of the gnuplot_error_*.log files Morpheus leaves in a run folder.
+
+gnuplot reports a problem as the offending command, a caret under the bad
+token and a "line N: message" line; warnings come either the same way or as
+a bare "Warning: ..." line. The logs are streamed once, each message is
+normalized (line numbers and other numbers -> N) and counted under a
+signature of (level, message, command, offending token), so a 47 KB log of
+300 repeats of the same error becomes one line with count 300.
+
+Each signature is attributed to the analysis element that most likely caused
+it, from model.xml:
+  - a quoted token of the command (e.g. a palette colour) or the offending
+    token found in exactly one <Plot>'s attributes -> that Plot
+  - "multiplot>" commands come from a <Gnuplotter>; with one Gnuplotter, that one
+  - otherwise gnuplot_error_K.log is matched to the K-th plotting element
+    (Gnuplotters, then Logger plots, in document order)
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+GNUPLOT_LOG_GLOB = "gnuplot_error_*.log"
+MAX_SIGNATURES = 50
+MAX_COMMAND_CHARS = 200
+
+_PROMPT_RE = re.compile(r"^(\w+)>\s?(.*)$")
+_LINE_MESSAGE_RE = re.compile(r"^\s*line \d+:\s*(.*)$")
+_WARNING_RE = re.compile(r"^\s*warning:\s*(.*)$", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+_QUOTED_RE = re.compile(r"'([^']*)'|\"([^\"]*)\"")
+_LOG_NUMBER_RE = re.compile(r"gnuplot_error_(\d+)\.log$")
+
+
+# Logs repeat the same few commands and messages thousands of times
+@lru_cache(maxsize=4096)
+def normalize_message(message: str) -> str:
+    return _NUMBER_RE.sub("N", message.strip())
+
+
+@lru_cache(maxsize=4096)
+def _token_at(command: str, column: int) -> Optional[str]:
+    """Word (or quoted string) of `command` covering `column`."""
+    if column < 0 or column >= len(command):
+        return None
+    for match in _QUOTED_RE.finditer(command):
+        if match.start() <= column < match.end():
+            return match.group(1) if match.group(1) is not None else match.group(2)
+    start = column
+    while start > 0 and not command[start - 1].isspace() and command[start - 1] not in ";,()":
+        start -= 1
+    end = column
+    while end < len(command) and not command[end].isspace() and command[end] not in ";,()":
+        end += 1
+    return command[start:end] or None
+
+
+# -----------------------
+# Streaming parser
+# -----------------------
+def parse_gnuplot_log(path: Path, counts: Dict[Tuple, Dict[str, Any]]) -> int:
+    """
+    Stream one log and add its messages to `counts`, keyed by signature.
+    Returns the number of messages read.
+    """
+    messages = 0
+    prompt = None          # (prompt name, command) of the last echoed command
+    caret_column = None
+    name = Path(path).name
+
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if stripped == "^":
+                # Caret column relative to the command after "prompt> "
+                if prompt is not None:
+                    caret_column = line.index("^") - len(prompt[0]) - 2
+                continue
+            match = _LINE_MESSAGE_RE.match(line)
+            if match is None:
+                echoed = _PROMPT_RE.match(stripped)
+                if echoed:
+                    prompt = (echoed.group(1), echoed.group(2).strip())
+                    caret_column = None
+                    continue
+
+            text = match.group(1) if match else stripped
+            warning = _WARNING_RE.match(text)
+            level = "warning" if warning else "error"
+            if warning:
+                text = warning.group(1)
+
+            command = prompt[1] if (match and prompt) else None
+            token = _token_at(command, caret_column) if command and caret_column is not None else None
+            message = normalize_message(text)
+            key = (level, message, command, token)
+            entry = counts.get(key)
+            if entry is None:
+                entry = counts[key] = {
+                    "level": level,
+                    "message": message,
+                    "example": text,
+                    "command": command[:MAX_COMMAND_CHARS] if command else None,
+                    "prompt": prompt[0] if (match and prompt) else None,
+                    "token": token,
+                    "count": 0,
+                    "files": [],
+                }
+            entry["count"] += 1
+            if name not in entry["files"]:
+                entry["files"].append(name)
+            messages += 1
+            if match:
+                prompt = None
+                caret_column = None
+    return messages
+
+
+# -----------------------
+# Attribution
+# -----------------------
+def plotting_elements(xml_path: Path) -> List[Dict[str, Any]]:
+    """Gnuplotters (with their Plots), then Logger plots, in document order."""
+    try:
+        root = ET.parse(str(xml_path)).getroot()
+    except (ET.ParseError, OSError):
+        return []
+
+    gnuplotters = []
+    logger_plots = []
+    for i, gp in enumerate(root.iter("Gnuplotter"), 1):
+        plots = []
+        for j, plot in enumerate(gp.findall("Plot"), 1):
+            values = {v.lower() for el in plot.iter() for v in el.attrib.values()}
+            plots.append({"element": f"Gnuplotter[{i}]/Plot[{j}]", "title": plot.get("title"), "values": values})
+        gnuplotters.append({"element": f"Gnuplotter[{i}]", "kind": "gnuplotter", "plots": plots})
+    for i, logger in enumerate(root.iter("Logger"), 1):
+        for j, plot in enumerate(logger.iter("Plot"), 1):
+            values = {v.lower() for el in plot.iter() for v in el.attrib.values()}
+            logger_plots.append({
+                "element": f"Logger[{i}]/Plot[{j}]",
+                "kind": "logger",
+                "title": plot.get("title"),
+                "plots": [{"element": f"Logger[{i}]/Plot[{j}]", "title": plot.get("title"), "values": values}],
+            })
+    return gnuplotters + logger_plots
+
+
+def attribute(entry: Dict[str, Any], sources: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Best guess at the element that produced a signature, with how it was found."""
+    if not sources:
+        return None
+    candidates = sources
+    if entry["prompt"] == "multiplot":
+        candidates = [s for s in sources if s["kind"] == "gnuplotter"] or sources
+
+    tokens = []
+    if entry["token"]:
+        tokens.append(entry["token"].lower())
+    if entry["command"]:
+        tokens += [(a or b).lower() for a, b in _QUOTED_RE.findall(entry["command"]) if (a or b)]
+    for token in tokens:
+        hits = [p for s in candidates for p in s["plots"] if token in p["values"]]
+        if len(hits) == 1:
+            return {"element": hits[0]["element"], "title": hits[0]["title"], "matched_by": f"'{token}'"}
+
+    if entry["prompt"] == "multiplot" and len(candidates) == 1:
+        return {"element": candidates[0]["element"], "title": candidates[0].get("title"), "matched_by": "only Gnuplotter"}
+
+    for name in entry["files"]:
+        match = _LOG_NUMBER_RE.search(name)
+        if match and 1 <= int(match.group(1)) <= len(sources):
+            source = sources[int(match.group(1)) - 1]
+            return {"element": source["element"], "title": source.get("title"), "matched_by": "log number"}
+    return None
+
+
+# -----------------------
+# Digest
+# -----------------------
+def digest_gnuplot_logs(run_path: Path, log_paths: Optional[List[Path]] = None) -> Dict[str, Any]:
+    """
+    Counted, attributed signatures of every gnuplot_error_*.log in the run
+    folder, most frequent first (at most MAX_SIGNATURES).
+    """
+    run_path = Path(run_path)
+    if log_paths is None:
+        log_paths = sorted(run_path.glob(GNUPLOT_LOG_GLOB))
+    counts: Dict[Tuple, Dict[str, Any]] = {}
+    total_bytes = 0
+    messages = 0
+    for path in log_paths:
+        try:
+            total_bytes += path.stat().st_size
+            messages += parse_gnuplot_log(path, counts)
+        except OSError:
+            continue
+
+    sources = plotting_elements(run_path / "model.xml") if counts else []
+    ranked = sorted(counts.values(), key=lambda e: (-e["count"], e["level"], e["message"]))
+    signatures = []
+    for entry in ranked[:MAX_SIGNATURES]:
+        source = attribute(entry, sources)
+        signatures.append({
+            "level": entry["level"],
+            "message": entry["message"],
+            "example": entry["example"],
+            "command": entry["command"],
+            "token": entry["token"],
+            "count": entry["count"],
+            "files": entry["files"],
+            "source": source,
+        })
+
+    return {
+        "log_files": len(log_paths),
+        "log_bytes": total_bytes,
+        "messages": messages,
+        "errors": sum(e["count"] for e in counts.values() if e["level"] == "error"),
+        "warnings": sum(e["count"] for e in counts.values() if e["level"] == "warning"),
+        "distinct_signatures": len(counts),
+        "signatures": signatures,
+    }
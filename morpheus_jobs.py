@@ -0,0 +1,1045 @@
+"""
+Background job manager for Morpheus simulations.
+
+Morpheus runs as an asyncio subprocess on a dedicated event-loop thread, so
+MCP tools can submit, poll, cancel and wait for simulations without pinning
+the server while a model runs.
+"""
+import os
+import re
+import enum
+import math
+import time
+import uuid
+import codecs
+import sys
+import signal
+import shutil
+import asyncio
+import subprocess
+import threading
+import collections
+import concurrent.futures
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable, Deque, Tuple
+
+from morpheus_numerics import NUMERIC_BLOWUP_ORDERS, NumericsMonitor
+
+DEFAULT_TIMEOUT_SECONDS = 600  # 10 min hard cap, same as the old blocking runner
+MAX_FINISHED_JOBS = 200        # finished jobs kept in memory for get_job_status
+DEFAULT_PREVIEW_CHARS = 20000  # size of the in-memory stdout/stderr tail per job
+READ_CHUNK_BYTES = 64 * 1024
+PIPE_DRAIN_SECONDS = 5         # grace period for output still buffered after exit
+PROGRESS_POLL_SECONDS = 1.0    # how often a running job's stdout.log is tailed
+RATE_WINDOW_SAMPLES = 64       # recent (wall, sim) samples used for rate and ETA
+
+# ru_maxrss is reported in bytes on macOS and in KiB on Linux
+RUSAGE_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+# Cores given to a job that does not ask for a specific thread count
+DEFAULT_THREADS_PER_JOB = 4
+
+# Watchdog defaults (a value of None or 0 disables that policy)
+WATCHDOG_STALL_SECONDS = 120             # no new Time: line for this long
+WATCHDOG_MAX_STDERR_ERROR_LINES = 50     # error-looking lines on stderr
+WATCHDOG_MAX_OUTPUT_BYTES = 2 * 1024**3  # total size of the run folder
+WATCHDOG_DEADLINE_SLACK = 1.25           # kill if ETA exceeds time left by this factor
+WATCHDOG_MIN_RUNTIME_SECONDS = 30        # never judge the ETA before this
+OUTPUT_SIZE_POLL_SECONDS = 5.0
+NUMERICS_POLL_SECONDS = 5.0
+TERMINATE_GRACE_SECONDS = 3.0
+
+STDERR_ERROR_RE = re.compile(r"\berror\b|\bfatal\b|exception", re.IGNORECASE)
+
+# "Time: 150", "Time: 0.00 atu", "Time: 1.5e+03"
+TIME_LINE_RE = re.compile(
+    r"^\s*Time:\s*<?\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)"
+)
+
+
+class JobState(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    FINISHED = "finished"
+    TIMED_OUT = "timed_out"
+    CANCELLED = "cancelled"
+    WATCHDOG_KILLED = "watchdog_killed"
+    LAUNCH_ERROR = "launch_error"
+
+
+class TailBuffer:
+    """
+    Ring buffer keeping only the last `max_chars` characters written to it,
+    so previews of arbitrarily long Morpheus output use bounded memory.
+    """
+
+    def __init__(self, max_chars: int = DEFAULT_PREVIEW_CHARS):
+        self.max_chars = max_chars
+        self.total_chars = 0
+        self._parts: collections.deque = collections.deque()
+        self._size = 0
+
+    def write(self, text: str) -> None:
+        if not text:
+            return
+        self.total_chars += len(text)
+        if len(text) >= self.max_chars:
+            self._parts.clear()
+            self._parts.append(text[-self.max_chars:])
+            self._size = self.max_chars
+            return
+        self._parts.append(text)
+        self._size += len(text)
+        while self._size > self.max_chars:
+            head = self._parts[0]
+            overflow = self._size - self.max_chars
+            if len(head) <= overflow:
+                self._parts.popleft()
+                self._size -= len(head)
+            else:
+                self._parts[0] = head[overflow:]
+                self._size -= overflow
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_chars > self._size
+
+    def text(self) -> str:
+        return "".join(self._parts)
+
+
+class LogTail:
+    """Reads the complete lines appended to a file since the previous call."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offset = 0
+        self._partial = b""
+
+    def read_lines(self) -> List[str]:
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return []
+        if not data:
+            return []
+        self.offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        return [raw.decode("utf-8", errors="ignore") for raw in lines]
+
+
+class ProgressTracker:
+    """
+    Incrementally tails a Morpheus stdout.log for "model is up" and "Time:"
+    lines and turns them into percent complete, sim-time rate and ETA.
+    Each tail() reads only the bytes appended since the previous call.
+    """
+
+    def __init__(self, stdout_path: Path, stop_time: Optional[float] = None, start_time: float = 0.0):
+        self.stdout_path = stdout_path
+        self.stop_time = stop_time
+        self.start_time = start_time or 0.0
+
+        self._tail = LogTail(stdout_path)
+        self.model_up_at: Optional[float] = None
+        self.time_lines = 0
+        self.first_sim_time: Optional[float] = None
+        self.first_time_line_at: Optional[float] = None
+        self.sim_time: Optional[float] = None
+        self.last_time_line_at: Optional[float] = None
+        self.samples: collections.deque = collections.deque(maxlen=RATE_WINDOW_SAMPLES)
+        self._lock = threading.Lock()
+
+    def tail(self, now: Optional[float] = None) -> int:
+        """Parse newly appended complete lines. Returns the number of new Time: lines."""
+        now = time.time() if now is None else now
+        with self._lock:
+            new_times = 0
+            for line in self._tail.read_lines():
+                if self.model_up_at is None and "model is up" in line.lower():
+                    self.model_up_at = now
+                    continue
+                match = TIME_LINE_RE.match(line)
+                if not match:
+                    continue
+                try:
+                    value = float(match.group(1))
+                except ValueError:
+                    continue
+                if self.first_sim_time is None:
+                    self.first_sim_time = value
+                    self.first_time_line_at = now
+                self.sim_time = value
+                self.time_lines += 1
+                new_times += 1
+
+            if new_times:
+                self.last_time_line_at = now
+                self.samples.append((now, self.sim_time))
+            return new_times
+
+    def rate(self) -> Optional[float]:
+        """Simulated time per wall-clock second over the recent sample window."""
+        if len(self.samples) < 2:
+            return None
+        (w0, s0), (w1, s1) = self.samples[0], self.samples[-1]
+        if w1 <= w0:
+            return None
+        return (s1 - s0) / (w1 - w0)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        with self._lock:
+            percent = None
+            remaining = None
+            if self.stop_time is not None and self.sim_time is not None:
+                span = self.stop_time - self.start_time
+                done = self.sim_time - self.start_time
+                if span > 0:
+                    percent = round(max(0.0, min(100.0, 100.0 * done / span)), 2)
+                remaining = max(0.0, self.stop_time - self.sim_time)
+
+            rate = self.rate()
+            eta = None
+            if rate and rate > 0 and remaining is not None:
+                eta = round(remaining / rate, 1)
+
+            return {
+                "stop_time": self.stop_time,
+                "start_time": self.start_time,
+                "sim_time": self.sim_time,
+                "percent_complete": percent,
+                "time_lines": self.time_lines,
+                "model_up": self.model_up_at is not None,
+                "sim_time_per_wall_second": round(rate, 6) if rate is not None else None,
+                "eta_seconds": eta,
+                "seconds_since_last_time_line": (
+                    round(now - self.last_time_line_at, 1)
+                    if self.last_time_line_at is not None else None
+                ),
+            }
+
+
+class WatchdogPolicy:
+    """
+    Early-termination rules checked while Morpheus runs. Any rule set to
+    None/0 is disabled. Overrides come from a plain dict (MCP tool input).
+    """
+
+    FIELDS = (
+        "stall_seconds",
+        "max_stderr_error_lines",
+        "max_output_bytes",
+        "deadline_slack",
+        "min_runtime_seconds",
+        "numeric_blowup_orders",
+    )
+    # Counts; the other fields are seconds or factors
+    INT_FIELDS = ("max_stderr_error_lines", "max_output_bytes")
+
+    def __init__(
+        self,
+        stall_seconds: Optional[float] = WATCHDOG_STALL_SECONDS,
+        max_stderr_error_lines: Optional[int] = WATCHDOG_MAX_STDERR_ERROR_LINES,
+        max_output_bytes: Optional[int] = WATCHDOG_MAX_OUTPUT_BYTES,
+        deadline_slack: Optional[float] = WATCHDOG_DEADLINE_SLACK,
+        min_runtime_seconds: float = WATCHDOG_MIN_RUNTIME_SECONDS,
+        numeric_blowup_orders: Optional[float] = NUMERIC_BLOWUP_ORDERS,
+    ):
+        self.stall_seconds = stall_seconds
+        self.max_stderr_error_lines = max_stderr_error_lines
+        self.max_output_bytes = max_output_bytes
+        self.deadline_slack = deadline_slack
+        self.min_runtime_seconds = min_runtime_seconds or 0
+        # NaN/Inf or growth by this many orders of magnitude in logger CSVs / field snapshots
+        self.numeric_blowup_orders = numeric_blowup_orders
+
+    @classmethod
+    def from_dict(cls, overrides: Optional[Dict[str, Any]]) -> "WatchdogPolicy":
+        overrides = overrides or {}
+        unknown = set(overrides) - set(cls.FIELDS) - {"enabled"}
+        if unknown:
+            raise ValueError(f"Unknown watchdog setting(s): {sorted(unknown)}. Valid: {list(cls.FIELDS)}")
+        if overrides.get("enabled") is False:
+            return cls(None, None, None, None, numeric_blowup_orders=None)
+        return cls(**{k: cls._check_value(k, v) for k, v in overrides.items() if k in cls.FIELDS})
+
+    @classmethod
+    def _check_value(cls, name: str, value: Any) -> Optional[float]:
+        """A setting as a non-negative finite number (int for counts), or None."""
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            raise ValueError(f"{name} must be a number or null, got {value!r}")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number or null, got {value!r}") from None
+        if not math.isfinite(number) or number < 0:
+            raise ValueError(f"{name} must be a finite number >= 0, got {value!r}")
+        return int(number) if name in cls.INT_FIELDS else number
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.FIELDS}
+
+
+def _dir_size_bytes(path: Path) -> int:
+    total = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+class MorpheusJob:
+    """
+    One Morpheus process and everything known about it.
+    `result` is filled by the manager's on_finish callback once the job ends.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        cmd: List[str],
+        cwd: Path,
+        stdout_path: Path,
+        stderr_path: Path,
+        env: Optional[Dict[str, str]] = None,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        preview_chars: int = DEFAULT_PREVIEW_CHARS,
+        stop_time: Optional[float] = None,
+        start_time: float = 0.0,
+        watchdog: Optional[WatchdogPolicy] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        threads: Optional[int] = None,
+    ):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.run_id = run_id
+        self.cmd = cmd
+        self.cwd = cwd
+        self.stdout_path = stdout_path
+        self.stderr_path = stderr_path
+        self.env = env if env is not None else os.environ.copy()
+        self.timeout = timeout
+
+        self.state = JobState.PENDING
+        self.returncode: Optional[int] = None
+        self.timed_out = False
+        self.cancel_requested = False
+        self.error: Optional[str] = None
+        # Set if the watchdog/progress monitor crashed; the run continues unwatched
+        self.monitor_error: Optional[str] = None
+        self.stdout_tail = TailBuffer(preview_chars)
+        self.stderr_tail = TailBuffer(preview_chars)
+        self.progress = ProgressTracker(stdout_path, stop_time=stop_time, start_time=start_time)
+        self.watchdog = watchdog if watchdog is not None else WatchdogPolicy()
+        self.watchdog_reason: Optional[Dict[str, Any]] = None
+        self.stderr_error_lines = 0
+        self.output_bytes = 0
+        self.numerics = NumericsMonitor(cwd, self.watchdog.numeric_blowup_orders)
+        self.numeric_hits: List[Dict[str, Any]] = []
+        # Caller-owned bookkeeping, available to the on_finish callback
+        self.meta: Dict[str, Any] = meta or {}
+        self.resources: Optional[Dict[str, Any]] = None
+        # Requested OpenMP threads; cpus are the cores the scheduler pinned the process to
+        self.threads = threads
+        self.cpus: Optional[List[int]] = None
+        self.result: Optional[Dict[str, Any]] = None
+
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self.future: Optional[concurrent.futures.Future] = None
+        self._proc: Optional[subprocess.Popen] = None
+        # Resolved by the wait4 thread with (returncode, rusage, exited_at)
+        self._exit: Optional[asyncio.Future] = None
+
+    @property
+    def stdout(self) -> str:
+        """Last `preview_chars` of stdout; the full log is in stdout_path."""
+        return self.stdout_tail.text()
+
+    @property
+    def stderr(self) -> str:
+        """Last `preview_chars` of stderr; the full log is in stderr_path."""
+        return self.stderr_tail.text()
+
+    @property
+    def done(self) -> bool:
+        # finished_at is set only after the result is attached, see JobManager._finish
+        return self.finished_at is not None
+
+    def elapsed(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return round(end - self.started_at, 3)
+
+    def queued_seconds(self) -> float:
+        end = self.started_at or self.finished_at or time.time()
+        return round(end - self.submitted_at, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "run_id": self.run_id,
+            "status": self.state.value,
+            "done": self.done,
+            "returncode": self.returncode,
+            "timed_out": self.timed_out,
+            "cancel_requested": self.cancel_requested,
+            "watchdog": self.watchdog_reason,
+            "numeric_hits": self.numeric_hits,
+            "threads": self.threads,
+            "cpus": self.cpus,
+            "error": self.error,
+            "monitor_error": self.monitor_error,
+            "stdout_chars": self.stdout_tail.total_chars,
+            "stderr_chars": self.stderr_tail.total_chars,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": self.queued_seconds(),
+            "elapsed_seconds": self.elapsed(),
+            "resources": self.resources,
+        }
+
+
+def _exit_code(status: int) -> int:
+    if hasattr(os, "waitstatus_to_exitcode"):
+        return os.waitstatus_to_exitcode(status)
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _reap(proc: subprocess.Popen, exit_future: asyncio.Future, loop: asyncio.AbstractEventLoop) -> None:
+    """
+    Thread target: block in wait4() until the process exits and hand
+    (returncode, rusage, exit time) to the job loop. rusage is None where
+    wait4 is unavailable.
+    """
+    rusage = None
+    if hasattr(os, "wait4"):
+        _, status, rusage = os.wait4(proc.pid, 0)
+        returncode = _exit_code(status)
+    else:
+        returncode = proc.wait()
+    outcome = (returncode, rusage, time.time())
+    loop.call_soon_threadsafe(
+        lambda: exit_future.done() or exit_future.set_result(outcome)
+    )
+
+
+def _files_written_since(path: Path, since: float) -> Tuple[int, int]:
+    """Count and total size of files under `path` modified at or after `since`."""
+    files = 0
+    total = 0
+    stack = [str(path)]
+    cutoff = since - 1.0  # coarse filesystem timestamps
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if st.st_mtime >= cutoff:
+                        files += 1
+                        total += st.st_size
+        except OSError:
+            continue
+    return files, total
+
+
+def _resource_summary(
+    job: "MorpheusJob",
+    rusage: Any,
+    launched_at: float,
+    exited_at: float,
+    output_files: int,
+    output_bytes: int,
+) -> Dict[str, Any]:
+    """Wall/CPU time, peak RSS, phase timings and output volume of one run."""
+    started = job.started_at or launched_at
+    wall = exited_at - started
+
+    def since_start(t: Optional[float]) -> Optional[float]:
+        return round(t - started, 3) if t is not None else None
+
+    summary: Dict[str, Any] = {
+        "wall_seconds": round(wall, 3),
+        "user_cpu_seconds": None,
+        "sys_cpu_seconds": None,
+        "cpu_seconds": None,
+        "cpu_utilization": None,
+        "peak_rss_bytes": None,
+        "threads": job.threads,
+        "phases": {
+            "launch_seconds": round(started - launched_at, 4),
+            "model_up_seconds": since_start(job.progress.model_up_at),
+            "first_time_line_seconds": since_start(job.progress.first_time_line_at),
+            "exit_seconds": round(wall, 3),
+        },
+        "output_files": output_files,
+        "output_bytes": output_bytes,
+    }
+    if rusage is not None:
+        cpu = rusage.ru_utime + rusage.ru_stime
+        summary.update({
+            "user_cpu_seconds": round(rusage.ru_utime, 3),
+            "sys_cpu_seconds": round(rusage.ru_stime, 3),
+            "cpu_seconds": round(cpu, 3),
+            # > 1.0 means more than one core was busy on average
+            "cpu_utilization": round(cpu / wall, 3) if wall > 0 else None,
+            "peak_rss_bytes": rusage.ru_maxrss * RUSAGE_MAXRSS_UNIT,
+        })
+    return summary
+
+
+# Pins the child before exec; without it the process is pinned right after Popen
+TASKSET_BIN = shutil.which("taskset")
+
+
+def _pinned_cmd(cmd: List[str], cpus: List[int]) -> List[str]:
+    """`cmd` prefixed with taskset so the process starts on its cores."""
+    if not cpus or not TASKSET_BIN:
+        return cmd
+    return [TASKSET_BIN, "-c", ",".join(map(str, cpus))] + list(cmd)
+
+
+def _pin_to_cpus(pid: int, cpus: List[int]) -> None:
+    """Pin a running process to its cores; pinning is best effort."""
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        os.sched_setaffinity(pid, set(cpus))
+    except OSError:
+        pass
+
+
+class CoreScheduler:
+    """
+    Hands out disjoint sets of CPU cores to Morpheus jobs so concurrent runs
+    do not oversubscribe the machine. Jobs that do not fit wait in a FIFO
+    queue until enough cores are released.
+
+    acquire/release/withdraw run on the JobManager loop; status() may be
+    called from any thread.
+    """
+
+    def __init__(self, cores: Optional[List[int]] = None, threads_per_job: Optional[int] = None):
+        if cores is None:
+            if hasattr(os, "sched_getaffinity"):
+                cores = sorted(os.sched_getaffinity(0))
+            else:
+                cores = list(range(os.cpu_count() or 1))
+        self.cores = list(cores)
+        self.threads_per_job = self.threads_for(threads_per_job or DEFAULT_THREADS_PER_JOB)
+        self._free = set(self.cores)
+        self._running: Dict[str, List[int]] = {}
+        self._queue: Deque[Tuple[str, int, asyncio.Future]] = collections.deque()
+        self._lock = threading.Lock()
+
+    def threads_for(self, requested: Optional[int]) -> int:
+        """Clamp a requested thread count to what this machine can give one job."""
+        if not requested:
+            requested = self.threads_per_job
+        return max(1, min(int(requested), len(self.cores)))
+
+    async def acquire(self, job_id: str, threads: Optional[int]) -> List[int]:
+        """Wait (FIFO) until `threads` cores are free, then reserve them for the job."""
+        n = self.threads_for(threads)
+        with self._lock:
+            if not self._queue and len(self._free) >= n:
+                return self._take_locked(job_id, n)
+            waiter = asyncio.get_running_loop().create_future()
+            self._queue.append((job_id, n, waiter))
+        return await waiter
+
+    def release(self, job_id: str) -> None:
+        with self._lock:
+            cores = self._running.pop(job_id, None)
+            if cores:
+                self._free.update(cores)
+            self._dispatch_locked()
+
+    def withdraw(self, job_id: str) -> bool:
+        """Drop a queued job (its acquire() raises CancelledError)."""
+        with self._lock:
+            for entry in self._queue:
+                if entry[0] == job_id:
+                    self._queue.remove(entry)
+                    entry[2].cancel()
+                    self._dispatch_locked()
+                    return True
+        return False
+
+    def _take_locked(self, job_id: str, n: int) -> List[int]:
+        cores = sorted(self._free)[:n]
+        self._free.difference_update(cores)
+        self._running[job_id] = cores
+        return cores
+
+    def _dispatch_locked(self) -> None:
+        # Strict FIFO: a large job at the head is not starved by smaller ones behind it
+        while self._queue and len(self._free) >= self._queue[0][1]:
+            job_id, n, waiter = self._queue.popleft()
+            if waiter.cancelled():
+                continue
+            waiter.set_result(self._take_locked(job_id, n))
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            busy = len(self.cores) - len(self._free)
+            return {
+                "total_cores": len(self.cores),
+                "busy_cores": busy,
+                "free_cores": len(self._free),
+                "utilization": round(busy / len(self.cores), 3),
+                "threads_per_job": self.threads_per_job,
+                "running": [{"job_id": j, "cpus": c} for j, c in self._running.items()],
+                "queued": [
+                    {"job_id": j, "threads": n, "position": i}
+                    for i, (j, n, _) in enumerate(self._queue)
+                ],
+            }
+
+
+class JobManager:
+    """
+    Owns the background event loop and the registry of Morpheus jobs.
+    All process handling happens on the loop thread; public methods are
+    safe to call from any thread (MCP handlers, benchmark workers).
+    With a CoreScheduler, jobs wait for free cores before they start.
+    """
+
+    def __init__(
+        self,
+        on_finish: Optional[Callable[[MorpheusJob], Dict[str, Any]]] = None,
+        scheduler: Optional[CoreScheduler] = None,
+    ):
+        self.on_finish = on_finish
+        self.scheduler = scheduler
+        self._jobs: Dict[str, MorpheusJob] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # -----------------------
+    # Loop management
+    # -----------------------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="morpheus-jobs",
+                    daemon=True,
+                )
+                thread.start()
+                self._loop = loop
+                self._thread = thread
+            return self._loop
+
+    # -----------------------
+    # Public API
+    # -----------------------
+    def submit(
+        self,
+        run_id: str,
+        cmd: List[str],
+        cwd: Path,
+        stdout_path: Path,
+        stderr_path: Path,
+        env: Optional[Dict[str, str]] = None,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        preview_chars: int = DEFAULT_PREVIEW_CHARS,
+        stop_time: Optional[float] = None,
+        start_time: float = 0.0,
+        watchdog: Optional[WatchdogPolicy] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        threads: Optional[int] = None,
+    ) -> MorpheusJob:
+        """Register a job and schedule it on the background loop. Returns immediately."""
+        job = MorpheusJob(
+            run_id=run_id,
+            cmd=cmd,
+            cwd=cwd,
+            stdout_path=stdout_path,
+            stderr_path=stderr_path,
+            env=env,
+            timeout=timeout,
+            preview_chars=preview_chars,
+            stop_time=stop_time,
+            start_time=start_time,
+            watchdog=watchdog,
+            meta=meta,
+            threads=self.scheduler.threads_for(threads) if self.scheduler else threads,
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune_locked()
+
+        loop = self._ensure_loop()
+        job.future = asyncio.run_coroutine_threadsafe(self._run(job), loop)
+        return job
+
+    def get(self, job_id: str) -> Optional[MorpheusJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[MorpheusJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def latest_for_run(self, run_id: str) -> Optional[MorpheusJob]:
+        candidates = [j for j in self.jobs() if j.run_id == run_id]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda j: j.submitted_at)
+
+    def cancel(self, job_id: str) -> Optional[MorpheusJob]:
+        """Request cancellation. A pending job never starts; a running one is killed."""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        job.cancel_requested = True
+        loop = self._ensure_loop()
+        loop.call_soon_threadsafe(self._cancel, job)
+        return job
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[MorpheusJob]:
+        """Block the calling thread until the job ends or `timeout` expires."""
+        job = self.get(job_id)
+        if job is None or job.future is None:
+            return job
+        try:
+            job.future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            pass
+        return job
+
+    async def wait_async(self, job_id: str, timeout: Optional[float] = None) -> Optional[MorpheusJob]:
+        """Await the job from another event loop (e.g. the MCP server loop)."""
+        job = self.get(job_id)
+        if job is None or job.future is None:
+            return job
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(job.future)),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    # -----------------------
+    # Internals (loop thread)
+    # -----------------------
+    def _prune_locked(self) -> None:
+        finished = [j for j in self._jobs.values() if j.done]
+        excess = len(finished) - MAX_FINISHED_JOBS
+        if excess <= 0:
+            return
+        for job in sorted(finished, key=lambda j: j.finished_at or 0)[:excess]:
+            self._jobs.pop(job.job_id, None)
+
+    def _cancel(self, job: MorpheusJob) -> None:
+        if self.scheduler is not None and self.scheduler.withdraw(job.job_id):
+            return
+        self._kill(job)
+
+    def _kill(self, job: MorpheusJob) -> None:
+        self._signal(job, getattr(signal, "SIGKILL", signal.SIGTERM))
+
+    def _signal(self, job: MorpheusJob, sig: int) -> bool:
+        # os.kill rather than Popen.send_signal: the latter polls and could
+        # reap the child before the wait4 thread collects its rusage
+        if job._proc is None or job._exit is None or job._exit.done():
+            return False
+        try:
+            os.kill(job._proc.pid, sig)
+        except ProcessLookupError:
+            return False
+        return True
+
+    async def _run(self, job: MorpheusJob) -> MorpheusJob:
+        if job.cancel_requested:
+            job.state = JobState.CANCELLED
+            return await self._finish(job)
+
+        if self.scheduler is not None:
+            try:
+                job.cpus = await self.scheduler.acquire(job.job_id, job.threads)
+            except asyncio.CancelledError:
+                job.state = JobState.CANCELLED
+                return await self._finish(job)
+            if job.cancel_requested:
+                job.state = JobState.CANCELLED
+                return await self._finish(job)
+
+        env = job.env
+        if job.threads or job.cpus:
+            env = dict(env or os.environ)
+            env["OMP_NUM_THREADS"] = str(len(job.cpus) if job.cpus else job.threads)
+
+        launched_at = time.time()
+        try:
+            # Plain Popen so the exit can be collected with wait4() (CPU time, peak RSS)
+            # No preexec_fn: this process is multithreaded, so pinning is done
+            # by taskset (exec'd in place, same pid) or right after the fork
+            proc = subprocess.Popen(
+                _pinned_cmd(job.cmd, job.cpus),
+                cwd=str(job.cwd),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=env,
+            )
+            if not TASKSET_BIN:
+                _pin_to_cpus(proc.pid, job.cpus)
+        except Exception as e:
+            job.state = JobState.LAUNCH_ERROR
+            job.error = str(e)
+            job.stderr_tail.write(str(e))
+            job.stderr_path.write_text(str(e), encoding="utf-8", errors="ignore")
+            return await self._finish(job)
+
+        loop = asyncio.get_running_loop()
+        job._proc = proc
+        job._exit = loop.create_future()
+        threading.Thread(
+            target=_reap,
+            args=(proc, job._exit, loop),
+            name=f"morpheus-wait-{job.job_id}",
+            daemon=True,
+        ).start()
+        job.started_at = time.time()
+        job.state = JobState.RUNNING
+
+        # Output goes to disk as it arrives; only a bounded tail stays in memory
+        stdout_transport, stdout_reader = await self._reader(proc.stdout)
+        stderr_transport, stderr_reader = await self._reader(proc.stderr)
+        pumps = asyncio.gather(
+            self._pump(stdout_reader, job.stdout_path, job.stdout_tail, job.progress),
+            self._pump(stderr_reader, job.stderr_path, job.stderr_tail),
+        )
+        monitor = asyncio.ensure_future(self._monitor(job))
+        if not await self._wait_exit(job, job.timeout):
+            job.timed_out = True
+            self._kill(job)
+            await self._wait_exit(job, None)
+        try:
+            # Children (e.g. gnuplot) may inherit the pipes and keep them open
+            await asyncio.wait_for(pumps, timeout=PIPE_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        stdout_transport.close()
+        stderr_transport.close()
+        monitor.cancel()
+        job.progress.tail()
+
+        job.returncode, rusage, exited_at = job._exit.result()
+        proc.returncode = job.returncode
+        output_files, output_bytes = await loop.run_in_executor(
+            None, _files_written_since, job.cwd, launched_at
+        )
+        job.resources = _resource_summary(
+            job, rusage, launched_at, exited_at, output_files, output_bytes
+        )
+
+        if job.cancel_requested:
+            job.state = JobState.CANCELLED
+        elif job.watchdog_reason is not None:
+            job.state = JobState.WATCHDOG_KILLED
+        elif job.timed_out:
+            job.state = JobState.TIMED_OUT
+        else:
+            job.state = JobState.FINISHED
+        return await self._finish(job)
+
+    async def _reader(self, pipe) -> Tuple[asyncio.BaseTransport, asyncio.StreamReader]:
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=READ_CHUNK_BYTES)
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), pipe
+        )
+        return transport, reader
+
+    async def _monitor(self, job: MorpheusJob) -> None:
+        """
+        Periodically tail stdout.log/stderr.log while the process runs and
+        stop it early when a watchdog rule fires. A crash is recorded in
+        job.monitor_error and logged to stderr instead of vanishing with the
+        task.
+        """
+        try:
+            await self._watch(job)
+        except Exception as e:
+            job.monitor_error = f"{type(e).__name__}: {e}"
+            print(f"Watchdog monitor for job {job.job_id} failed: {job.monitor_error}", file=sys.stderr)
+
+    async def _watch(self, job: MorpheusJob) -> None:
+        stderr_tail = LogTail(job.stderr_path)
+        last_size_check = 0.0
+        last_numerics_check = 0.0
+        while True:
+            await asyncio.sleep(PROGRESS_POLL_SECONDS)
+            now = time.time()
+            job.progress.tail(now)
+            job.stderr_error_lines += sum(
+                1 for line in stderr_tail.read_lines() if STDERR_ERROR_RE.search(line)
+            )
+            if job.watchdog.max_output_bytes and now - last_size_check >= OUTPUT_SIZE_POLL_SECONDS:
+                last_size_check = now
+                job.output_bytes = await asyncio.get_running_loop().run_in_executor(
+                    None, _dir_size_bytes, job.cwd
+                )
+            if job.watchdog.numeric_blowup_orders and now - last_numerics_check >= NUMERICS_POLL_SECONDS:
+                last_numerics_check = now
+                job.numeric_hits = await asyncio.get_running_loop().run_in_executor(
+                    None, job.numerics.update, job.started_at
+                )
+
+            reason = self._watchdog_check(job, now)
+            if reason is not None:
+                reason["elapsed_seconds"] = job.elapsed()
+                reason["sim_time"] = job.progress.sim_time
+                job.watchdog_reason = reason
+                await self._terminate(job)
+                return
+
+    def _watchdog_check(self, job: MorpheusJob, now: float) -> Optional[Dict[str, Any]]:
+        policy = job.watchdog
+        progress = job.progress
+
+        if policy.stall_seconds:
+            last_sign_of_life = progress.last_time_line_at or progress.model_up_at or job.started_at
+            silent_for = now - last_sign_of_life
+            if silent_for > policy.stall_seconds:
+                return {
+                    "reason": "stall",
+                    "detail": f"No new Time: line for {silent_for:.0f}s (limit {policy.stall_seconds}s)",
+                }
+
+        if policy.max_stderr_error_lines and job.stderr_error_lines > policy.max_stderr_error_lines:
+            return {
+                "reason": "stderr_errors",
+                "detail": (
+                    f"{job.stderr_error_lines} error lines on stderr "
+                    f"(limit {policy.max_stderr_error_lines})"
+                ),
+            }
+
+        if policy.max_output_bytes and job.output_bytes > policy.max_output_bytes:
+            return {
+                "reason": "output_size",
+                "detail": f"Run folder grew to {job.output_bytes} bytes (limit {policy.max_output_bytes})",
+            }
+
+        if policy.numeric_blowup_orders and job.numeric_hits:
+            hit = job.numeric_hits[0]
+            return {
+                "reason": "numeric",
+                "detail": (
+                    f"{hit['kind']} in {hit['file']} ({hit['column']}) "
+                    f"from sim time {hit['first_time']}"
+                ),
+            }
+
+        if policy.deadline_slack and job.timeout and now - job.started_at >= policy.min_runtime_seconds:
+            eta = progress.snapshot(now).get("eta_seconds")
+            time_left = job.started_at + job.timeout - now
+            if eta is not None and time_left > 0 and eta > time_left * policy.deadline_slack:
+                return {
+                    "reason": "deadline",
+                    "detail": (
+                        f"Predicted to need {eta:.0f}s more but only {time_left:.0f}s remain "
+                        f"before the {job.timeout}s timeout"
+                    ),
+                }
+        return None
+
+    async def _terminate(self, job: MorpheusJob) -> None:
+        """SIGTERM first so Morpheus can flush its outputs, SIGKILL after a grace period."""
+        if not self._signal(job, signal.SIGTERM):
+            return
+        if not await self._wait_exit(job, TERMINATE_GRACE_SECONDS):
+            self._kill(job)
+
+    async def _wait_exit(self, job: MorpheusJob, timeout: Optional[float]) -> bool:
+        """
+        Wait for the process itself to exit (reaped by the wait4 thread).
+        Unlike waiting on the pipes, this is not delayed by children that
+        inherited them. Returns False on timeout.
+        """
+        try:
+            await asyncio.wait_for(asyncio.shield(job._exit), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _pump(
+        self,
+        stream: asyncio.StreamReader,
+        path: Path,
+        tail: TailBuffer,
+        progress: Optional[ProgressTracker] = None,
+    ) -> None:
+        """
+        Copy a process pipe to `path` chunk by chunk, feeding the tail buffer.
+        Until the first Time: line, `progress` is tailed on every chunk so the
+        startup phase timings are precise rather than poll-interval coarse.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with open(path, "w", encoding="utf-8", errors="ignore") as f:
+            while True:
+                chunk = await stream.read(READ_CHUNK_BYTES)
+                text = decoder.decode(chunk, final=not chunk)
+                if text:
+                    f.write(text)
+                    f.flush()
+                    tail.write(text)
+                    if progress is not None and progress.first_time_line_at is None:
+                        progress.tail()
+                if not chunk:
+                    break
+
+    async def _finish(self, job: MorpheusJob) -> MorpheusJob:
+        job._proc = None
+        job._exit = None
+        if self.scheduler is not None:
+            # Free the cores before on_finish so queued jobs start right away
+            self.scheduler.release(job.job_id)
+        if job.started_at is None:
+            job.started_at = time.time()
+        if self.on_finish is not None:
+            # In an executor: the callback lists, copies and evaluates run
+            # folders, and must not stall the pipe pumps of the other jobs
+            try:
+                job.result = await asyncio.get_running_loop().run_in_executor(None, self.on_finish, job)
+            except Exception as e:
+                job.error = job.error or f"on_finish failed: {e}"
+        job.finished_at = time.time()
+        return job
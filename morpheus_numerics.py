@@ -0,0 +1,400 @@
+"""
+NaN / Inf / blow-up scan of Morpheus outputs.
+
+A model that runs to StopTime can still produce garbage. Two kinds of output
+are checked:
+
+  - Logger CSVs (every *.csv with a "time" column), read in blocks and
+    scanned with NumPy. Per column the scan records the first sim time with a
+    NaN, with an Inf, and with a blow-up: |value| more than
+    10**NUMERIC_BLOWUP_ORDERS times the column's largest |value| at the first
+    logged time point (baselines below BLOWUP_FLOOR count as BLOWUP_FLOOR).
+  - Field snapshots (*.xml.gz written by Morpheus during the run). Each
+    <Field> holds base64 doubles; its NaN/Inf cells are counted and its max
+    |value| is compared against the earliest snapshot the same way.
+
+CsvScan reads only the bytes appended since its previous update, so the same
+code scans a finished run once and follows a running one for the watchdog
+(NumericsMonitor).
+"""
+
+import base64
+import gzip
+import math
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from logger_analytics import CHUNK_BYTES, TIME_COLUMN, LoggerError, parse_rows, read_header
+
+
+NUMERIC_BLOWUP_ORDERS = 6.0
+BLOWUP_FLOOR = 1.0
+SNAPSHOT_SUFFIX = ".xml.gz"
+MAX_REPORTED_HITS = 100
+
+_START_TIME_RE = re.compile(rb'<StartTime[^>]*\bvalue="([^"]+)"')
+_FIELD_RE = re.compile(rb'<Field\b[^>]*?\ssymbol="([^"]+)"')
+_DATA_RE = re.compile(rb"<Data\b([^>]*)>")
+
+
+def _number(x: float) -> Optional[float]:
+    return float(f"{x:.6g}") if math.isfinite(x) else None
+
+
+def _limit(baseline: np.ndarray, orders: float) -> np.ndarray:
+    return np.maximum(baseline, BLOWUP_FLOOR) * 10.0 ** orders
+
+
+# -----------------------
+# Logger CSVs
+# -----------------------
+class CsvScan:
+    """Incremental NaN/Inf/blow-up scan of one logger CSV."""
+
+    def __init__(self, path: Path, orders: Optional[float] = NUMERIC_BLOWUP_ORDERS):
+        self.path = Path(path)
+        self.orders = orders
+        self.offset = 0
+        self.rows = 0
+        self.columns: Optional[List[str]] = None
+        self._delimiter = ","
+        self._usecols: List[int] = []
+        self._partial = b""
+        self._t0: Optional[float] = None
+
+    def _start(self, columns: List[str]) -> None:
+        n = len(columns)
+        self.columns = columns
+        self.baseline = np.zeros(n)
+        self.max_abs = np.zeros(n)
+        self.nan_count = np.zeros(n, dtype=np.int64)
+        self.inf_count = np.zeros(n, dtype=np.int64)
+        self.first_nan = np.full(n, np.nan)
+        self.first_inf = np.full(n, np.nan)
+        self.first_blowup = np.full(n, np.nan)
+        self.blowup_value = np.full(n, np.nan)
+
+    def _read_header(self, f) -> bool:
+        line = f.readline()
+        if not line.endswith(b"\n"):
+            return False  # header not completely written yet
+        delimiter, names, indices = read_header(self.path)
+        if TIME_COLUMN not in names:
+            raise LoggerError(f"{self.path.name} has no '{TIME_COLUMN}' column")
+        columns = [n for n in names if n != TIME_COLUMN]
+        self._delimiter = delimiter
+        self._usecols = [indices[names.index(TIME_COLUMN)]] + [indices[names.index(c)] for c in columns]
+        self.offset = len(line)
+        self._start(columns)
+        return True
+
+    def update(self, chunk_bytes: int = CHUNK_BYTES, final: bool = False) -> None:
+        """
+        Scan the complete rows appended since the last call. With `final`
+        a last row without a trailing newline is scanned too.
+        """
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < self.offset:
+                # Rewritten from scratch (e.g. a rerun in the same folder)
+                self.__init__(self.path, self.orders)
+            if self.columns is None and not self._read_header(f):
+                return
+            f.seek(self.offset)
+            while True:
+                data = f.read(chunk_bytes)
+                if not data:
+                    break
+                self.offset += len(data)
+                data = self._partial + data
+                cut = data.rfind(b"\n") + 1
+                self._partial = data[cut:]
+                if cut:
+                    self._feed(data[:cut])
+        if final and self._partial.strip():
+            self._feed(self._partial)
+            self._partial = b""
+
+    def _feed(self, raw: bytes) -> None:
+        arr = parse_rows(raw.decode("utf-8", errors="ignore"), self._delimiter, self._usecols)
+        arr = arr[~np.isnan(arr[:, 0])]
+        if arr.shape[0] == 0:
+            return
+        t, values = arr[:, 0], arr[:, 1:]
+        self.rows += arr.shape[0]
+        if self._t0 is None:
+            self._t0 = t[0]
+
+        finite = np.isfinite(values)
+        magnitude = np.where(finite, np.abs(values), 0.0)
+        # Rows of the first time point come first, so the baseline is final
+        # before any later row is compared against it
+        first = t == self._t0
+        if first.any():
+            self.baseline = np.maximum(self.baseline, magnitude[first].max(axis=0))
+        self.max_abs = np.maximum(self.max_abs, magnitude.max(axis=0))
+
+        nan = np.isnan(values)
+        inf = np.isinf(values)
+        self.nan_count += nan.sum(axis=0)
+        self.inf_count += inf.sum(axis=0)
+        self._first_time(self.first_nan, nan, t)
+        self._first_time(self.first_inf, inf, t)
+        if self.orders:
+            blown = (magnitude > _limit(self.baseline, self.orders)) & ~first[:, None]
+            new = self._first_time(self.first_blowup, blown, t)
+            if new.any():
+                rows = blown.argmax(axis=0)
+                self.blowup_value[new] = values[rows[new], np.flatnonzero(new)]
+
+    @staticmethod
+    def _first_time(store: np.ndarray, mask: np.ndarray, t: np.ndarray) -> np.ndarray:
+        new = mask.any(axis=0) & np.isnan(store)
+        if new.any():
+            store[new] = t[mask.argmax(axis=0)[new]]
+        return new
+
+    def hits(self) -> List[Dict[str, Any]]:
+        if self.columns is None:
+            return []
+        hits = []
+        for c, column in enumerate(self.columns):
+            base = {"source": "logger", "file": self.path.name, "column": column}
+            if self.nan_count[c]:
+                hits.append({**base, "kind": "nan", "first_time": float(self.first_nan[c]), "cells": int(self.nan_count[c])})
+            if self.inf_count[c]:
+                hits.append({**base, "kind": "inf", "first_time": float(self.first_inf[c]), "cells": int(self.inf_count[c])})
+            if not np.isnan(self.first_blowup[c]):
+                hits.append({
+                    **base,
+                    "kind": "blowup",
+                    "first_time": float(self.first_blowup[c]),
+                    "value": _number(float(self.blowup_value[c])),
+                    "baseline": _number(float(self.baseline[c])),
+                    "max_abs": _number(float(self.max_abs[c])),
+                })
+        return hits
+
+
+# -----------------------
+# Field snapshots
+# -----------------------
+def snapshot_time(path: Path) -> Optional[float]:
+    """Sim time of a snapshot: its <StartTime>, which Morpheus sets to the time it was taken."""
+    with gzip.open(path, "rb") as f:
+        head = f.read(4096)
+    match = _START_TIME_RE.search(head)
+    try:
+        return float(match.group(1)) if match else None
+    except ValueError:
+        return None
+
+
+def _field_stats(values: np.ndarray) -> Dict[str, Any]:
+    finite = np.isfinite(values)
+    return {
+        "cells": int(values.size),
+        "nan": int(np.isnan(values).sum()),
+        "inf": int(np.isinf(values).sum()),
+        "max_abs": float(np.abs(values[finite]).max()) if finite.any() else 0.0,
+    }
+
+
+def iter_snapshot_fields(path: Path) -> Iterator[Tuple[str, np.ndarray]]:
+    """
+    (symbol, values) for every <Field> with <Data> in the snapshot. Read line
+    by line rather than parsed as XML: snapshots can hold attributes Morpheus
+    wrote twice, and only one field's data is in memory at a time.
+    """
+    symbol = None
+    data_tag = None
+    parts: List[bytes] = []
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            if data_tag is None:
+                field = _FIELD_RE.search(line)
+                if field:
+                    symbol = field.group(1).decode("utf-8", errors="ignore")
+                data = _DATA_RE.search(line)
+                if data is None or symbol is None:
+                    continue
+                data_tag = data.group(1)
+                line = line[data.end():]
+            end = line.find(b"</Data>")
+            parts.append(line if end < 0 else line[:end])
+            if end < 0:
+                continue
+
+            raw = b"".join(parts)
+            if b'encoding="base64"' in data_tag or b"encoding" not in data_tag:
+                dtype = "<f4" if b'word-size="4"' in data_tag else "<f8"
+                values = np.frombuffer(base64.b64decode(b"".join(raw.split())), dtype=dtype)
+            else:
+                values = np.array(raw.split(), dtype=np.float64)
+            yield symbol, values
+            symbol, data_tag, parts = None, None, []
+
+
+def scan_snapshot(path: Path) -> Dict[str, Dict[str, Any]]:
+    """symbol -> {cells, nan, inf, max_abs} for every <Field> with <Data> in the snapshot."""
+    return {symbol: _field_stats(values) for symbol, values in iter_snapshot_fields(path)}
+
+
+class SnapshotScan:
+    """NaN/Inf/blow-up over the field snapshots of a run, in sim-time order."""
+
+    def __init__(self, orders: Optional[float] = NUMERIC_BLOWUP_ORDERS):
+        self.orders = orders
+        self.snapshots: Dict[str, Tuple[Optional[float], Dict[str, Dict[str, Any]]]] = {}
+
+    def add(self, path: Path) -> None:
+        self.snapshots[Path(path).name] = (snapshot_time(path), scan_snapshot(path))
+
+    def hits(self) -> List[Dict[str, Any]]:
+        ordered = sorted(self.snapshots.items(), key=lambda kv: (kv[1][0] is None, kv[1][0] or 0.0, kv[0]))
+        baseline: Dict[str, float] = {}
+        found: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for name, (time, fields) in ordered:
+            for symbol, stats in fields.items():
+                base = {"source": "field", "file": name, "column": symbol, "first_time": time}
+                for kind in ("nan", "inf"):
+                    if stats[kind] and (symbol, kind) not in found:
+                        found[(symbol, kind)] = {**base, "kind": kind, "cells": stats[kind]}
+                if symbol not in baseline:
+                    baseline[symbol] = stats["max_abs"]
+                elif (
+                    self.orders
+                    and (symbol, "blowup") not in found
+                    and stats["max_abs"] > _limit(np.array(baseline[symbol]), self.orders)
+                ):
+                    found[(symbol, "blowup")] = {
+                        **base,
+                        "kind": "blowup",
+                        "value": _number(stats["max_abs"]),
+                        "baseline": _number(baseline[symbol]),
+                    }
+        return list(found.values())
+
+
+# -----------------------
+# Whole run
+# -----------------------
+def _summary(hits: List[Dict[str, Any]], scanned: Dict[str, Any]) -> Dict[str, Any]:
+    hits = sorted(hits, key=lambda h: (h["first_time"] is None, h["first_time"] or 0.0, h["file"], h["column"]))
+    return {
+        "clean": not hits,
+        "hit_count": len(hits),
+        "first_hit": hits[0] if hits else None,
+        "hits": hits[:MAX_REPORTED_HITS],
+        **scanned,
+    }
+
+
+def scan_run_numerics(
+    run_path: Path,
+    csv_paths: Optional[List[Path]] = None,
+    snapshot_paths: Optional[List[Path]] = None,
+    orders: Optional[float] = NUMERIC_BLOWUP_ORDERS,
+    chunk_bytes: int = CHUNK_BYTES,
+) -> Dict[str, Any]:
+    """
+    Scan a finished run (default: every *.csv and *.xml.gz at its top level).
+    CSVs without a "time" column and unreadable snapshots are listed in "skipped".
+    """
+    run_path = Path(run_path)
+    if csv_paths is None:
+        csv_paths = sorted(run_path.glob("*.csv"))
+    if snapshot_paths is None:
+        snapshot_paths = sorted(run_path.glob("*" + SNAPSHOT_SUFFIX))
+
+    hits: List[Dict[str, Any]] = []
+    skipped: Dict[str, str] = {}
+    columns = 0
+    for path in csv_paths:
+        scan = CsvScan(path, orders)
+        try:
+            scan.update(chunk_bytes, final=True)
+        except (LoggerError, OSError) as e:
+            skipped[Path(path).name] = str(e)
+            continue
+        columns += len(scan.columns or [])
+        hits += scan.hits()
+
+    snapshots = SnapshotScan(orders)
+    for path in snapshot_paths:
+        try:
+            snapshots.add(path)
+        except (OSError, EOFError, ValueError) as e:
+            skipped[Path(path).name] = str(e)
+    hits += snapshots.hits()
+
+    return _summary(hits, {
+        "csv_files": len(csv_paths) - sum(1 for p in csv_paths if Path(p).name in skipped),
+        "columns": columns,
+        "snapshots": len(snapshots.snapshots),
+        "skipped": skipped,
+    })
+
+
+class NumericsMonitor:
+    """
+    Follows the CSVs and snapshots of a running job. Each update() scans only
+    rows appended since the previous call and snapshots not seen before.
+    """
+
+    def __init__(self, run_path: Path, orders: Optional[float] = NUMERIC_BLOWUP_ORDERS):
+        self.run_path = Path(run_path)
+        self.orders = orders
+        self._csv: Dict[str, CsvScan] = {}
+        self._snapshots = SnapshotScan(orders)
+        self._not_loggers: set = set()
+        self._unreadable: Dict[str, Tuple[int, int]] = {}
+
+    def update(self, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Scan what was written since the last call; returns all hits so far.
+        Files last modified before `since` (left over from an earlier run in
+        the same folder) are ignored.
+        """
+        try:
+            names = sorted(os.listdir(self.run_path))
+        except OSError:
+            return self.hits()
+        for name in names:
+            path = self.run_path / name
+            if since is not None and name not in self._csv:
+                try:
+                    if path.stat().st_mtime < since:
+                        continue
+                except OSError:
+                    continue
+            if name.endswith(".csv") and name not in self._not_loggers:
+                scan = self._csv.setdefault(name, CsvScan(path, self.orders))
+                try:
+                    scan.update()
+                except LoggerError:
+                    self._not_loggers.add(name)
+                    del self._csv[name]
+                except OSError:
+                    continue
+            elif name.endswith(SNAPSHOT_SUFFIX) and name not in self._snapshots.snapshots:
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                # A snapshot still being written fails to parse; retry once it changes
+                sig = (st.st_size, st.st_mtime_ns)
+                if self._unreadable.get(name) == sig:
+                    continue
+                try:
+                    self._snapshots.add(path)
+                except (OSError, EOFError, ValueError):
+                    self._unreadable[name] = sig
+        return self.hits()
+
+    def hits(self) -> List[Dict[str, Any]]:
+        hits = [h for scan in self._csv.values() for h in scan.hits()] + self._snapshots.hits()
+        return _summary(hits, {})["hits"]
@@ -0,0 +1,678 @@
+"""
+Post-hoc plot rendering: take <Gnuplotter> and Logger <Plots> off the
+simulation loop and draw the equivalent PNGs from the run's data afterwards.
+
+In-loop, Morpheus stops at every plot time-step to hand the frame to gnuplot.
+plan_plot_mode rewrites a copy of model.xml for one of PLOT_MODES:
+
+  - "inline": unchanged
+  - "thin": every plot time-step is multiplied by PLOT_THIN_FACTOR
+  - "posthoc": plots that can be redrawn from data are removed, the rest are
+    thinned. Redrawable are
+      * Logger plots, from that Logger's CSV (which is still written)
+      * Gnuplotter <Field> layers on 1D/2D lattices, from the field snapshots
+        (<Time><SaveInterval> is set to the plot's time-step, coarsened to a
+        multiple of it so that at most MAX_POSTHOC_FRAMES snapshots are written)
+      * Gnuplotter <Cells> layers, from a Logger recording cell.center.x,
+        cell.center.y and the plotted value (drawn as dots at cell centres)
+    Overlays (CellArrows, CellLabels, ...) are not redrawn.
+
+The removed plots are recorded in posthoc_plots.json. render_posthoc_plots
+draws them with Pillow on a process pool once the run is over, as
+posthoc_<plot>_NNNNN.png in the run folder.
+"""
+
+import json
+import math
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from logger_analytics import TIME_COLUMN, LoggerError, iter_arrays, read_header
+from morpheus_numerics import SNAPSHOT_SUFFIX, iter_snapshot_fields, snapshot_time
+
+try:
+    from PIL import Image, ImageColor, ImageDraw, ImageFont
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+
+PLOT_MODES = ("inline", "thin", "posthoc")
+PLOT_THIN_FACTOR = 10
+POSTHOC_PLAN_FILE = "posthoc_plots.json"
+POSTHOC_PREFIX = "posthoc_"
+MAX_POSTHOC_FRAMES = 200      # per plot, evenly sampled (the last frame is always drawn); also caps field snapshots
+PLOT_SIZE = (800, 600)
+LOGGER_CSV_GLOB = "logger*.csv"
+CELL_CENTER = ("cell.center.x", "cell.center.y")
+
+# gnuplot's default line colours
+SERIES_COLORS = [
+    (148, 0, 211), (0, 158, 115), (86, 180, 233), (230, 159, 0),
+    (240, 228, 66), (0, 114, 178), (229, 30, 16), (0, 0, 0),
+]
+# Colour map for layers without a <ColorMap>: blue -> cyan -> yellow -> red
+DEFAULT_COLORMAP = [(0.0, (0, 0, 143)), (0.35, (0, 255, 255)), (0.65, (255, 255, 0)), (1.0, (128, 0, 0))]
+MISSING_COLOR = (160, 160, 160)
+
+
+class PlotError(ValueError):
+    pass
+
+
+def plots_available() -> bool:
+    return Image is not None
+
+
+# -----------------------
+# Model rewriting
+# -----------------------
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_number(x: float) -> str:
+    return f"{x:.6g}"
+
+
+def _first_symbol(el: Optional[ET.Element]) -> Optional[str]:
+    if el is None:
+        return None
+    for sym in el.iter("Symbol"):
+        if sym.get("symbol-ref"):
+            return sym.get("symbol-ref")
+    return None
+
+
+def _colormap(layer: ET.Element) -> Optional[List[Tuple[float, str]]]:
+    stops = []
+    for color in layer.iter("Color"):
+        value = _number(color.get("value"))
+        if value is not None and color.get("color"):
+            stops.append((value, color.get("color")))
+    return sorted(stops) or None
+
+
+def _layer(layer: Optional[ET.Element], symbol_attr: str) -> Optional[Dict[str, Any]]:
+    if layer is None:
+        return None
+    return {
+        "symbol": layer.get(symbol_attr),
+        "min": _number(layer.get("min")),
+        "max": _number(layer.get("max")),
+        "colormap": _colormap(layer),
+    }
+
+
+def _lattice_size(root: ET.Element) -> Optional[List[int]]:
+    size = root.find("Space/Lattice/Size")
+    if size is None:
+        return None
+    try:
+        dims = [int(float(v)) for v in re.split(r"[,\s]+", size.get("value", "").strip()) if v]
+    except ValueError:
+        return None
+    dims = (dims + [0, 0, 0])[:3]
+    return [max(1, d) for d in dims]
+
+
+def _thin(el: ET.Element, factor: float, thinned: List[Dict[str, Any]], source: str) -> None:
+    step = _number(el.get("time-step"))
+    if step is None or step <= 0 or factor == 1:
+        return
+    el.set("time-step", _format_number(step * factor))
+    thinned.append({"element": source, "from": _format_number(step), "to": el.get("time-step")})
+
+
+def _logger_plot_spec(plot: ET.Element, logger_index: int, plot_index: int) -> Dict[str, Any]:
+    style = plot.find("Style")
+    y_axis = plot.find("Y-axis")
+    return {
+        "id": f"logger{logger_index}_plot{plot_index}",
+        "source": f"Logger[{logger_index}]/Plot[{plot_index}]",
+        "kind": "logger",
+        "title": plot.get("title"),
+        "time_step": _number(plot.get("time-step")),
+        "x": _first_symbol(plot.find("X-axis")),
+        "y": [s.get("symbol-ref") for s in y_axis.iter("Symbol") if s.get("symbol-ref")] if y_axis is not None else [],
+        "color": _first_symbol(plot.find("Color-bar")),
+        "style": style.get("style", "points") if style is not None else "points",
+    }
+
+
+def plan_plot_mode(tree: ET.ElementTree, mode: str, thin_factor: float = PLOT_THIN_FACTOR) -> Dict[str, Any]:
+    """
+    Rewrite `tree` (in place) for plot `mode` and return the plan:
+    {mode, thin_factor, posthoc: [plot specs to render afterwards],
+    kept_inline: [{source, reason}], thinned: [...], save_interval,
+    expected_snapshots}. expected_snapshots estimates the full-state
+    .xml.gz snapshots the SaveInterval writes over StartTime..StopTime.
+    """
+    if mode not in PLOT_MODES:
+        raise PlotError(f"plots must be one of {list(PLOT_MODES)}, got '{mode}'")
+    if thin_factor < 1:
+        raise PlotError("thin_factor must be >= 1")
+
+    plan: Dict[str, Any] = {
+        "mode": mode,
+        "thin_factor": thin_factor,
+        "posthoc": [],
+        "kept_inline": [],
+        "thinned": [],
+        "save_interval": None,
+        "expected_snapshots": None,
+    }
+    root = tree.getroot()
+    analysis = root.find("Analysis")
+    if mode == "inline" or analysis is None:
+        return plan
+    posthoc = mode == "posthoc"
+
+    loggers = analysis.findall("Logger")
+    # Symbols each CSV-writing Logger records, for redrawing <Cells> layers
+    logged = [
+        {s.get("symbol-ref") for s in logger.iter("Symbol") if s.get("symbol-ref")}
+        for logger in loggers
+        if logger.find("Output/TextOutput") is not None
+    ]
+
+    for i, logger in enumerate(loggers, 1):
+        plots = logger.find("Plots")
+        if plots is None:
+            continue
+        for j, plot in enumerate(plots.findall("Plot"), 1):
+            source = f"Logger[{i}]/Plot[{j}]"
+            spec = _logger_plot_spec(plot, i, j)
+            if posthoc and logger.find("Output/TextOutput") is None:
+                plan["kept_inline"].append({"source": source, "reason": "Logger has no <TextOutput>"})
+            elif posthoc and (spec["x"] is None or not spec["y"]):
+                plan["kept_inline"].append({"source": source, "reason": "no X-axis/Y-axis symbol"})
+            elif posthoc:
+                plan["posthoc"].append(spec)
+                plots.remove(plot)
+                continue
+            _thin(plot, thin_factor, plan["thinned"], source)
+        if not plots.findall("Plot"):
+            logger.remove(plots)
+
+    lattice = _lattice_size(root)
+    for i, gnuplotter in enumerate(analysis.findall("Gnuplotter"), 1):
+        step = _number(gnuplotter.get("time-step"))
+        for j, plot in enumerate(gnuplotter.findall("Plot"), 1):
+            source = f"Gnuplotter[{i}]/Plot[{j}]"
+            field = _layer(plot.find("Field"), "symbol-ref")
+            cells = _layer(plot.find("Cells"), "value")
+            reason = None
+            if field is None and cells is None:
+                reason = "no <Field> or <Cells> layer"
+            elif field is not None and (lattice is None or lattice[2] > 1):
+                reason = "field plots are redrawn on 1D/2D lattices only"
+            elif cells is not None and not any({*CELL_CENTER, cells["symbol"]} <= symbols for symbols in logged):
+                reason = f"no Logger records {CELL_CENTER[0]}, {CELL_CENTER[1]} and {cells['symbol']}"
+            if not posthoc or reason:
+                if posthoc:
+                    plan["kept_inline"].append({"source": source, "reason": reason})
+                continue
+            plan["posthoc"].append({
+                "id": f"gnuplotter{i}_plot{j}",
+                "source": source,
+                "kind": "spatial",
+                "title": plot.get("title"),
+                "time_step": step,
+                "lattice": lattice,
+                "field": field,
+                "cells": cells,
+                "dropped_layers": sorted({c.tag for c in plot if c.tag not in ("Field", "Cells")}),
+            })
+            gnuplotter.remove(plot)
+        if gnuplotter.findall("Plot"):
+            _thin(gnuplotter, thin_factor, plan["thinned"], f"Gnuplotter[{i}]")
+        else:
+            analysis.remove(gnuplotter)
+
+    field_steps = [s["time_step"] for s in plan["posthoc"] if s["kind"] == "spatial" and s["field"] and s["time_step"]]
+    time_el = root.find("Time")
+    if field_steps and time_el is not None:
+        step = min(field_steps)
+        span = _time_span(time_el)
+        # Every snapshot is a full-state .xml.gz and at most MAX_POSTHOC_FRAMES
+        # are drawn, so stay on the plot's time grid but write no more than that
+        # (span / interval + 1 snapshots, counting the one at StartTime)
+        intervals = max(1, MAX_POSTHOC_FRAMES - 1)
+        wanted = step * max(1, math.ceil(span / (step * intervals) - 1e-9)) if span else step
+        save = time_el.find("SaveInterval")
+        if save is None:
+            save = ET.SubElement(time_el, "SaveInterval")
+        current = _number(save.get("value"))
+        if current is None or current <= 0 or current > wanted:
+            save.set("value", _format_number(wanted))
+        plan["save_interval"] = _number(save.get("value"))
+        if span:
+            plan["expected_snapshots"] = int(span / plan["save_interval"] + 1e-9) + 1
+    return plan
+
+
+def _time_span(time_el: ET.Element) -> Optional[float]:
+    """StopTime - StartTime of a <Time> element, or None if either is not numeric."""
+    start_el, stop_el = time_el.find("StartTime"), time_el.find("StopTime")
+    start = 0.0 if start_el is None else _number(start_el.get("value"))
+    stop = None if stop_el is None else _number(stop_el.get("value"))
+    if start is None or stop is None or stop <= start:
+        return None
+    return stop - start
+
+
+def write_plan(run_path: Path, plan: Dict[str, Any]) -> Path:
+    path = Path(run_path) / POSTHOC_PLAN_FILE
+    path.write_text(json.dumps(plan, indent=2), encoding="utf-8")
+    return path
+
+
+def load_plan(run_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((Path(run_path) / POSTHOC_PLAN_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+# -----------------------
+# Data
+# -----------------------
+def _logger_sources(run_path: Path, symbols: Sequence[str]) -> List[Tuple[Path, str, List[int]]]:
+    """(csv, delimiter, column indices of time + `symbols`) for every logger CSV holding all `symbols`."""
+    sources = []
+    for path in sorted(Path(run_path).glob(LOGGER_CSV_GLOB)):
+        try:
+            delimiter, columns, indices = read_header(path)
+        except (OSError, LoggerError):
+            continue
+        wanted = [TIME_COLUMN] + [s for s in symbols if s != TIME_COLUMN]
+        if all(name in columns for name in wanted):
+            sources.append((path, delimiter, [indices[columns.index(name)] for name in wanted]))
+    return sources
+
+
+def _read_rows(source: Tuple[Path, str, List[int]], times: Optional[np.ndarray] = None) -> np.ndarray:
+    """Rows (time first) of one logger CSV, optionally only those at `times`."""
+    path, delimiter, usecols = source
+    blocks = []
+    for block in iter_arrays(path, delimiter, usecols):
+        blocks.append(block if times is None else block[np.isin(block[:, 0], times)])
+    return np.concatenate(blocks) if blocks else np.empty((0, len(usecols)))
+
+
+def _frame_times(times: np.ndarray, step: Optional[float], max_frames: int = MAX_POSTHOC_FRAMES) -> np.ndarray:
+    """The time points a plot with `step` would have drawn (step <= 0: the last only), at most max_frames."""
+    times = np.unique(times)
+    if times.size == 0:
+        return times
+    if step is None or step <= 0:
+        return times[-1:]
+    on_step = np.isclose(np.round(times / step) * step, times, rtol=1e-9, atol=1e-9 * step)
+    selected = times[on_step] if on_step.any() else times[-1:]
+    if selected.size > max_frames:
+        keep = np.unique(np.linspace(0, selected.size - 1, max_frames).round().astype(int))
+        selected = selected[keep]
+    return selected
+
+
+def _snapshots(run_path: Path) -> List[Tuple[float, str]]:
+    found = []
+    for path in Path(run_path).glob(f"*{SNAPSHOT_SUFFIX}"):
+        try:
+            t = snapshot_time(path)
+        except (OSError, EOFError):
+            continue
+        if t is not None:
+            found.append((t, str(path)))
+    return sorted(found)
+
+
+# -----------------------
+# Drawing
+# -----------------------
+def _rgb(name: str) -> Tuple[int, int, int]:
+    for candidate in (name, name.replace("-", "").replace("_", "")):
+        try:
+            return ImageColor.getrgb(candidate)[:3]
+        except ValueError:
+            continue
+    return MISSING_COLOR
+
+
+def _apply_colormap(
+    values: np.ndarray,
+    stops: Optional[List[Tuple[float, str]]],
+    vmin: float,
+    vmax: float,
+) -> np.ndarray:
+    """(N, 3) uint8 colours of `values`: a <ColorMap> is in data units, the default spans [vmin, vmax]."""
+    if stops:
+        xs = np.array([v for v, _ in stops], dtype=np.float64)
+        rgbs = np.array([_rgb(c) for _, c in stops], dtype=np.float64)
+        t = values
+    else:
+        xs = np.array([p for p, _ in DEFAULT_COLORMAP])
+        rgbs = np.array([c for _, c in DEFAULT_COLORMAP], dtype=np.float64)
+        t = (values - vmin) / (vmax - vmin) if vmax > vmin else np.zeros_like(values)
+    out = np.stack([np.interp(t, xs, rgbs[:, k]) for k in range(3)], axis=-1)
+    out[~np.isfinite(values)] = MISSING_COLOR
+    return out.astype(np.uint8)
+
+
+def _value_range(values: np.ndarray, lo: Optional[float] = None, hi: Optional[float] = None) -> Tuple[float, float]:
+    finite = values[np.isfinite(values)]
+    lo = float(finite.min()) if lo is None and finite.size else (lo if lo is not None else 0.0)
+    hi = float(finite.max()) if hi is None and finite.size else (hi if hi is not None else 1.0)
+    if hi <= lo:
+        pad = abs(lo) * 0.5 or 0.5
+        lo, hi = lo - pad, hi + pad
+    return lo, hi
+
+
+class _Canvas:
+    """A titled plot area with linear axes, drawn with Pillow."""
+
+    LEFT, RIGHT, TOP, BOTTOM = 80, 30, 40, 50
+
+    def __init__(self, title: str, xrange: Tuple[float, float], yrange: Tuple[float, float],
+                 xlabel: str = "", ylabel: str = "", colorbar: bool = False):
+        self.image = Image.new("RGB", PLOT_SIZE, "white")
+        self.draw = ImageDraw.Draw(self.image)
+        self.font = ImageFont.load_default()
+        right = PLOT_SIZE[0] - self.RIGHT - (70 if colorbar else 0)
+        self.box = (self.LEFT, self.TOP, right, PLOT_SIZE[1] - self.BOTTOM)
+        self.xrange = xrange
+        self.yrange = yrange
+        self.draw.text((self.LEFT, 12), title, fill="black", font=self.font)
+        self.draw.text(((self.box[0] + self.box[2]) // 2, PLOT_SIZE[1] - 20), xlabel, fill="black", font=self.font)
+        self.draw.text((8, self.TOP - 20), ylabel, fill="black", font=self.font)
+
+    def to_px(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        x0, y0, x1, y1 = self.box
+        px = x0 + (xs - self.xrange[0]) / (self.xrange[1] - self.xrange[0]) * (x1 - x0)
+        py = y1 - (ys - self.yrange[0]) / (self.yrange[1] - self.yrange[0]) * (y1 - y0)
+        return px, py
+
+    def axes(self) -> None:
+        x0, y0, x1, y1 = self.box
+        self.draw.rectangle(self.box, outline="black")
+        for k in range(5):
+            f = k / 4
+            xv = self.xrange[0] + f * (self.xrange[1] - self.xrange[0])
+            yv = self.yrange[0] + f * (self.yrange[1] - self.yrange[0])
+            px = x0 + f * (x1 - x0)
+            py = y1 - f * (y1 - y0)
+            self.draw.line([(px, y1), (px, y1 + 4)], fill="black")
+            self.draw.text((px - 15, y1 + 8), f"{xv:.4g}", fill="black", font=self.font)
+            self.draw.line([(x0 - 4, py), (x0, py)], fill="black")
+            self.draw.text((8, py - 5), f"{yv:.4g}", fill="black", font=self.font)
+
+    def line(self, xs: np.ndarray, ys: np.ndarray, color: Tuple[int, int, int], width: int = 1) -> None:
+        ok = np.isfinite(xs) & np.isfinite(ys)
+        px, py = self.to_px(xs[ok], ys[ok])
+        if px.size > 1:
+            self.draw.line(list(zip(px.tolist(), py.tolist())), fill=color, width=width)
+
+    def points(self, xs: np.ndarray, ys: np.ndarray, colors: np.ndarray, radius: int = 1) -> None:
+        """Square dots, set directly in the pixel array (fast for millions of rows)."""
+        ok = np.isfinite(xs) & np.isfinite(ys)
+        px, py = self.to_px(xs[ok], ys[ok])
+        colors = np.broadcast_to(np.asarray(colors, dtype=np.uint8), (ok.size, 3))[ok]
+        x0, y0, x1, y1 = self.box
+        pixels = np.asarray(self.image).copy()
+        px = np.round(px).astype(int)
+        py = np.round(py).astype(int)
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                qx, qy = px + dx, py + dy
+                inside = (qx > x0) & (qx < x1) & (qy > y0) & (qy < y1)
+                pixels[qy[inside], qx[inside]] = colors[inside]
+        self.image = Image.fromarray(pixels)
+        self.draw = ImageDraw.Draw(self.image)
+
+    def raster(self, rgb: np.ndarray) -> None:
+        """Paint an (ny, nx, 3) lattice image (row 0 = y 0) over the plot area."""
+        x0, y0, x1, y1 = self.box
+        tile = Image.fromarray(np.ascontiguousarray(rgb[::-1])).resize((x1 - x0, y1 - y0), Image.NEAREST)
+        self.image.paste(tile, (x0, y0))
+
+    def colorbar(self, stops: Optional[List[Tuple[float, str]]], vmin: float, vmax: float, label: str) -> None:
+        x1, y0, y1 = self.box[2], self.box[1], self.box[3]
+        values = np.linspace(vmax, vmin, y1 - y0)
+        strip = np.repeat(_apply_colormap(values, stops, vmin, vmax)[:, None, :], 15, axis=1)
+        self.image.paste(Image.fromarray(strip), (x1 + 15, y0))
+        self.draw.text((x1 + 33, y0), f"{vmax:.4g}", fill="black", font=self.font)
+        self.draw.text((x1 + 33, y1 - 10), f"{vmin:.4g}", fill="black", font=self.font)
+        self.draw.text((x1 + 10, y0 - 20), label, fill="black", font=self.font)
+
+    def legend(self, entries: List[Tuple[str, Tuple[int, int, int]]]) -> None:
+        x, y = self.box[2] - 150, self.box[1] + 8
+        for label, color in entries:
+            self.draw.line([(x, y + 6), (x + 20, y + 6)], fill=color, width=2)
+            self.draw.text((x + 26, y), label, fill="black", font=self.font)
+            y += 14
+
+    def save(self, path: Path) -> None:
+        self.axes()
+        self.image.save(path)
+
+
+def _title(spec: Dict[str, Any], t: Optional[float]) -> str:
+    title = spec.get("title") or spec["source"]
+    return title if t is None else f"{title}  (time = {t:g})"
+
+
+def _frame_path(run_path: Path, spec: Dict[str, Any], index: Optional[int]) -> Path:
+    suffix = "" if index is None else f"_{index:05d}"
+    return Path(run_path) / f"{POSTHOC_PREFIX}{spec['id']}{suffix}.png"
+
+
+# -----------------------
+# Renderers (run in worker processes)
+# -----------------------
+def _render_logger_plot(run_path: Path, spec: Dict[str, Any]) -> List[str]:
+    x, ys, color = spec["x"], spec["y"], spec["color"]
+    symbols = [x] + ys + ([color] if color else [])
+    sources = _logger_sources(run_path, symbols)
+    if not sources:
+        raise PlotError(f"no logger CSV has the columns {symbols}")
+    # Rows hold the time column, then the other symbols in order
+    order = [TIME_COLUMN] + [s for s in symbols if s != TIME_COLUMN]
+    col = {s: order.index(s) for s in symbols}
+    data = [_read_rows(source) for source in sources]
+    rows = np.concatenate(data)
+    if rows.size == 0:
+        raise PlotError("the logger CSVs hold no rows")
+
+    def values(block: np.ndarray, s: str) -> np.ndarray:
+        return block[:, col[s]]
+
+    all_y = np.concatenate([values(rows, y) for y in ys])
+    crange = _value_range(values(rows, color)) if color else None
+    # Several rows per time point (one per cell) are drawn as points, never joined
+    joined = "line" in spec["style"] and all(np.unique(b[:, 0]).size == len(b) for b in data)
+
+    def draw(frame: List[np.ndarray], t: Optional[float], path: Path) -> None:
+        stacked = np.concatenate(frame)
+        canvas = _Canvas(
+            _title(spec, t),
+            _value_range(values(stacked if x != TIME_COLUMN else rows, x)),
+            _value_range(all_y),
+            xlabel=x,
+            ylabel=", ".join(ys),
+            colorbar=bool(color),
+        )
+        for k, y in enumerate(ys):
+            series_color = SERIES_COLORS[k % len(SERIES_COLORS)]
+            for block in frame:
+                if color:
+                    canvas.points(values(block, x), values(block, y),
+                                  _apply_colormap(values(block, color), None, *crange), radius=2)
+                elif joined:
+                    order = np.argsort(values(block, x), kind="stable")
+                    canvas.line(values(block, x)[order], values(block, y)[order], series_color, width=2)
+                else:
+                    canvas.points(values(block, x), values(block, y), np.array(series_color), radius=1)
+        if color:
+            canvas.colorbar(None, *crange, color)
+        else:
+            canvas.legend([(y, SERIES_COLORS[k % len(SERIES_COLORS)]) for k, y in enumerate(ys)])
+        canvas.save(path)
+
+    if x == TIME_COLUMN:
+        path = _frame_path(run_path, spec, None)
+        draw(data, None, path)
+        return [str(path)]
+
+    written = []
+    for index, t in enumerate(_frame_times(rows[:, 0], spec["time_step"])):
+        path = _frame_path(run_path, spec, index)
+        draw([b[b[:, 0] == t] for b in data], float(t), path)
+        written.append(str(path))
+    return written
+
+
+def _render_spatial_frames(run_path: Path, spec: Dict[str, Any], frames: List[Tuple[int, float, Optional[str]]]) -> List[str]:
+    field, cells = spec["field"], spec["cells"]
+    nx, ny = spec["lattice"][:2] if spec["lattice"] else (None, None)
+
+    cell_rows = None
+    if cells:
+        symbols = [*CELL_CENTER, cells["symbol"]]
+        sources = _logger_sources(run_path, symbols)
+        if not sources:
+            raise PlotError(f"no logger CSV has the columns {symbols}")
+        cell_rows = np.concatenate([_read_rows(s) for s in sources])
+        cell_times = np.unique(cell_rows[:, 0])
+        # Fixed colour scale across frames, as gnuplot's cbrange with min/max
+        crange = _value_range(cell_rows[:, 3], cells["min"], cells["max"])
+
+    written = []
+    for index, t, snapshot in frames:
+        fvalues = None
+        if field:
+            fvalues = next((v for s, v in iter_snapshot_fields(Path(snapshot)) if s == field["symbol"]), None)
+            if fvalues is None or nx is None or fvalues.size != nx * ny:
+                raise PlotError(f"field {field['symbol']} missing or not {nx}x{ny} in {Path(snapshot).name}")
+        one_d = field is not None and ny == 1
+        if one_d:
+            frange = _value_range(fvalues, field["min"], field["max"])
+            canvas = _Canvas(_title(spec, t), (0, nx), frange, xlabel="x", ylabel=field["symbol"])
+            canvas.line(np.arange(nx) + 0.5, fvalues, SERIES_COLORS[0], width=2)
+        else:
+            if nx is not None:
+                xrange, yrange = (0, nx), (0, ny)
+            else:
+                xrange, yrange = _value_range(cell_rows[:, 1]), _value_range(cell_rows[:, 2])
+            canvas = _Canvas(_title(spec, t), xrange, yrange, xlabel="x", ylabel="y", colorbar=True)
+            if field:
+                frange = _value_range(fvalues, field["min"], field["max"])
+                canvas.raster(_apply_colormap(fvalues, field["colormap"], *frange).reshape(ny, nx, 3))
+                canvas.colorbar(field["colormap"], *frange, field["symbol"])
+            if cells:
+                # Cells as logged at the frame's time, or the latest time before it
+                logged = cell_times[cell_times <= t + 1e-9]
+                at = cell_rows[cell_rows[:, 0] == logged[-1]] if logged.size else cell_rows[:0]
+                colors = _apply_colormap(at[:, 3], cells["colormap"], *crange)
+                canvas.points(at[:, 1], at[:, 2], colors, radius=3)
+                if not field:
+                    canvas.colorbar(cells["colormap"], *crange, cells["symbol"])
+        path = _frame_path(run_path, spec, index)
+        canvas.save(path)
+        written.append(str(path))
+    return written
+
+
+def _render_task(task: Tuple[str, Dict[str, Any], Optional[List[Tuple[int, float, Optional[str]]]]]) -> Dict[str, Any]:
+    run_path, spec, frames = task
+    try:
+        if spec["kind"] == "logger":
+            files = _render_logger_plot(Path(run_path), spec)
+        else:
+            files = _render_spatial_frames(Path(run_path), spec, frames)
+        return {"id": spec["id"], "files": files, "error": None}
+    except (PlotError, OSError, ValueError, LoggerError) as e:
+        return {"id": spec["id"], "files": [], "error": str(e)}
+
+
+def _spatial_frames(run_path: Path, spec: Dict[str, Any], snapshots: List[Tuple[float, str]]) -> List[Tuple[int, float, Optional[str]]]:
+    if spec["field"]:
+        by_time = dict(snapshots)
+        times = _frame_times(np.array([t for t, _ in snapshots]), spec["time_step"])
+        return [(i, float(t), by_time[float(t)]) for i, t in enumerate(times)]
+    symbols = [*CELL_CENTER, spec["cells"]["symbol"]]
+    sources = _logger_sources(run_path, symbols)
+    times = np.concatenate([_read_rows((path, delimiter, cols[:1]))[:, 0] for path, delimiter, cols in sources] or [np.empty(0)])
+    return [(i, float(t), None) for i, t in enumerate(_frame_times(times, spec["time_step"]))]
+
+
+def render_posthoc_plots(
+    run_path: Path,
+    plan: Optional[Dict[str, Any]] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Draw the plots of `plan` (default: the run's posthoc_plots.json) across
+    `workers` processes (default: all cores). Frames of a spatial plot are
+    split among the workers. Returns {rendered, plots, seconds}; a plot that
+    cannot be drawn carries an "error".
+    """
+    if Image is None:
+        raise PlotError("Post-hoc plots need Pillow (pip install pillow)")
+    run_path = Path(run_path)
+    plan = plan if plan is not None else load_plan(run_path)
+    if plan is None:
+        raise PlotError(f"No {POSTHOC_PLAN_FILE} in {run_path}; run with plots='posthoc' first")
+    started = time.monotonic()
+
+    snapshots = _snapshots(run_path) if any(s["kind"] == "spatial" and s["field"] for s in plan["posthoc"]) else []
+    workers = max(1, workers or os.cpu_count() or 1)
+    tasks = []
+    results: Dict[str, Dict[str, Any]] = {}
+    for spec in plan["posthoc"]:
+        results[spec["id"]] = {"id": spec["id"], "source": spec["source"], "title": spec.get("title"),
+                               "files": [], "error": None}
+        if spec.get("dropped_layers"):
+            results[spec["id"]]["not_redrawn"] = spec["dropped_layers"]
+        if spec["kind"] == "logger":
+            tasks.append((str(run_path), spec, None))
+            continue
+        try:
+            frames = _spatial_frames(run_path, spec, snapshots)
+        except (OSError, LoggerError) as e:
+            results[spec["id"]]["error"] = str(e)
+            continue
+        if not frames:
+            results[spec["id"]]["error"] = "no snapshots or logger rows to draw from"
+            continue
+        chunk = -(-len(frames) // workers)
+        tasks += [(str(run_path), spec, frames[k:k + chunk]) for k in range(0, len(frames), chunk)]
+
+    if workers == 1 or len(tasks) <= 1:
+        outcomes = [_render_task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            outcomes = list(pool.map(_render_task, tasks))
+    for outcome in outcomes:
+        entry = results[outcome["id"]]
+        entry["files"] += [Path(f).name for f in outcome["files"]]
+        entry["error"] = entry["error"] or outcome["error"]
+
+    plots = list(results.values())
+    for entry in plots:
+        entry["frames"] = len(entry["files"])
+    return {
+        "rendered": sum(p["frames"] for p in plots),
+        "plots": plots,
+        "seconds": round(time.monotonic() - started, 3),
+    }
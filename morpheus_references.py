@@ -0,0 +1,936 @@
+"""
+Full-text search over the reference corpus: the consolidated documents
+(references/*.txt) and the example models (references/<category>/*.xml).
+
+Every file is cut into chunks of about CHUNK_CHARS on line boundaries, with
+a new chunk at every Markdown heading, so a hit points at one section rather
+than at the head of a 566 KB file. The chunks go into an inverted index
+(term -> chunks and term frequencies) ranked with BM25. Terms are lowercased
+words plus the parts of camelCase / dotted names, so "VolumeConstraint"
+also matches "volume constraint" and "cell.center.x" matches "center".
+
+The index is persisted as references/.search_index.json together with the
+size/mtime of every indexed file, and rebuilt when one of them changes.
+
+The two consolidated documents are also addressable by section:
+SectionedDocument parses the Markdown headings of a file once into a table of
+byte ranges (persisted next to it as .<name>.sections.json) and serves a
+section by slicing an mmap of the file, so any part of it can be read without
+loading or truncating the whole document.
+
+ReferenceCache keeps recently read reference files and directory listings in
+memory (LRU, bounded by entry count and bytes) and checks each against the
+file's/directory's size and mtime before serving it, so edits to references/
+are picked up on the next call.
+
+ReferenceCatalog parses every example XML once with ElementTree into a small
+structural summary (lattice, time, cell types, CPM/PDE/ODE components,
+Analysis plugins, symbols), persisted as references/.catalog.json and
+refreshed per file when one changes, so an example can be picked without
+reading the XML itself.
+
+StructureIndex finds the reference models closest to a draft model.xml by
+structure: each model becomes the set of its element tag paths, attribute
+names and plugin names, sketched with MinHash and bucketed with LSH, over
+both the example XMLs and the XML entries of model_repository.txt.
+"""
+
+import json
+import math
+import mmap
+import os
+import re
+import threading
+import time
+import zlib
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+INDEX_VERSION = 1
+SEARCH_INDEX_FILE = ".search_index.json"
+CHUNK_CHARS = 1500
+SNIPPET_CHARS = 300
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_SEARCH_RESULTS = 50
+SECTION_TABLE_VERSION = 1
+SECTION_TABLE_SUFFIX = ".sections.json"
+MAX_SECTION_CANDIDATES = 20
+REFERENCE_CACHE_ENTRIES = 256
+REFERENCE_CACHE_BYTES = 32 * 1024 * 1024
+CATALOG_VERSION = 1
+CATALOG_FILE = ".catalog.json"
+STRUCTURE_INDEX_VERSION = 1
+STRUCTURE_INDEX_FILE = ".structure_index.json"
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32            # 32 bands x 4 rows: pairs above ~0.4 Jaccard collide
+MINHASH_SEED = 20240601
+STRUCTURE_CHECK_SECONDS = 1.0   # how often a query re-stats the indexed files
+# CellType children that define symbols rather than behaviour
+_SYMBOL_ELEMENTS = {
+    "Constant", "ConstantVector", "Variable", "VariableVector", "Property",
+    "PropertyVector", "DelayProperty", "MembraneProperty", "Function",
+}
+
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9]*")
+_CAMEL_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_HEADING_RE = re.compile(rb"^(#{1,3}) (\S.*?)\s*$")
+_FENCE_RE = re.compile(rb"^(`{3,})([A-Za-z]*)\s*$")
+_ANCHOR_RE = re.compile(r"\s*\{[#.][^}]*\}\s*$")
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have if in into is it its of on or "
+    "that the their then there these this to was were which will with".split()
+)
+
+
+class ReferenceLookupError(ValueError):
+    pass
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words plus their camelCase parts, stopwords and 1-letter words dropped."""
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        lower = word.lower()
+        if len(lower) > 1 and lower not in STOPWORDS:
+            tokens.append(lower)
+        parts = _CAMEL_RE.findall(word)
+        if len(parts) > 1:
+            tokens += [p.lower() for p in parts if len(p) > 1 and p.lower() not in STOPWORDS]
+    return tokens
+
+
+def reference_files(root: Path) -> List[Path]:
+    """The consolidated *.txt documents in `root`, then every example *.xml below it."""
+    root = Path(root)
+    docs = sorted(p for p in root.glob("*.txt") if p.is_file())
+    models = sorted(
+        p for p in root.rglob("*.xml")
+        if p.is_file() and not any(part.startswith(".") for part in p.relative_to(root).parts)
+    )
+    return docs + models
+
+
+def _fingerprint(root: Path, files: List[Path]) -> List[List[Any]]:
+    out = []
+    for path in files:
+        st = path.stat()
+        out.append([path.relative_to(root).as_posix(), st.st_size, st.st_mtime_ns])
+    return out
+
+
+def chunk_file(data: bytes) -> List[Tuple[int, int, int, str]]:
+    """(start byte, end byte, first line, heading) of each chunk of a file."""
+    chunks = []
+    start = 0
+    line_no = 1
+    first_line = 1
+    heading = ""
+    chunk_heading = ""
+    pos = 0
+    for line in data.splitlines(keepends=True):
+        match = _HEADING_RE.match(line)
+        if pos > start and (match or pos - start >= CHUNK_CHARS):
+            chunks.append((start, pos, first_line, chunk_heading))
+            start, first_line = pos, line_no
+        if match:
+            heading = match.group(2).decode("utf-8", errors="ignore")
+        if pos == start:
+            chunk_heading = heading
+        pos += len(line)
+        line_no += 1
+    if pos > start:
+        chunks.append((start, pos, first_line, chunk_heading))
+    return chunks
+
+
+# -----------------------
+# Index
+# -----------------------
+class ReferenceIndex:
+    """BM25 index over reference_files(root), loaded or built on first use."""
+
+    def __init__(self, root: Path, index_path: Optional[Path] = None):
+        self.root = Path(root)
+        self.index_path = Path(index_path) if index_path else self.root / SEARCH_INDEX_FILE
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.files: List[List[Any]] = []
+        self.chunks = np.empty((0, 5), dtype=np.int64)   # file, start, end, line, length
+        self.headings: List[str] = []
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.build_seconds: Optional[float] = None
+
+    # Building and persistence
+    def _build(self, files: List[Path], fingerprint: List[List[Any]]) -> Dict[str, Any]:
+        chunks = []
+        headings = []
+        terms: Dict[str, Dict[int, int]] = {}
+        for file_idx, path in enumerate(files):
+            data = path.read_bytes()
+            for start, end, line, heading in chunk_file(data):
+                tokens = tokenize(data[start:end].decode("utf-8", errors="ignore"))
+                chunk_id = len(chunks)
+                chunks.append([file_idx, start, end, line, len(tokens)])
+                headings.append(heading)
+                for token in tokens:
+                    counts = terms.setdefault(token, {})
+                    counts[chunk_id] = counts.get(chunk_id, 0) + 1
+        return {
+            "version": INDEX_VERSION,
+            "files": fingerprint,
+            "chunks": chunks,
+            "headings": headings,
+            "terms": {t: [list(c.keys()), list(c.values())] for t, c in terms.items()},
+        }
+
+    def _load_saved(self, fingerprint: List[List[Any]]) -> Optional[Dict[str, Any]]:
+        try:
+            saved = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if saved.get("version") != INDEX_VERSION or saved.get("files") != fingerprint:
+            return None
+        return saved
+
+    def ensure_loaded(self) -> None:
+        """Load the persisted index, rebuilding it if a reference file changed."""
+        with self._lock:
+            files = reference_files(self.root)
+            fingerprint = _fingerprint(self.root, files)
+            if self._loaded and fingerprint == self.files:
+                return
+            data = self._load_saved(fingerprint)
+            if data is None:
+                started = time.monotonic()
+                data = self._build(files, fingerprint)
+                self.build_seconds = round(time.monotonic() - started, 3)
+                tmp = self.index_path.with_suffix(".tmp")
+                try:
+                    tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+                    os.replace(tmp, self.index_path)
+                except OSError:
+                    pass  # read-only checkout: keep the index in memory only
+            self.files = data["files"]
+            self.chunks = np.array(data["chunks"], dtype=np.int64).reshape(-1, 5)
+            self.headings = data["headings"]
+            self.postings = {
+                t: (np.array(ids, dtype=np.int64), np.array(tfs, dtype=np.float64))
+                for t, (ids, tfs) in data["terms"].items()
+            }
+            self._loaded = True
+
+    # Querying
+    def _snippet(self, chunk: np.ndarray, terms: List[str]) -> str:
+        path = self.root / self.files[chunk[0]][0]
+        with open(path, "rb") as f:
+            f.seek(int(chunk[1]))
+            text = f.read(int(chunk[2] - chunk[1])).decode("utf-8", errors="ignore")
+        lower = text.lower()
+        hits = [i for i in (lower.find(t) for t in terms) if i >= 0]
+        begin = max(0, min(hits) - SNIPPET_CHARS // 3) if hits else 0
+        snippet = text[begin:begin + SNIPPET_CHARS].strip()
+        return ("..." if begin > 0 else "") + snippet + ("..." if begin + SNIPPET_CHARS < len(text) else "")
+
+    def search(self, query: str, k: int = 5) -> Dict[str, Any]:
+        """The k best chunks for `query` by BM25, with file, byte offset, line, heading and snippet."""
+        started = time.perf_counter()
+        self.ensure_loaded()
+        terms = list(dict.fromkeys(tokenize(query)))
+        k = max(1, min(k, MAX_SEARCH_RESULTS))
+        n = len(self.chunks)
+        results = []
+        if n and terms:
+            lengths = self.chunks[:, 4].astype(np.float64)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1.0))
+            scores = np.zeros(n)
+            for term in terms:
+                if term not in self.postings:
+                    continue
+                ids, tfs = self.postings[term]
+                idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+                scores[ids] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[ids])
+            top = np.argsort(-scores, kind="stable")[:k]
+            for chunk_id in top[scores[top] > 0]:
+                chunk = self.chunks[chunk_id]
+                results.append({
+                    "file": self.files[chunk[0]][0],
+                    "offset": int(chunk[1]),
+                    "length": int(chunk[2] - chunk[1]),
+                    "line": int(chunk[3]),
+                    "heading": self.headings[chunk_id],
+                    "score": round(float(scores[chunk_id]), 4),
+                    "snippet": self._snippet(chunk, terms),
+                })
+        return {
+            "query": query,
+            "terms": terms,
+            "results": results,
+            "chunks_indexed": n,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+
+# -----------------------
+# Section tables
+# -----------------------
+def section_table_path(path: Path) -> Path:
+    return path.with_name(f".{path.stem}{SECTION_TABLE_SUFFIX}")
+
+
+def parse_sections(data: bytes) -> List[Dict[str, Any]]:
+    """
+    Headings of a Markdown document as {title, level, line, start, end, parent}.
+
+    Headings inside code fences are skipped, except in the ````markdown fences
+    model_repository.txt wraps embedded index.md files in: those count two
+    levels below the enclosing "## File: ..." heading (YAML front matter
+    excluded). A section runs up to the next heading of the same or a higher
+    level; `parent` is the index of the enclosing section or -1.
+    """
+    sections: List[Dict[str, Any]] = []
+    open_stack: List[int] = []
+    fences: List[Tuple[int, bytes]] = []
+    front_matter = False
+    fence_first_line = False
+    pos = 0
+    for line_no, line in enumerate(data.splitlines(keepends=True), start=1):
+        start, pos = pos, pos + len(line)
+        stripped = line.rstrip(b"\r\n")
+        fence = _FENCE_RE.match(stripped)
+        if fence:
+            ticks, lang = len(fence.group(1)), fence.group(2)
+            if fences and ticks >= fences[-1][0] and not lang:
+                fences.pop()
+            else:
+                fences.append((ticks, lang.lower()))
+                fence_first_line = len(fences) == 1
+            front_matter = False
+            continue
+        if fence_first_line:
+            fence_first_line = False
+            if stripped == b"---":
+                front_matter = True
+                continue
+        if front_matter:
+            front_matter = stripped != b"---"
+            continue
+        if fences and (len(fences) > 1 or fences[0][1] not in (b"markdown", b"md")):
+            continue
+        match = _HEADING_RE.match(stripped)
+        if not match:
+            continue
+        level = len(match.group(1)) + (2 if fences else 0)
+        title = _ANCHOR_RE.sub("", match.group(2).decode("utf-8", errors="ignore")).strip()
+        while open_stack and sections[open_stack[-1]]["level"] >= level:
+            sections[open_stack.pop()]["end"] = start
+        sections.append({
+            "title": title,
+            "level": level,
+            "line": line_no,
+            "start": start,
+            "end": len(data),
+            "parent": open_stack[-1] if open_stack else -1,
+        })
+        open_stack.append(len(sections) - 1)
+    return sections
+
+
+def _normalize_title(title: str) -> str:
+    return " ".join(title.casefold().split())
+
+
+def _title_matches(title: str, want: str) -> bool:
+    if title == want:
+        return True
+    if title.startswith("file: "):
+        path = title[len("file: "):]
+        return path == want or path.endswith("/" + want)
+    return False
+
+
+class SectionedDocument:
+    """
+    A reference document served section by section from an mmap.
+
+    The section table is loaded from (or written to) section_table_path(path)
+    and rebuilt, together with the mapping, when the file's size or mtime
+    changes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.table_path = section_table_path(self.path)
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[List[int]] = None
+        self._map: Optional[mmap.mmap] = None
+        self.sections: List[Dict[str, Any]] = []
+        self.paths: List[str] = []
+        self._chains: List[List[str]] = []   # normalized titles, section first
+
+    def _load(self) -> None:
+        st = self.path.stat()
+        fingerprint = [st.st_size, st.st_mtime_ns]
+        if fingerprint == self._fingerprint:
+            return
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else None
+        sections = None
+        try:
+            saved = json.loads(self.table_path.read_text(encoding="utf-8"))
+            if saved.get("version") == SECTION_TABLE_VERSION and saved.get("source") == fingerprint:
+                sections = saved["sections"]
+        except (OSError, ValueError):
+            pass
+        if sections is None:
+            sections = parse_sections(mapped[:] if mapped is not None else b"")
+            tmp = self.table_path.with_suffix(".tmp")
+            try:
+                tmp.write_text(json.dumps({
+                    "version": SECTION_TABLE_VERSION,
+                    "source": fingerprint,
+                    "sections": sections,
+                }), encoding="utf-8")
+                os.replace(tmp, self.table_path)
+            except OSError:
+                pass  # read-only checkout: keep the table in memory only
+        if self._map is not None:
+            self._map.close()
+        self._map = mapped
+        self.sections = sections
+        self.paths = []
+        self._chains = []
+        for sec in sections:
+            parent = sec["parent"]
+            title = _normalize_title(sec["title"])
+            if parent >= 0:
+                self.paths.append(f"{self.paths[parent]} > {sec['title']}")
+                self._chains.append([title] + self._chains[parent])
+            else:
+                self.paths.append(sec["title"])
+                self._chains.append([title])
+        self._fingerprint = fingerprint
+
+    def outline(self, max_level: int = 2) -> List[Dict[str, Any]]:
+        """Sections up to `max_level` with their line and size, for browsing."""
+        with self._lock:
+            self._load()
+            return [
+                {"section": self.paths[i], "level": sec["level"], "line": sec["line"],
+                 "bytes": sec["end"] - sec["start"]}
+                for i, sec in enumerate(self.sections) if sec["level"] <= max_level
+            ]
+
+    def find(self, section: str) -> int:
+        """
+        Index of the section named `section`: a heading title or a trailing
+        "Parent > Section" path of titles, where a "File: <path>" heading also
+        answers to the tail of its path; failing that, a unique substring of a
+        title. Raises ReferenceLookupError otherwise.
+        """
+        want = [seg.strip() for seg in _normalize_title(section).split(" > ")]
+        if not all(want):
+            raise ReferenceLookupError(f"Invalid section name: '{section}'")
+        want.reverse()
+        matches = []
+        for i, chain in enumerate(self._chains):
+            if len(chain) >= len(want) and all(
+                _title_matches(title, seg) for title, seg in zip(chain, want)
+            ):
+                matches.append(i)
+        if not matches and len(want) == 1:
+            matches = [i for i, chain in enumerate(self._chains) if want[0] in chain[0]]
+        if not matches:
+            raise ReferenceLookupError(f"No section matching '{section}' in {self.path.name}")
+        if len({self.paths[i] for i in matches}) > 1:
+            candidates = [self.paths[i] for i in matches[:MAX_SECTION_CANDIDATES]]
+            raise ReferenceLookupError(
+                f"'{section}' matches {len(matches)} sections in {self.path.name}; "
+                f"use a 'Parent > Section' path, e.g. one of: {candidates}"
+            )
+        return matches[0]
+
+    def read(self, section: str, max_chars: int = 20000) -> Dict[str, Any]:
+        """Text of one section (heading included) sliced from the mmap."""
+        with self._lock:
+            self._load()
+            idx = self.find(section)
+            sec = self.sections[idx]
+            raw = self._map[sec["start"]:sec["end"]] if self._map is not None else b""
+            text = raw.decode("utf-8", errors="ignore")
+            subsections = [
+                self.sections[j]["title"] for j in range(idx + 1, len(self.sections))
+                if self.sections[j]["parent"] == idx
+            ]
+            return {
+                "section": self.paths[idx],
+                "line": sec["line"],
+                "offset": sec["start"],
+                "length": sec["end"] - sec["start"],
+                "content": text[:max_chars],
+                "truncated": len(text) > max_chars,
+                "subsections": subsections,
+            }
+
+
+# -----------------------
+# Read cache
+# -----------------------
+class ReferenceCache:
+    """
+    Thread-safe LRU of file texts and directory listings, validated by mtime.
+
+    Every lookup costs one stat(); a changed size/mtime counts as an
+    invalidation and the entry is reloaded. Least recently used entries are
+    evicted once max_entries or max_bytes is exceeded.
+    """
+
+    def __init__(self, max_entries: int = REFERENCE_CACHE_ENTRIES,
+                 max_bytes: int = REFERENCE_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Tuple[int, int], Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _get(self, kind: str, path: Path, load) -> Any:
+        key = (kind, str(path))
+        try:
+            st = path.stat()
+        except OSError:
+            with self._lock:
+                self._drop(key)
+            raise
+        stamp = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self.invalidations += 1
+                self._drop(key)
+            self.misses += 1
+        value, size = load(path)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (stamp, value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, _, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+        return value
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    @staticmethod
+    def _load_text(path: Path) -> Tuple[str, int]:
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        return text, len(text)
+
+    @staticmethod
+    def _load_listing(path: Path) -> Tuple[List[str], int]:
+        names = sorted(p.name for p in path.iterdir() if p.is_file())
+        return names, sum(len(n) for n in names)
+
+    def read_text(self, path: Path, limit: Optional[int] = None) -> str:
+        """Contents of `path` (first `limit` characters), "" if it does not exist."""
+        try:
+            text = self._get("text", Path(path), self._load_text)
+        except FileNotFoundError:
+            return ""
+        return text if limit is None else text[:limit]
+
+    def list_files(self, path: Path) -> List[str]:
+        """Sorted names of the regular files in directory `path`, [] if it does not exist."""
+        try:
+            return list(self._get("dir", Path(path), self._load_listing))
+        except FileNotFoundError:
+            return []
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+# -----------------------
+# Structural catalog
+# -----------------------
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _values(el: Optional[ET.Element]) -> Optional[str]:
+    return el.get("value") if el is not None else None
+
+
+def summarize_model(root: ET.Element) -> Dict[str, Any]:
+    """Compact structural features of a parsed MorpheusModel."""
+    lattice = root.find("Space/Lattice")
+    size = None
+    if lattice is not None and lattice.find("Size") is not None:
+        size = [_number(v) for v in re.split(r"[,\s]+", lattice.find("Size").get("value", "").strip()) if v]
+        size = [int(v) if v is not None and v == int(v) else v for v in size]
+    boundaries = {
+        c.get("boundary"): c.get("type")
+        for c in (lattice.iter("Condition") if lattice is not None else [])
+        if c.get("boundary")
+    }
+
+    cell_types = []
+    for ct in root.iter("CellType"):
+        cell_types.append({
+            "name": ct.get("name"),
+            "class": ct.get("class"),
+            "plugins": sorted({child.tag for child in ct if child.tag not in _SYMBOL_ELEMENTS}),
+        })
+
+    fields = [f.get("symbol") for f in root.iter("Field") if f.get("symbol")]
+    diffusing = [f.get("symbol") for f in root.iter("Field") if f.find("Diffusion") is not None]
+    diff_eqns = [d.get("symbol-ref") for d in root.iter("DiffEqn")]
+    components = []
+    if root.find("CPM") is not None:
+        components.append("CPM")
+    if diffusing:
+        components.append("PDE")
+    if diff_eqns:
+        components.append("ODE")
+
+    analysis = root.find("Analysis")
+    populations = [
+        {"type": pop.get("type"), "size": _number(pop.get("size"))}
+        for pop in root.iter("Population")
+    ]
+    return {
+        "title": (root.findtext("Description/Title") or "").strip(),
+        "lattice": {
+            "class": lattice.get("class") if lattice is not None else None,
+            "size": size,
+            "dimensions": sum(1 for v in size or [] if isinstance(v, (int, float)) and v > 1),
+            "boundaries": boundaries,
+        },
+        "time": {
+            "start": _number(_values(root.find("Time/StartTime"))),
+            "stop": _number(_values(root.find("Time/StopTime"))),
+            "symbol": root.find("Time/TimeSymbol").get("symbol") if root.find("Time/TimeSymbol") is not None else None,
+        },
+        "components": components,
+        "cell_types": cell_types,
+        "populations": populations,
+        "fields": fields,
+        "diff_eqns": sorted(set(d for d in diff_eqns if d)),
+        "analysis": sorted({child.tag for child in analysis}) if analysis is not None else [],
+        "symbols": sorted({el.get("symbol") for el in root.iter() if el.get("symbol")}),
+    }
+
+
+class ReferenceCatalog:
+    """
+    Structural summary of every *.xml in the category folders, keyed by
+    "<category>/<name>". Persisted to `path`; on each access only files whose
+    size/mtime changed (or that are new) are re-parsed.
+    """
+
+    def __init__(self, categories: Dict[str, Path], path: Path):
+        self.categories = {cat: Path(d) for cat, d in categories.items()}
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _load_saved(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if saved.get("version") != CATALOG_VERSION:
+            return {}
+        return saved.get("models", {})
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """Bring the catalog up to date with the files on disk and return it."""
+        with self._lock:
+            entries = self._entries if self._entries is not None else self._load_saved()
+            current: Dict[str, Dict[str, Any]] = {}
+            changed = False
+            for cat, folder in self.categories.items():
+                if not folder.is_dir():
+                    continue
+                for xml_path in sorted(folder.glob("*.xml")):
+                    key = f"{cat}/{xml_path.name}"
+                    st = xml_path.stat()
+                    stamp = [st.st_size, st.st_mtime_ns]
+                    entry = entries.get(key)
+                    if entry is None or entry.get("source") != stamp:
+                        entry = {"category": cat, "name": xml_path.name, "source": stamp}
+                        try:
+                            entry.update(summarize_model(ET.parse(str(xml_path)).getroot()))
+                        except ET.ParseError as e:
+                            entry["error"] = f"XML parse error: {e}"
+                        changed = True
+                    current[key] = entry
+            if changed or set(current) != set(entries):
+                tmp = self.path.with_suffix(".tmp")
+                try:
+                    tmp.write_text(json.dumps({"version": CATALOG_VERSION, "models": current}), encoding="utf-8")
+                    os.replace(tmp, self.path)
+                except OSError:
+                    pass  # read-only checkout: keep the catalog in memory only
+            self._entries = current
+            return current
+
+    def by_category(self, category: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Catalog entries grouped by category, without the bookkeeping fields."""
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in self.refresh().values():
+            if category and entry["category"] != category:
+                continue
+            out.setdefault(entry["category"], []).append(
+                {k: v for k, v in entry.items() if k not in ("category", "source")}
+            )
+        return out
+
+
+# -----------------------
+# Structural similarity
+# -----------------------
+_COMMENT_RE = re.compile(r"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>", re.S)
+_TAG_RE = re.compile(r"<(/?)([A-Za-z_][\w.-]*)([^<>]*)>?")
+_ATTR_RE = re.compile(r"([A-Za-z_][\w.-]*)\s*=\s*(\"[^\"]*\"|'[^']*')")
+# attribute values that change what a model is, not just its parameters
+_KEY_ATTRIBUTES = {("Lattice", "class"), ("CellType", "class")}
+
+
+def structure_features(xml_text: str) -> Set[str]:
+    """
+    Tag paths ("CellTypes/CellType/VolumeConstraint"), attribute names
+    ("...VolumeConstraint@target") and bare plugin names of a MorpheusML
+    document. Tags are tokenised with a regex and a stack rather than an XML
+    parser, so a draft that does not parse still gets a sketch.
+    """
+    features: Set[str] = set()
+    tags: List[str] = []
+    paths: List[str] = []       # paths[i] is the path of tags[i], root excluded
+    skip_depth = None           # inside <Description>
+    for closing, tag, attrs in _TAG_RE.findall(_COMMENT_RE.sub("", xml_text)):
+        if closing:
+            if tag in tags:
+                del tags[len(tags) - 1 - tags[::-1].index(tag):]
+                del paths[len(tags):]
+                if skip_depth is not None and len(tags) <= skip_depth:
+                    skip_depth = None
+            continue
+        self_closing = attrs.endswith("/")
+        if not tags:
+            path = "" if tag == "MorpheusModel" else tag
+        else:
+            path = f"{paths[-1]}/{tag}" if paths[-1] else tag
+            if skip_depth is None and tag == "Description" and len(tags) == 1:
+                skip_depth = 1
+            if skip_depth is None:
+                features.add(path)
+                features.add("plugin:" + tag)
+                if "=" in attrs:
+                    for name, value in _ATTR_RE.findall(attrs):
+                        features.add(f"{path}@{name}")
+                        if (tag, name) in _KEY_ATTRIBUTES:
+                            features.add(f"{tag}@{name}={value[1:-1]}")
+        if not self_closing:
+            tags.append(tag)
+            paths.append(path)
+    return features
+
+
+def _permutations(n: int = MINHASH_PERMUTATIONS) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(MINHASH_SEED)
+    a = rng.integers(0, 1 << 63, size=n, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=n, dtype=np.uint64)
+    return a, b
+
+
+_PERM_A, _PERM_B = _permutations()
+
+
+def minhash(features: Set[str]) -> np.ndarray:
+    """MINHASH_PERMUTATIONS-long MinHash signature of a feature set."""
+    if not features:
+        return np.full(MINHASH_PERMUTATIONS, 1 << 32, dtype=np.uint64)
+    hashes = np.fromiter(
+        (zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint64, count=len(features)
+    )
+    # multiply-add-shift hashing: (a*x + b) mod 2^64, top 32 bits
+    with np.errstate(over="ignore"):
+        mixed = np.outer(_PERM_A, hashes) + _PERM_B[:, None]
+    return (mixed >> np.uint64(32)).min(axis=1)
+
+
+def _band_keys(signature: np.ndarray) -> List[int]:
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    return [hash((band, signature[band * rows:(band + 1) * rows].tobytes())) for band in range(LSH_BANDS)]
+
+
+def _repository_models(repository: SectionedDocument) -> List[Tuple[str, str]]:
+    """(section title, XML text) of each embedded *.xml file in model_repository.txt."""
+    models = []
+    for sec in repository.outline(max_level=2):
+        title = sec["section"].rsplit(" > ", 1)[-1]
+        if not title.startswith("File: ") or not title.endswith(".xml"):
+            continue
+        text = repository.read(sec["section"], max_chars=10 ** 9)["content"]
+        start = text.find("<MorpheusModel")
+        end = text.rfind("</MorpheusModel>")
+        if start >= 0 and end > start:
+            models.append((title[len("File: "):], text[start:end + len("</MorpheusModel>")]))
+    return models
+
+
+class StructureIndex:
+    """
+    MinHash/LSH index over the example XMLs of `categories` and the XML
+    entries of the `repository` document, persisted to `path` and rebuilt
+    when any of those files changes.
+    """
+
+    def __init__(self, categories: Dict[str, Path], repository: SectionedDocument, path: Path):
+        self.categories = {cat: Path(d) for cat, d in categories.items()}
+        self.repository = repository
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._sources: Optional[List[List[Any]]] = None
+        self._checked_at = 0.0
+        self.entries: List[Dict[str, Any]] = []
+        self.signatures = np.empty((0, MINHASH_PERMUTATIONS), dtype=np.uint64)
+        self.buckets: Dict[int, List[int]] = {}
+
+    def _source_files(self) -> List[Path]:
+        files = [p for d in self.categories.values() if d.is_dir() for p in sorted(d.glob("*.xml"))]
+        if self.repository.path.exists():
+            files.append(self.repository.path)
+        return files
+
+    def _build(self) -> Tuple[List[Dict[str, Any]], List[List[int]]]:
+        entries, signatures = [], []
+        for cat, folder in self.categories.items():
+            for xml_path in sorted(folder.glob("*.xml")) if folder.is_dir() else []:
+                text = xml_path.read_text(encoding="utf-8", errors="ignore")
+                entries.append({"source": "references", "category": cat, "name": xml_path.name})
+                signatures.append(minhash(structure_features(text)).tolist())
+        if self.repository.path.exists():
+            for name, text in _repository_models(self.repository):
+                entries.append({"source": "model_repository", "name": name})
+                signatures.append(minhash(structure_features(text)).tolist())
+        return entries, signatures
+
+    def ensure_loaded(self) -> None:
+        """Load or rebuild the index; the files are re-checked at most every STRUCTURE_CHECK_SECONDS."""
+        with self._lock:
+            now = time.monotonic()
+            if self._sources is not None and now - self._checked_at < STRUCTURE_CHECK_SECONDS:
+                return
+            self._checked_at = now
+            sources = []
+            for path in self._source_files():
+                st = path.stat()
+                sources.append([str(path), st.st_size, st.st_mtime_ns])
+            if sources == self._sources:
+                return
+            saved = None
+            try:
+                saved = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                pass
+            if (not saved or saved.get("version") != STRUCTURE_INDEX_VERSION
+                    or saved.get("permutations") != MINHASH_PERMUTATIONS
+                    or saved.get("sources") != sources):
+                entries, signatures = self._build()
+                saved = {
+                    "version": STRUCTURE_INDEX_VERSION,
+                    "permutations": MINHASH_PERMUTATIONS,
+                    "sources": sources,
+                    "entries": entries,
+                    "signatures": signatures,
+                }
+                tmp = self.path.with_suffix(".tmp")
+                try:
+                    tmp.write_text(json.dumps(saved), encoding="utf-8")
+                    os.replace(tmp, self.path)
+                except OSError:
+                    pass  # read-only checkout: keep the index in memory only
+            self.entries = saved["entries"]
+            self.signatures = np.array(saved["signatures"], dtype=np.uint64).reshape(-1, MINHASH_PERMUTATIONS)
+            self.buckets = {}
+            for i, signature in enumerate(self.signatures):
+                for key in _band_keys(signature):
+                    self.buckets.setdefault(key, []).append(i)
+            self._sources = sources
+
+    def query(self, xml_text: str, k: int = 5) -> Dict[str, Any]:
+        """
+        The k reference models most similar in structure to `xml_text`, by
+        estimated Jaccard similarity of their feature sets. Every model is
+        scored (one vectorized comparison), so the ranking is by similarity
+        alone; "lsh_candidate" marks the hits that share an LSH band with the
+        query. Entries with identical sketches (the same model in references/
+        and in model_repository.txt) are reported once. elapsed_ms covers the
+        whole call, including loading or rebuilding the index.
+        """
+        started = time.perf_counter()
+        self.ensure_loaded()
+        features = structure_features(xml_text)
+        if not features:
+            raise ReferenceLookupError("No MorpheusML elements found in the given XML")
+        signature = minhash(features)
+        candidates = {i for key in _band_keys(signature) for i in self.buckets.get(key, [])}
+        similarity = (self.signatures == signature).mean(axis=1)
+        order = np.argsort(-similarity, kind="stable").tolist()
+        results: List[Dict[str, Any]] = []
+        seen: Dict[bytes, Dict[str, Any]] = {}
+        for i in order:
+            key = self.signatures[i].tobytes()
+            if key in seen:
+                seen[key].setdefault("duplicates", []).append(self.entries[i])
+                continue
+            if len(results) >= k:
+                continue
+            hit = dict(self.entries[i], similarity=round(float(similarity[i]), 4), lsh_candidate=i in candidates)
+            seen[key] = hit
+            results.append(hit)
+        return {
+            "features": len(features),
+            "results": results,
+            "models_indexed": len(self.entries),
+            "lsh_candidates": len(candidates),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
@@ -0,0 +1,239 @@
+"""
+Model variant helpers: expand a grid / sample list into variants of a
+MorpheusML model, build downscaled smoke-test copies and pull summary metrics
+out of the variants' logger output.
+
+Parameters are addressed in one of two ways:
+  - a symbol name, e.g. "v0": sets value="..." on every
+    <Constant>/<Variable>/<Property> (and *Vector) declaring that symbol
+  - "path@attribute", e.g. "Time/StopTime@value": an ElementTree path
+    relative to <MorpheusModel> plus the attribute to overwrite
+"""
+
+import itertools
+import math
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from logger_analytics import LoggerError, analyze_logger_file, read_header
+
+
+MAX_SWEEP_VARIANTS = 64
+
+SYMBOL_TAGS = {
+    "Constant",
+    "ConstantVector",
+    "Variable",
+    "VariableVector",
+    "Property",
+    "PropertyVector",
+}
+
+# Per-time aggregates a sweep metric can report ("column:aggregate"), taken
+# at the last logged time point; "count" is the number of rows (cells)
+SWEEP_AGGREGATES = ("mean", "std", "min", "max", "count", "valid")
+DEFAULT_AGGREGATE = "mean"
+
+
+class SweepError(ValueError):
+    pass
+
+
+def expand_variants(
+    grid: Optional[Dict[str, List[Any]]] = None,
+    samples: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """Cartesian product of `grid`, or the explicit `samples` list."""
+    if bool(grid) == bool(samples):
+        raise SweepError("Provide exactly one of `grid` (name -> list of values) or `samples` (list of dicts)")
+
+    if grid:
+        names = list(grid)
+        for name in names:
+            if not isinstance(grid[name], list) or not grid[name]:
+                raise SweepError(f"Grid entry '{name}' must be a non-empty list of values")
+        count = 1
+        for name in names:
+            count *= len(grid[name])
+        if count > MAX_SWEEP_VARIANTS:
+            raise SweepError(f"Grid expands to {count} variants (limit {MAX_SWEEP_VARIANTS})")
+        return [dict(zip(names, combo)) for combo in itertools.product(*(grid[n] for n in names))]
+
+    if len(samples) > MAX_SWEEP_VARIANTS:
+        raise SweepError(f"{len(samples)} samples given (limit {MAX_SWEEP_VARIANTS})")
+    for i, sample in enumerate(samples):
+        if not isinstance(sample, dict) or not sample:
+            raise SweepError(f"Sample {i} must be a non-empty dict of parameter -> value")
+    return [dict(s) for s in samples]
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_format_value(v) for v in value)
+    return str(value)
+
+
+def _targets(root: ET.Element, param: str) -> Tuple[List[ET.Element], str]:
+    if "@" in param:
+        path, attr = param.rsplit("@", 1)
+        path = path.strip("/")
+        if path.startswith(root.tag + "/"):
+            path = path[len(root.tag) + 1:]
+        try:
+            elements = [root] if path in ("", root.tag, ".") else root.findall(path)
+        except (SyntaxError, TypeError) as e:
+            # ElementPath reports malformed paths ("a[@x", "//a") this way
+            raise SweepError(
+                f"Invalid element path '{path}' in parameter '{param}'; use 'Path/To/Element@attribute'"
+            ) from e
+        return elements, attr
+    elements = [el for el in root.iter() if el.tag in SYMBOL_TAGS and el.get("symbol") == param]
+    return elements, "value"
+
+
+def load_model(xml_path: Path) -> ET.ElementTree:
+    """Parse model.xml keeping comments, so written variants stay readable."""
+    parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+    try:
+        return ET.parse(str(xml_path), parser=parser)
+    except ET.ParseError as e:
+        raise SweepError(f"model.xml does not parse: {e}") from e
+
+
+def validate_params(tree: ET.ElementTree, params: List[str]) -> None:
+    """Fail fast if a parameter does not address anything in the model."""
+    root = tree.getroot()
+    missing = [p for p in params if not _targets(root, p)[0]]
+    if missing:
+        raise SweepError(
+            f"Parameter(s) not found in model.xml: {missing}. "
+            "Use a declared symbol name or 'Path/To/Element@attribute'."
+        )
+
+
+def write_variant(tree: ET.ElementTree, overrides: Dict[str, Any], out_path: Path) -> None:
+    """Write a copy of `tree` with `overrides` applied to `out_path`."""
+    variant = ET.ElementTree(ET.fromstring(ET.tostring(tree.getroot())))
+    root = variant.getroot()
+    for param, value in overrides.items():
+        elements, attr = _targets(root, param)
+        for el in elements:
+            el.set(attr, _format_value(value))
+    variant.write(str(out_path), encoding="UTF-8", xml_declaration=True)
+
+
+def _format_number(x: float) -> str:
+    return f"{x:.6g}"
+
+
+def downscale_model(tree: ET.ElementTree, fraction: float, frames: int) -> Dict[str, Any]:
+    """
+    Shorten the simulation to `fraction` of its StopTime span and clamp
+    every time-step under <Analysis> (Gnuplotter, Logger, plots) so about
+    `frames` outputs are produced: finer steps are coarsened, steps longer
+    than the shortened span are cut so outputs are still exercised.
+    Modifies `tree` in place.
+    """
+    if not 0 < fraction <= 1:
+        raise SweepError("fraction must be in (0, 1]")
+
+    root = tree.getroot()
+    stop_el = root.find("Time/StopTime")
+    start_el = root.find("Time/StartTime")
+    try:
+        stop_time = float(stop_el.get("value"))
+    except (AttributeError, TypeError, ValueError):
+        raise SweepError("model.xml has no numeric <Time><StopTime value=...> to scale")
+    try:
+        start_time = float(start_el.get("value")) if start_el is not None else 0.0
+    except (TypeError, ValueError):
+        start_time = 0.0
+
+    smoke_stop = start_time + (stop_time - start_time) * fraction
+    stop_el.set("value", _format_number(smoke_stop))
+
+    span = smoke_stop - start_time
+    target_step = span / max(1, frames)
+    coarsened = []
+    analysis = root.find("Analysis")
+    if analysis is not None and target_step > 0:
+        for el in analysis.iter():
+            step = el.get("time-step")
+            if step is None:
+                continue
+            try:
+                out_of_range = not target_step <= float(step) <= span
+            except ValueError:
+                out_of_range = True
+            if out_of_range:
+                el.set("time-step", _format_number(target_step))
+                coarsened.append({"element": el.tag, "from": step, "to": el.get("time-step")})
+
+    return {
+        "start_time": start_time,
+        "stop_time": stop_time,
+        "smoke_stop_time": smoke_stop,
+        "coarsened_time_steps": coarsened,
+    }
+
+
+# -----------------------
+# Logger metrics
+# -----------------------
+def parse_metric(metric: str) -> Tuple[str, str]:
+    """Split "column" or "column:aggregate" into (column, aggregate)."""
+    column, sep, aggregate = metric.rpartition(":")
+    if not sep:
+        return metric, DEFAULT_AGGREGATE
+    if aggregate not in SWEEP_AGGREGATES:
+        raise SweepError(f"Unknown aggregate '{aggregate}' in metric '{metric}'; use one of {list(SWEEP_AGGREGATES)}")
+    return column, aggregate
+
+
+def metric_key(metric: str) -> str:
+    """Table column of a metric, naming its aggregate, e.g. "cell.volume:mean"."""
+    return "{}:{}".format(*parse_metric(metric))
+
+
+def logger_final_values(run_path: Path, metrics: List[str]) -> Dict[str, Any]:
+    """
+    Aggregate of each requested logger column over the rows of the last
+    logged time point, keyed by metric_key. A metric is "column" (mean) or
+    "column:aggregate" with an aggregate from SWEEP_AGGREGATES. Each column is
+    taken from the first of the run's logger*.csv files that has it, via
+    logger_analytics.analyze_logger_file.
+    """
+    specs = [parse_metric(m) for m in metrics]
+    found: Dict[str, Any] = {f"{column}:{aggregate}": None for column, aggregate in specs}
+    pending = list(dict.fromkeys(column for column, _ in specs))
+
+    for path in sorted(run_path.glob("logger*.csv")):
+        if not pending:
+            break
+        try:
+            _, names, _ = read_header(path)
+            columns = [c for c in pending if c in names]
+            if not columns:
+                continue
+            analysis = analyze_logger_file(path, columns=columns, quantiles=())
+        except (OSError, LoggerError):
+            continue
+        if not len(analysis["times"]):
+            continue
+        for column, aggregate in specs:
+            if column not in columns:
+                continue
+            if aggregate == "count":
+                value = float(analysis["count"][-1])
+            else:
+                value = float(analysis["stats"][column][aggregate][-1])
+            if not math.isfinite(value):
+                value = None
+            elif aggregate in ("count", "valid"):
+                value = int(value)
+            found[f"{column}:{aggregate}"] = value
+        pending = [c for c in pending if c not in columns]
+    return found
@@ -10,6 +10,7 @@
 ║      python run_benchmark.py                                                 ║
 ║      python run_benchmark.py --papers-dir /path/to/papers                    ║
 ║      python run_benchmark.py --max-papers 10                                 ║
+║      python run_benchmark.py --concurrency 3                                 ║
 ║                                                                              ║
 ║  Requirements:                                                               ║
 ║      pip install anthropic pypdf python-dotenv                               ║
@@ -19,8 +20,11 @@
 import os
 import sys
 import json
+import asyncio
 import argparse
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 from datetime import datetime
@@ -66,6 +70,17 @@ MAX_PAPERS = 10
 # Maximum Claude API iterations per paper (safety limit to prevent infinite loops)
 MAX_ITERATIONS_PER_PAPER = 25
 
+# Number of papers processed at the same time (1 = one after another, as before)
+CONCURRENCY = 1
+
+# Shared Claude API budget for all concurrent papers (requests per minute)
+API_REQUESTS_PER_MINUTE = 40
+
+# Run a shortened copy of each model before the full Morpheus run
+# (failures come back in seconds instead of after the full simulation).
+# Off by default so runs match earlier benchmarks; enable with --smoke
+SMOKE_FIRST = False
+
 # -----------------------------------------------------------------------------
 #  SYSTEM PROMPT - EDIT THIS TO CHANGE AGENT BEHAVIOR
 # -----------------------------------------------------------------------------
@@ -388,6 +403,7 @@ try:
         # Execution tools
         run_morpheus,
         run_xml_once,
+        smoke_run,
         
         # Utility tools
         auto_fix_and_rerun,
@@ -413,6 +429,14 @@ except ImportError as e:
 # Tool Definitions for Claude API
 # -----------------------------------------------------------------------------
 
+def _smoke_first_description(default: bool) -> str:
+    """run_morpheus.smoke_first description matching the default execute_tool fills in."""
+    return (
+        "Run a shortened copy first and skip the full run if it fails "
+        f"(default: {'true' if default else 'false; enable with --smoke'})"
+    )
+
+
 TOOLS = [
     {
         "name": "pdf_to_morpheus_pipeline",
@@ -499,11 +523,33 @@ TOOLS = [
                 "run_id": {
                     "type": "string",
                     "description": "Run ID for this paper"
+                },
+                "smoke_first": {
+                    "type": "boolean",
+                    "description": _smoke_first_description(SMOKE_FIRST)
                 }
             },
             "required": ["xml_path"]
         }
     },
+    {
+        "name": "smoke_run",
+        "description": "Quick check of a saved model.xml: runs a copy with StopTime shortened to 1% and coarse outputs. Returns passed/failed with stderr within seconds. Use after each XML fix.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "run_id": {
+                    "type": "string",
+                    "description": "Run ID whose model.xml to check"
+                },
+                "fraction": {
+                    "type": "number",
+                    "description": "Share of the simulated time span to run (default: 0.01)"
+                }
+            },
+            "required": ["run_id"]
+        }
+    },
     {
         "name": "auto_fix_and_rerun",
         "description": "STEP 5 (if needed): Get error details when Morpheus fails. Returns stderr and current XML for fixing.",
@@ -582,6 +628,7 @@ def execute_tool(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
         "read_reference": read_reference,
         "generate_xml_from_text": generate_xml_from_text,
         "run_morpheus": run_morpheus,
+        "smoke_run": smoke_run,
         "auto_fix_and_rerun": auto_fix_and_rerun,
         "evaluation": evaluation,
         "get_run_summary": get_run_summary,
@@ -601,6 +648,8 @@ def execute_tool(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
             filtered_input["max_chars"] = 8000
         if tool_name == "read_file_text" and "max_chars" not in filtered_input:
             filtered_input["max_chars"] = 5000
+        if tool_name == "run_morpheus" and "smoke_first" not in filtered_input:
+            filtered_input["smoke_first"] = SMOKE_FIRST
         
         # Check if model.xml has Gnuplotter BEFORE running Morpheus
         if tool_name == "run_morpheus":
@@ -614,6 +663,9 @@ def execute_tool(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
                     }
         
         result = func(**filtered_input)
+        if asyncio.iscoroutine(result):
+            # Async tools (run_morpheus, smoke_run, ...) await their Morpheus job
+            result = asyncio.run(result)
         return result
     except Exception as e:
         import traceback
@@ -622,6 +674,69 @@ def execute_tool(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
             "error": f"Tool execution failed: {str(e)}",
             "traceback": traceback.format_exc()
         }
+# -----------------------------------------------------------------------------
+# Resource accounting - Morpheus cost per paper
+# -----------------------------------------------------------------------------
+
+def _empty_resources() -> Dict[str, Any]:
+    return {
+        "morpheus_runs": 0,
+        "cached_runs": 0,
+        "wall_seconds": 0.0,
+        "cpu_seconds": 0.0,
+        "peak_rss_bytes": 0,
+        "output_bytes": 0,
+    }
+
+
+def _accumulate_resources(totals: Dict[str, Any], tool_result: Dict[str, Any]):
+    """Add one run_morpheus result (every fix attempt counts) to a paper's totals."""
+    resources = tool_result.get("resources")
+    if not resources:
+        return
+    totals["morpheus_runs"] += 1
+    if tool_result.get("cached"):
+        # Outputs were reused; the simulation cost was paid by an earlier run
+        totals["cached_runs"] += 1
+        return
+    totals["wall_seconds"] = round(totals["wall_seconds"] + (resources.get("wall_seconds") or 0), 3)
+    totals["cpu_seconds"] = round(totals["cpu_seconds"] + (resources.get("cpu_seconds") or 0), 3)
+    totals["peak_rss_bytes"] = max(totals["peak_rss_bytes"], resources.get("peak_rss_bytes") or 0)
+    totals["output_bytes"] += resources.get("output_bytes") or 0
+
+
+# -----------------------------------------------------------------------------
+# Rate Limiter - Shared API budget for concurrent papers
+# -----------------------------------------------------------------------------
+
+class RateLimiter:
+    """
+    Spaces Claude API calls from all worker threads evenly over a
+    requests-per-minute budget. A 429 from any worker pauses everyone.
+    """
+
+    def __init__(self, requests_per_minute: int = API_REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / max(1, requests_per_minute)
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+
+    def acquire(self):
+        """Block until this caller may send the next request."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._blocked_until)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def backoff(self, seconds: float):
+        """Pause all workers for `seconds` (e.g. after a 429)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
 # -----------------------------------------------------------------------------
 # Paper Processor - Handles ONE paper at a time
 # -----------------------------------------------------------------------------
@@ -632,11 +747,12 @@ class PaperProcessor:
     Runs an agentic loop until the paper is complete or max iterations reached.
     """
     
-    def __init__(self, api_key: str, model: str = MODEL_NAME):
+    def __init__(self, api_key: str, model: str = MODEL_NAME, rate_limiter: Optional[RateLimiter] = None):
         self.client = anthropic.Anthropic(api_key=api_key)
         self.model = model
         self.messages: List[Dict[str, Any]] = []
         self.max_iterations = MAX_ITERATIONS_PER_PAPER
+        self.rate_limiter = rate_limiter
         
     def process_paper(self, pdf_path: str, paper_index: int, total_papers: int) -> Dict[str, Any]:
         """
@@ -668,6 +784,7 @@ class PaperProcessor:
             "csv_count": 0,
             "iterations": 0,
             "error": None,
+            "resources": _empty_resources(),
         }
         
         iteration = 0
@@ -684,7 +801,9 @@ class PaperProcessor:
                     self.messages = self.messages[:1] + self.messages[-6:]
                     print(f"    [Truncated conversation to {len(self.messages)} messages]")
                 
-                # Call Claude API
+                # Call Claude API (wait for a slot in the shared budget if concurrent)
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
                 response = self.client.messages.create(
                     model=self.model,
                     max_tokens=8192,
@@ -737,12 +856,17 @@ class PaperProcessor:
                     break
                 
                 # Add delay between iterations to avoid rate limits
-                time.sleep(5)
+                # (the shared rate limiter paces calls in concurrent mode)
+                if not self.rate_limiter:
+                    time.sleep(5)
                     
             except anthropic.APIStatusError as e:
                 if e.status_code == 429:
                     print(f"  ⏳ Rate limit (429). Waiting 90 seconds...")
-                    time.sleep(90)
+                    if self.rate_limiter:
+                        self.rate_limiter.backoff(90)
+                    else:
+                        time.sleep(90)
                     continue  # Retry same iteration
                 print(f"  ✗ API Status Error ({e.status_code}): {e}")
                 result["status"] = "api_error"
@@ -854,6 +978,7 @@ class PaperProcessor:
                     print(f"    ← run_id: {result['run_id']}")
                     
                 elif tool_name == "run_morpheus":
+                    _accumulate_resources(result["resources"], tool_result)
                     if tool_result.get("ok"):
                         outputs = tool_result.get("outputs", {})
                         result["png_count"] = len(outputs.get("png", []))
@@ -909,14 +1034,25 @@ class PaperProcessor:
 class BenchmarkRunner:
     """
     Runs the complete benchmark on multiple papers.
-    Processes papers ONE AT A TIME, collecting results.
+    Processes papers ONE AT A TIME by default; with concurrency > 1 a pool
+    of workers drives several PaperProcessors sharing one API budget.
     """
     
-    def __init__(self, api_key: str, papers_dir: str, max_papers: int = MAX_PAPERS, model: str = MODEL_NAME):
+    def __init__(
+        self,
+        api_key: str,
+        papers_dir: str,
+        max_papers: int = MAX_PAPERS,
+        model: str = MODEL_NAME,
+        concurrency: int = CONCURRENCY,
+        requests_per_minute: int = API_REQUESTS_PER_MINUTE,
+    ):
         self.api_key = api_key
         self.papers_dir = Path(papers_dir).expanduser()
         self.max_papers = max_papers
         self.model = model
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = RateLimiter(requests_per_minute) if self.concurrency > 1 else None
         self.results: List[Dict[str, Any]] = []
         
     def discover_papers(self) -> List[Path]:
@@ -941,6 +1077,7 @@ class BenchmarkRunner:
         print(f"  Model: {self.model}")
         print(f"  Max papers: {self.max_papers}")
         print(f"  Max iterations per paper: {MAX_ITERATIONS_PER_PAPER}")
+        print(f"  Concurrency: {self.concurrency}")
         print("═"*70)
         
         # Discover papers
@@ -954,29 +1091,10 @@ class BenchmarkRunner:
         for i, p in enumerate(papers, 1):
             print(f"    {i}. {p.name}")
         
-        # Process each paper ONE AT A TIME
-        for i, pdf_path in enumerate(papers, 1):
-            print(f"\n\n{'#'*70}")
-            print(f"#  STARTING PAPER {i} OF {len(papers)}")
-            print(f"{'#'*70}")
-            
-            # Create a fresh processor for each paper
-            processor = PaperProcessor(api_key=self.api_key, model=self.model)
-            
-            # Process this paper completely
-            result = processor.process_paper(
-                pdf_path=str(pdf_path),
-                paper_index=i,
-                total_papers=len(papers)
-            )
-            
-            # Save result
-            self.results.append(result)
-            
-            # Brief pause between papers to avoid rate limits
-            if i < len(papers):
-                print(f"\n  ⏳ Waiting 60 seconds before next paper...")
-                time.sleep(60)
+        if self.concurrency > 1:
+            self._run_concurrent(papers)
+        else:
+            self._run_sequential(papers)
         
         # Calculate summary statistics
         end_time = datetime.now()
@@ -986,6 +1104,7 @@ class BenchmarkRunner:
         scores = [r["score"] for r in self.results if r["score"] is not None]
         total_pngs = sum(r["png_count"] for r in self.results)
         total_csvs = sum(r["csv_count"] for r in self.results)
+        per_paper = [r.get("resources") or _empty_resources() for r in self.results]
         
         summary = {
             "status": "completed",
@@ -1004,6 +1123,20 @@ class BenchmarkRunner:
                 "max": max(scores) if scores else 0,
                 "all": scores,
             },
+            "resources": {
+                "morpheus_runs": sum(x["morpheus_runs"] for x in per_paper),
+                "cached_runs": sum(x["cached_runs"] for x in per_paper),
+                "total_wall_seconds": round(sum(x["wall_seconds"] for x in per_paper), 2),
+                "total_cpu_seconds": round(sum(x["cpu_seconds"] for x in per_paper), 2),
+                "max_peak_rss_bytes": max((x["peak_rss_bytes"] for x in per_paper), default=0),
+                "total_output_bytes": sum(x["output_bytes"] for x in per_paper),
+                "most_expensive": [
+                    {"paper": r["paper"], "cpu_seconds": x["cpu_seconds"], "wall_seconds": x["wall_seconds"]}
+                    for r, x in sorted(
+                        zip(self.results, per_paper), key=lambda rx: rx[1]["cpu_seconds"], reverse=True
+                    )[:3]
+                ],
+            },
             "results": self.results,
         }
         
@@ -1018,6 +1151,82 @@ class BenchmarkRunner:
         
         return summary
     
+    def _run_sequential(self, papers: List[Path]):
+        """Process each paper ONE AT A TIME."""
+        for i, pdf_path in enumerate(papers, 1):
+            print(f"\n\n{'#'*70}")
+            print(f"#  STARTING PAPER {i} OF {len(papers)}")
+            print(f"{'#'*70}")
+            
+            # Create a fresh processor for each paper
+            processor = PaperProcessor(api_key=self.api_key, model=self.model)
+            
+            # Process this paper completely
+            result = processor.process_paper(
+                pdf_path=str(pdf_path),
+                paper_index=i,
+                total_papers=len(papers)
+            )
+            
+            # Save result
+            self.results.append(result)
+            
+            # Brief pause between papers to avoid rate limits
+            if i < len(papers):
+                print(f"\n  ⏳ Waiting 60 seconds before next paper...")
+                time.sleep(60)
+
+    def _run_concurrent(self, papers: List[Path]):
+        """
+        Process up to `concurrency` papers at once. Every paper gets its own
+        PaperProcessor (and therefore its own conversation and run folder);
+        API calls from all workers go through the shared rate limiter.
+        Results are stored in paper order so the summary matches a sequential run.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(papers)
+
+        def work(i: int, pdf_path: Path) -> Dict[str, Any]:
+            print(f"\n  ▶ Worker starting paper {i} of {len(papers)}: {pdf_path.name}")
+            processor = PaperProcessor(
+                api_key=self.api_key,
+                model=self.model,
+                rate_limiter=self.rate_limiter,
+            )
+            return processor.process_paper(
+                pdf_path=str(pdf_path),
+                paper_index=i,
+                total_papers=len(papers)
+            )
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="paper") as pool:
+            futures = {
+                pool.submit(work, i, pdf_path): (i, pdf_path)
+                for i, pdf_path in enumerate(papers, 1)
+            }
+            for future in as_completed(futures):
+                i, pdf_path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"  ✗ Paper {pdf_path.name} crashed: {e}")
+                    result = {
+                        "paper": pdf_path.name,
+                        "pdf_path": str(pdf_path),
+                        "status": "error",
+                        "run_id": None,
+                        "score": None,
+                        "max_score": 7,
+                        "png_count": 0,
+                        "csv_count": 0,
+                        "iterations": 0,
+                        "error": str(e),
+                        "resources": _empty_resources(),
+                    }
+                results[i - 1] = result
+                print(f"\n  ■ Finished paper {i} of {len(papers)}: {pdf_path.name} ({result['status']})")
+
+        self.results.extend(results)
+
     def _print_summary(self, summary: Dict):
         """Print a formatted summary of the benchmark results."""
         print("\n\n" + "═"*70)
@@ -1030,6 +1239,10 @@ class BenchmarkRunner:
         print(f"  Total CSVs generated: {summary['total_csvs_generated']}")
         print(f"  Average score: {summary['scores']['average']}/7")
         print(f"  Duration: {summary['duration_formatted']}")
+        res = summary["resources"]
+        print(f"  Morpheus runs: {res['morpheus_runs']} ({res['cached_runs']} cached), "
+              f"wall {res['total_wall_seconds']}s, CPU {res['total_cpu_seconds']}s, "
+              f"peak RSS {res['max_peak_rss_bytes'] / 2**20:.0f} MiB")
         print("═"*70)
         
         print("\n  Individual Results:")
@@ -1063,6 +1276,7 @@ Examples:
   python run_benchmark.py --papers-dir /path/to/papers
   python run_benchmark.py --max-papers 5
   python run_benchmark.py --model claude-opus-4-20250514
+  python run_benchmark.py --concurrency 3 --api-rpm 40
         """
     )
     parser.add_argument(
@@ -1083,6 +1297,32 @@ Examples:
         default=MODEL_NAME,
         help=f"Claude model to use (default: {MODEL_NAME})"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=CONCURRENCY,
+        help=f"Number of papers to process in parallel (default: {CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--api-rpm",
+        type=int,
+        default=API_REQUESTS_PER_MINUTE,
+        help=f"Shared Claude API requests per minute when concurrency > 1 (default: {API_REQUESTS_PER_MINUTE})"
+    )
+    smoke = parser.add_mutually_exclusive_group()
+    smoke.add_argument(
+        "--smoke",
+        dest="smoke_first",
+        action="store_true",
+        default=None,
+        help="Smoke-run a shortened copy of each model before the full Morpheus run"
+    )
+    smoke.add_argument(
+        "--no-smoke",
+        dest="smoke_first",
+        action="store_false",
+        help="Start full Morpheus runs directly, without a smoke run (default)"
+    )
     parser.add_argument(
         "--api-key",
         type=str,
@@ -1110,6 +1350,14 @@ Examples:
         print("\n" + "="*70)
         sys.exit(1)
     
+    if args.smoke_first is not None:
+        global SMOKE_FIRST
+        SMOKE_FIRST = args.smoke_first
+        # Keep the tool schema in step with the default execute_tool applies
+        for tool in TOOLS:
+            if tool["name"] == "run_morpheus":
+                tool["input_schema"]["properties"]["smoke_first"]["description"] = _smoke_first_description(SMOKE_FIRST)
+
     # Use model from CLI args (defaults to MODEL_NAME from config)
     model_to_use = args.model
     
@@ -1133,7 +1381,9 @@ Examples:
         api_key=api_key,
         papers_dir=args.papers_dir,
         max_papers=args.max_papers,
-        model=model_to_use
+        model=model_to_use,
+        concurrency=args.concurrency,
+        requests_per_minute=args.api_rpm,
     )
     
     try:
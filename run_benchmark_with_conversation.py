@@ -19,6 +19,7 @@
 import os
 import sys
 import json
+import asyncio
 import argparse
 import time
 from pathlib import Path
@@ -614,6 +615,9 @@ def execute_tool(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
                     }
         
         result = func(**filtered_input)
+        if asyncio.iscoroutine(result):
+            # Async tools (run_morpheus, smoke_run, ...) await their Morpheus job
+            result = asyncio.run(result)
         return result
     except Exception as e:
         import traceback
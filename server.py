@@ -3,18 +3,57 @@ print("Using Python:", sys.executable, file=sys.stderr)
 
 import os
 import re
+import asyncio
 import json
 import uuid
+import csv
 import shutil
 import subprocess
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List
 from pypdf import PdfReader
 
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 
+from morpheus_jobs import (
+    CoreScheduler,
+    JobManager,
+    JobState,
+    MorpheusJob,
+    ProgressTracker,
+    WatchdogPolicy,
+)
+from morpheus_compare import compare_run_dirs
+from morpheus_gnuplot import digest_gnuplot_logs
+from morpheus_eval import evaluate_and_report, evaluate_many, extract_time_setting, write_summary_table
+from logger_analytics import DEFAULT_QUANTILES, LoggerError, analyze_logger_file, read_header, summarize_for_json
+from morpheus_cache import CACHE_DIR_NAME, ResultCache, detach_hardlinks, snapshot_dir
+from morpheus_plots import POSTHOC_PLAN_FILE, PlotError, plan_plot_mode, render_posthoc_plots, write_plan
+from morpheus_references import (
+    CATALOG_FILE,
+    MAX_SEARCH_RESULTS,
+    STRUCTURE_INDEX_FILE,
+    ReferenceCache,
+    ReferenceCatalog,
+    ReferenceIndex,
+    ReferenceLookupError,
+    SectionedDocument,
+    StructureIndex,
+)
+from morpheus_sweep import (
+    SweepError,
+    downscale_model,
+    expand_variants,
+    load_model,
+    logger_final_values,
+    metric_key,
+    validate_params,
+    write_variant,
+)
+
 load_dotenv()
 
 # -----------------------
@@ -23,6 +62,10 @@ load_dotenv()
 RUNS_ROOT = Path(os.getenv("MORPHEUS_RUNS_DIR", "/Users/prerana/Desktop/morpheus")).expanduser()
 RUNS_ROOT.mkdir(parents=True, exist_ok=True)
 
+# Saved result trees that run folder paths may also point into
+# (compare_runs, render_plots, similar_references)
+RESULT_FOLDERS = (Path(__file__).parent / "morpheus_results", Path(__file__).parent / "results")
+
 # If Morpheus isn't in PATH, set MORPHEUS_BIN in env:
 # /Applications/Morpheus.app/Contents/MacOS/morpheus-cli
 MORPHEUS_BIN = os.getenv("MORPHEUS_BIN", "/Applications/Morpheus.app/Contents/MacOS/morpheus")
@@ -30,6 +73,31 @@ MORPHEUS_BIN = os.getenv("MORPHEUS_BIN", "/Applications/Morpheus.app/Contents/Ma
 MAX_STDOUT_CHARS = 20000
 MAX_STDERR_CHARS = 20000
 
+# Morpheus runs kept per run folder in metadata.json
+MAX_RUN_HISTORY = 20
+
+# get_run_progress trackers kept for runs without a job (least recently used dropped)
+MAX_RUN_PROGRESS_TRACKERS = 64
+
+MORPHEUS_TIMEOUT = 600  # 10 min hard cap per simulation
+
+# Smoke runs: a shortened copy of the model checked before the full run
+SMOKE_FRACTION = 0.01   # share of the StartTime..StopTime span to simulate
+SMOKE_FRAMES = 3        # roughly how many Gnuplotter/Logger outputs to keep
+SMOKE_TIMEOUT = 60
+
+# OpenMP threads (= pinned cores) per Morpheus process; jobs queue when cores run out
+MORPHEUS_THREADS_PER_JOB = int(os.getenv("MORPHEUS_THREADS_PER_JOB", "4"))
+
+# Finished runs are cached by canonical model.xml + Morpheus binary
+RESULT_CACHE_MAX_BYTES = int(os.getenv("MORPHEUS_RESULT_CACHE_BYTES", str(5 * 1024**3)))
+
+# logger.csv is parsed in blocks of this size; peak memory is roughly 20x this
+LOGGER_CHUNK_BYTES = int(os.getenv("MORPHEUS_LOGGER_CHUNK_BYTES", str(4 * 1024**2)))
+
+# Processes drawing plots="posthoc" plots after a run (0 = all cores)
+POSTHOC_PLOT_WORKERS = int(os.getenv("MORPHEUS_POSTHOC_PLOT_WORKERS", "0"))
+
 mcp = FastMCP(
     name="morpheus-mcp",
     host="0.0.0.0",
@@ -50,6 +118,34 @@ REFERENCE_CATEGORIES = {
     "Miscellaneous": REFERENCES_ROOT / "Miscellaneous",
 }
 
+# BM25 index over references/*.txt and the example XMLs, persisted as
+# references/.search_index.json and rebuilt when a reference file changes.
+REFERENCE_INDEX = ReferenceIndex(REFERENCES_ROOT)
+
+# Consolidated documents served by section (read_reference_section); the
+# heading table is cached next to each file as .<name>.sections.json.
+SECTIONED_DOCS = {
+    "model_repository": SectionedDocument(REFERENCES_ROOT / "model_repository.txt"),
+    "morpheusml_doc": SectionedDocument(REFERENCES_ROOT / "morpheusml_doc.txt"),
+}
+
+# In-memory LRU of reference file contents and category listings used by
+# list_references / read_reference / suggest_references; entries are checked
+# against the file's mtime on every hit.
+REFERENCE_CACHE = ReferenceCache()
+
+# Structural summary of every example XML, returned by list_references and
+# persisted as references/.catalog.json.
+REFERENCE_CATALOG = ReferenceCatalog(REFERENCE_CATEGORIES, REFERENCES_ROOT / CATALOG_FILE)
+
+# MinHash/LSH sketches of the example XMLs and the model_repository.txt XMLs
+# for similar_references, persisted as references/.structure_index.json.
+STRUCTURE_INDEX = StructureIndex(
+    REFERENCE_CATEGORIES,
+    SECTIONED_DOCS["model_repository"],
+    REFERENCES_ROOT / STRUCTURE_INDEX_FILE,
+)
+
 # -----------------------
 # Helpers
 # -----------------------
@@ -77,8 +173,9 @@ def _write_text(path: Path, text: str) -> None:
 def _read_text(path: Path, limit: int = 20000) -> str:
     if not path.exists():
         return ""
-    txt = path.read_text(encoding="utf-8", errors="ignore")
-    return txt[:limit]
+    # Read only what is returned; logs of long runs can be very large
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read(limit)
 
 def _sanitize_xml(xml: str) -> str:
     # remove common markdown fences if agent accidentally includes them
@@ -164,7 +261,27 @@ def _write_metadata(run_id: str, data: Dict[str, Any]) -> None:
         existing = {}
 
     existing.update(data)
-    meta_path.write_text(json.dumps(existing, indent=2))
+    # Replace rather than rewrite in place, so a metadata.json still
+    # hardlinked to another run or the result cache is never written through
+    tmp_path = run_path / "metadata.json.tmp"
+    tmp_path.write_text(json.dumps(existing, indent=2))
+    os.replace(tmp_path, meta_path)
+
+def _read_metadata(run_id: str) -> Dict[str, Any]:
+    meta_path = RUNS_ROOT / run_id / "metadata.json"
+    try:
+        return json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def _record_morpheus_run(run_id: str, entry: Dict[str, Any]) -> None:
+    """Store the latest Morpheus run (with resource usage) and a short history in metadata.json."""
+    history = _read_metadata(run_id).get("morpheus_run_history", [])
+    history.append(entry)
+    _write_metadata(run_id, {
+        "morpheus_run": entry,
+        "morpheus_run_history": history[-MAX_RUN_HISTORY:],
+    })
 
 # Helper functions for evaluation tool
 
@@ -174,177 +291,380 @@ def _write_metadata(run_id: str, data: Dict[str, Any]) -> None:
 #    return Path(f"/path/to/runs/{run_id}")
 
 
-def _count_xml_errors(run_path: Path) -> int:
+def _extract_stop_time(xml_path: Path) -> Optional[float]:
     """
-    Count the number of errors in model.xml.err file.
-    Returns 0 if file doesn't exist or is empty.
+    Extract StopTime value from model.xml.
+    Returns None if not found.
     """
-    err_path = run_path / "model.xml.err"
-    
-    if not err_path.exists():
-        return 0
-    
-    err_text = err_path.read_text(errors="ignore").strip()
-    
-    if not err_text:
-        return 0
-    
-    # Count error lines - each non-empty line is considered an error
-    # You can adjust this logic based on actual error format
-    error_lines = [line for line in err_text.split('\n') if line.strip()]
-    
-    # Also count specific error patterns
-    error_patterns = [
-        r'\[ERROR\]',
-        r'\[FATAL\]',
-        r'Error:',
-        r'error:',
-        r'Exception',
-    ]
-    
-    error_count = 0
-    for line in error_lines:
-        for pattern in error_patterns:
-            if re.search(pattern, line):
-                error_count += 1
-                break
-        else:
-            # If no specific pattern matched but line exists, still count it
-            if line.strip():
-                error_count += 1
-    
-    return error_count if error_count > 0 else len(error_lines)
+    return _extract_time_setting(xml_path, "StopTime")
 
 
-def _check_model_graph(run_path: Path) -> Tuple[bool, List[str]]:
+def _extract_start_time(xml_path: Path) -> Optional[float]:
     """
-    Check if model_graph.dot file exists in the run directory.
-    Returns (exists: bool, list of found files).
+    Extract StartTime value from model.xml.
+    Returns None if not found.
     """
-    graph_files = list(run_path.rglob("model_graph.dot"))
-    has_graph = len(graph_files) > 0
-    return has_graph, [str(p.name) for p in graph_files]
+    return _extract_time_setting(xml_path, "StartTime")
+
+
+def _extract_time_setting(xml_path: Path, tag: str) -> Optional[float]:
+    return extract_time_setting(xml_path, tag)
 
 
-def _count_time_lines(out_path: Path) -> Tuple[int, List[float]]:
+def _list_outputs(run_path: Path) -> Dict[str, List[str]]:
     """
-    Count lines starting with "Time: " in model.xml.out AFTER "model is up".
-    Returns (count, list of time values).
-    
-    The structure has 101 lines for a complete run:
-    - Start Time: <0.0>
-    - End Time: <StopTime>
-    - 100 intervals = 101 lines starting with "Time: "
+    List output files (png, csv) in the run directory.
+    Returns dict with file types as keys and list of filenames as values.
     """
-    if not out_path.exists():
-        return 0, []
-    
-    out_text = out_path.read_text(errors="ignore")
-    lines = out_text.split('\n')
-    
-    # Find "model is up" marker to start counting after simulation begins
-    model_up_index = -1
-    for i, line in enumerate(lines):
-        if "model is up" in line.lower():
-            model_up_index = i
-            break
-    
-    # Extract time values from lines after "model is up"
-    time_values = []
-    time_pattern = re.compile(r'^Time:\s*<?([\d.eE+-]+)>?', re.IGNORECASE)
-    
-    start_index = model_up_index + 1 if model_up_index >= 0 else 0
+    outputs = {
+        "png": [],
+        "csv": [],
+        "other": []
+    }
     
-    for line in lines[start_index:]:
-        match = time_pattern.match(line.strip())
-        if match:
-            try:
-                time_val = float(match.group(1))
-                time_values.append(time_val)
-            except ValueError:
-                continue
+    for ext, key in [(".png", "png"), (".csv", "csv")]:
+        files = list(run_path.rglob(f"*{ext}"))
+        outputs[key] = [str(f.name) for f in files]
     
-    return len(time_values), time_values
+    return outputs
 
 
-def _calculate_time_score(time_line_count: int) -> int:
+# -----------------------
+# Morpheus job helpers
+# -----------------------
+def _prepare_morpheus_run(xml_path: str, run_id: Optional[str]) -> Dict[str, Any]:
     """
-    Calculate score based on number of Time: lines.
-    
-    Scoring:
-    - ==0:   score +0
-    - ==1:   score +1
-    - >1 and <101: score +2
-    - ==101: score +3
-    """
-    if time_line_count == 0:
-        return 0
-    elif time_line_count == 1:
-        return 1
-    elif time_line_count > 1 and time_line_count < 101:
-        return 2
-    elif time_line_count >= 101:
-        return 3
-    else:
-        return 0
+    Resolve the run folder, make sure model.xml lives inside it and
+    build the Morpheus command line.
+    """
+    xml_file = Path(xml_path).expanduser()
+    if not xml_file.exists():
+        return {"ok": False, "error": f"XML file not found: {xml_path}"}
 
+    # Infer run_id safely
+    if run_id is None:
+        run_id = xml_file.parent.name
 
-def _extract_stop_time(xml_path: Path) -> Optional[float]:
+    run_path = _run_dir(run_id)
+
+    # Ensure model.xml is inside run folder
+    run_xml = run_path / "model.xml"
+    if xml_file.resolve() != run_xml.resolve():
+        shutil.copy2(xml_file, run_xml)
+
+    # ABSOLUTE CLI PATH REQUIRED
+    cmd = [
+        MORPHEUS_BIN,
+        "--file",
+        run_xml.name,
+        "--outdir",
+        str(run_path),
+    #    "--model-graph",
+    #    "dot"
+    ]
+
+    return {
+        "ok": True,
+        "run_id": run_id,
+        "run_path": run_path,
+        "run_xml": run_xml,
+        "cmd": cmd,
+    }
+
+
+def _apply_plot_mode(prepared: Dict[str, Any], plots: str) -> Dict[str, Any]:
     """
-    Extract StopTime value from model.xml.
-    Returns None if not found.
+    For plots="thin"/"posthoc", write the rewritten model next to model.xml
+    (which stays as submitted) and run that one instead; the plots moved off
+    the simulation loop are recorded in posthoc_plots.json.
     """
-    if not xml_path.exists():
+    run_path = prepared["run_path"]
+    if plots == "inline":
+        (run_path / POSTHOC_PLAN_FILE).unlink(missing_ok=True)
+        return {"ok": True}
+    try:
+        tree = load_model(prepared["run_xml"])
+        plan = plan_plot_mode(tree, plots)
+    except (SweepError, PlotError) as e:
+        return {"ok": False, "error": str(e)}
+
+    run_xml = run_path / f"model.{plots}.xml"
+    tree.write(str(run_xml), encoding="UTF-8", xml_declaration=True)
+    write_plan(run_path, plan)
+    prepared["run_xml"] = run_xml
+    prepared["cmd"][prepared["cmd"].index("--file") + 1] = run_xml.name
+    prepared["plot_plan"] = plan
+    return {"ok": True}
+
+
+def _render_plots(run_path: Path) -> Dict[str, Any]:
+    try:
+        return {"ok": True, **render_posthoc_plots(run_path, workers=POSTHOC_PLOT_WORKERS or None)}
+    except PlotError as e:
+        return {"ok": False, "error": str(e)}
+
+
+def _cached_run_result(prepared: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Look the prepared model up in the result cache. On a hit, link the cached
+    outputs into the run folder and return the cached result (plus a fresh
+    evaluation) without running Morpheus. Records the cache key on a miss.
+    """
+    key = RESULT_CACHE.key_for(prepared["run_xml"], MORPHEUS_BIN)
+    if key is None:
+        return None
+    prepared["cache_key"] = key
+
+    entry = RESULT_CACHE.lookup(key)
+    if entry is None:
         return None
-    
-    xml_text = xml_path.read_text(errors="ignore")
-    
-    # Pattern to match <StopTime value="X"/> or <StopTime>X</StopTime>
-    patterns = [
-        r'<StopTime\s+value\s*=\s*["\']?([\d.eE+-]+)["\']?\s*/?>',
-        r'<StopTime[^>]*>([\d.eE+-]+)</StopTime>',
-        r'stop_time\s*=\s*["\']?([\d.eE+-]+)["\']?',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, xml_text, re.IGNORECASE)
-        if match:
-            try:
-                return float(match.group(1))
-            except ValueError:
-                continue
-    
-    return None
 
+    run_id = prepared["run_id"]
+    run_path = prepared["run_path"]
+    try:
+        cached = RESULT_CACHE.materialize(key, entry, run_path)
+    except (OSError, ValueError):
+        return None
 
-def _check_stop_time_match(stop_time: Optional[float], time_values: List[float], tolerance: float = 1e-6) -> bool:
+    result = {
+        **cached,
+        "run_id": run_id,
+        "job_id": None,
+        "run_dir": str(run_path),
+        "xml_path": str(prepared["run_xml"]),
+        "stdout_log": str(run_path / "stdout.log"),
+        "stderr_log": str(run_path / "stderr.log"),
+        "outputs": _list_outputs(run_path),
+        "cached": True,
+        "cache_source_run_id": entry.get("source_run_id"),
+        "message": (
+            f"Identical model already simulated in run {entry.get('source_run_id')}; "
+            "reused its outputs instead of re-running Morpheus"
+        ),
+    }
+    _record_morpheus_run(run_id, {
+        "cached": True,
+        "cache_source_run_id": entry.get("source_run_id"),
+        "returncode": cached.get("returncode"),
+        "recorded_at": datetime.now().isoformat(),
+        "resources": cached.get("resources"),
+    })
+    result["evaluation"] = evaluation(run_id)
+    return result
+
+
+def _submit_morpheus_job(
+    prepared: Dict[str, Any],
+    watchdog: Optional[WatchdogPolicy] = None,
+    threads: Optional[int] = None,
+    timeout: float = MORPHEUS_TIMEOUT,
+) -> MorpheusJob:
+    run_path = prepared["run_path"]
+    run_xml = prepared["run_xml"]
+    meta: Dict[str, Any] = {}
+    # Outputs left by an earlier cache hit or store may still share an inode
+    # with the cache; Morpheus would truncate them in place, with or without
+    # use_cache, so unlink them before every launch
+    detach_hardlinks(run_path)
+    if prepared.get("cache_key"):
+        meta = {"cache_key": prepared["cache_key"], "snapshot": snapshot_dir(run_path)}
+    return JOBS.submit(
+        run_id=prepared["run_id"],
+        cmd=prepared["cmd"],
+        cwd=run_path,
+        stdout_path=run_path / "stdout.log",
+        stderr_path=run_path / "stderr.log",
+        env=os.environ.copy(),
+        timeout=timeout,
+        preview_chars=MAX_STDOUT_CHARS,
+        stop_time=_extract_stop_time(run_xml),
+        start_time=_extract_start_time(run_xml) or 0.0,
+        watchdog=watchdog,
+        meta=meta,
+        threads=threads,
+    )
+
+
+def _watchdog_policy(overrides: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn the optional `watchdog` tool argument into a WatchdogPolicy."""
+    try:
+        return {"ok": True, "policy": WatchdogPolicy.from_dict(overrides)}
+    except (TypeError, ValueError) as e:
+        return {"ok": False, "error": f"Invalid watchdog settings: {e}"}
+
+
+def _morpheus_job_result(job: MorpheusJob) -> Dict[str, Any]:
     """
-    Check if the last simulation time matches the StopTime.
-    Returns True if they match within tolerance.
+    Build the run_morpheus response for a finished job.
+    Runs in an executor thread as the JobManager on_finish callback.
     """
-    if stop_time is None or not time_values:
-        return False
-    
-    last_time = time_values[-1]
-    return abs(stop_time - last_time) < tolerance
+    if job.state == JobState.LAUNCH_ERROR:
+        return {
+            "ok": False,
+            "status": "launch_error",
+            "error": job.error,
+            "run_id": job.run_id,
+            "job_id": job.job_id,
+        }
 
+    run_path = job.cwd
+    outputs = _list_outputs(run_path)
 
-def _list_outputs(run_path: Path) -> Dict[str, List[str]]:
+    success = (job.returncode == 0) and job.state == JobState.FINISHED
+
+    if success:
+        message = "Morpheus run completed successfully"
+    elif job.state == JobState.CANCELLED:
+        message = "Morpheus run was cancelled"
+    elif job.state == JobState.WATCHDOG_KILLED:
+        message = (
+            f"Morpheus run stopped early by watchdog ({job.watchdog_reason['reason']}): "
+            f"{job.watchdog_reason['detail']}"
+        )
+    else:
+        message = "Morpheus run failed or timed out"
+
+    result = {
+        "ok": success,
+        "status": "success" if success else "error",
+        "timed_out": job.timed_out,
+        "cancelled": job.state == JobState.CANCELLED,
+        "watchdog": job.watchdog_reason,
+        "monitor_error": job.monitor_error,
+        "numeric_hits": job.numeric_hits,
+        "returncode": job.returncode,
+        "run_id": job.run_id,
+        "job_id": job.job_id,
+        "run_dir": str(run_path),
+        "xml_path": str(run_path / "model.xml"),
+        "stdout_log": str(job.stdout_path),
+        "stderr_log": str(job.stderr_path),
+        # Previews are the *last* MAX_*_CHARS of each stream; full logs are on disk
+        "stdout": job.stdout,
+        "stderr": job.stderr[-MAX_STDERR_CHARS:],
+        "stdout_truncated": job.stdout_tail.truncated,
+        "stderr_truncated": job.stderr_tail.truncated,
+        "outputs": outputs,
+        "resources": job.resources,
+        "cached": False,
+        "message": message,
+    }
+
+    _record_morpheus_run(job.run_id, {
+        "cached": False,
+        "job_id": job.job_id,
+        "status": job.state.value,
+        "returncode": job.returncode,
+        "timed_out": job.timed_out,
+        "watchdog": job.watchdog_reason,
+        "cpus": job.cpus,
+        "queued_seconds": job.queued_seconds(),
+        "recorded_at": datetime.now().isoformat(),
+        "resources": job.resources,
+    })
+
+    # Only runs that ended on their own are reproducible enough to reuse
+    if job.state == JobState.FINISHED and job.meta.get("cache_key"):
+        RESULT_CACHE.store(
+            job.meta["cache_key"],
+            run_path,
+            job.meta["snapshot"],
+            result,
+            job.stdout_path,
+            job.stderr_path,
+        )
+    return result
+
+
+def _job_result_or_error(job: MorpheusJob) -> Dict[str, Any]:
+    if job.result is not None:
+        return job.result
+    return {
+        "ok": False,
+        "status": "error",
+        "run_id": job.run_id,
+        "job_id": job.job_id,
+        "error": job.error or "Morpheus job finished without a result",
+    }
+
+
+JOBS = JobManager(
+    on_finish=_morpheus_job_result,
+    scheduler=CoreScheduler(threads_per_job=MORPHEUS_THREADS_PER_JOB),
+)
+RESULT_CACHE = ResultCache(RUNS_ROOT / CACHE_DIR_NAME, max_bytes=RESULT_CACHE_MAX_BYTES)
+
+
+
+async def _run_smoke(
+    run_xml: Path,
+    run_id: str,
+    fraction: float = SMOKE_FRACTION,
+    threads: Optional[int] = None,
+) -> Dict[str, Any]:
     """
-    List output files (png, csv) in the run directory.
-    Returns dict with file types as keys and list of filenames as values.
+    Run a downscaled copy of `run_xml` in <run_id>_smoke and decide whether
+    the full model is worth starting.
     """
-    outputs = {
-        "png": [],
-        "csv": [],
-        "other": []
+    try:
+        tree = load_model(run_xml)
+        scaling = downscale_model(tree, fraction, SMOKE_FRAMES)
+    except SweepError as e:
+        return {"ok": False, "error": str(e)}
+
+    smoke_id = f"{run_id}_smoke"
+    smoke_path = _run_dir(smoke_id)
+    tree.write(str(smoke_path / "model.xml"), encoding="UTF-8", xml_declaration=True)
+
+    prepared = _prepare_morpheus_run(str(smoke_path / "model.xml"), smoke_id)
+    result = await asyncio.to_thread(_cached_run_result, prepared)
+    elapsed = 0.0
+    if result is None:
+        job = _submit_morpheus_job(prepared, threads=threads, timeout=SMOKE_TIMEOUT)
+        await JOBS.wait_async(job.job_id)
+        result = _job_result_or_error(job)
+        elapsed = job.elapsed()
+
+    tracker = ProgressTracker(
+        smoke_path / "stdout.log",
+        stop_time=scaling["smoke_stop_time"],
+        start_time=scaling["start_time"],
+    )
+    tracker.tail()
+    progress = tracker.snapshot()
+    outputs = result.get("outputs") or {}
+
+    checks = {
+        "exited_cleanly": bool(result.get("ok")),
+        "model_up": progress["model_up"],
+        "reached_stop_time": (progress["percent_complete"] or 0) >= 99.0,
+        "produced_outputs": bool(outputs.get("png") or outputs.get("csv")),
     }
-    
-    for ext, key in [(".png", "png"), (".csv", "csv")]:
-        files = list(run_path.rglob(f"*{ext}"))
-        outputs[key] = [str(f.name) for f in files]
-    
-    return outputs
+    passed = all(checks.values())
+
+    return {
+        "ok": True,
+        "passed": passed,
+        "checks": checks,
+        "smoke_run_id": smoke_id,
+        "smoke_dir": str(smoke_path),
+        "fraction": fraction,
+        **scaling,
+        "sim_time": progress["sim_time"],
+        "elapsed_seconds": elapsed,
+        "cached": result.get("cached", False),
+        "outputs": {k: len(v) for k, v in outputs.items()},
+        "stderr": (result.get("stderr") or result.get("error") or "")[-2000:],
+        "message": (
+            "Smoke run passed; the full model is expected to run"
+            if passed
+            else "Smoke run failed: " + ", ".join(k for k, v in checks.items() if not v)
+        ),
+    }
+
+# Progress trackers for runs that have no job in this server process
+# (finished before a restart, or started outside the job API), LRU-bounded
+_RUN_PROGRESS: "OrderedDict[str, ProgressTracker]" = OrderedDict()
 
 
 # -----------------------
@@ -395,6 +715,11 @@ def list_references(category: Optional[str] = None) -> Dict[str, Any]:
     """
     List available Morpheus reference files.
     Optionally filter by category (CPM, PDE, ODE, Multiscale, Miscellaneous).
+
+    "models" summarises each example XML (title, lattice class/size,
+    start/stop time, CPM/PDE/ODE components, cell types and their plugins,
+    populations, fields, Analysis plugins, symbols) so an example can be
+    chosen before reading it.
     """
     results = {}
 
@@ -407,14 +732,15 @@ def list_references(category: Optional[str] = None) -> Dict[str, Any]:
     for cat, path in categories.items():
         if not path or not path.exists():
             continue
-        results[cat] = sorted([
-            p.name for p in path.iterdir()
-            if p.is_file() and p.suffix in {".xml", ".txt"}
-        ])
+        results[cat] = [
+            name for name in REFERENCE_CACHE.list_files(path)
+            if Path(name).suffix in {".xml", ".txt"}
+        ]
 
     return {
         "ok": True,
-        "categories": results
+        "categories": results,
+        "models": REFERENCE_CATALOG.by_category(category),
     }
     
 @mcp.tool()
@@ -444,7 +770,7 @@ def read_reference(
     if refs_dir not in path.parents:
         return {"ok": False, "error": "Invalid reference path"}
 
-    text = _read_text(path, limit=max_chars)
+    text = REFERENCE_CACHE.read_text(path, limit=max_chars)
     return {
         "ok": True,
         "category": category,
@@ -468,10 +794,7 @@ def suggest_references(run_id: str) -> Dict[str, Any]:
     categories = inference["selected_categories"]
 
     available = {
-        cat: sorted([
-            p.name for p in REFERENCE_CATEGORIES[cat].iterdir()
-            if p.is_file()
-        ])
+        cat: REFERENCE_CACHE.list_files(REFERENCE_CATEGORIES[cat])
         for cat in categories if cat in REFERENCE_CATEGORIES
     }
 
@@ -492,6 +815,92 @@ def suggest_references(run_id: str) -> Dict[str, Any]:
     }
 
 
+@mcp.tool()
+def search_references(query: str, k: int = 5) -> Dict[str, Any]:
+    """
+    Full-text (BM25) search over the reference documents and example XMLs.
+    Returns the k best-matching chunks, each with file (relative to references/),
+    byte offset, line, nearest heading, score and a snippet.
+    """
+    if not query.strip():
+        return {"ok": False, "error": "Empty query"}
+    try:
+        res = REFERENCE_INDEX.search(query, k=k)
+    except OSError as e:
+        return {"ok": False, "error": f"Reference index unavailable: {e}"}
+    return {"ok": True, **res}
+
+
+@mcp.tool()
+def similar_references(xml_or_run_id: str, k: int = 5) -> Dict[str, Any]:
+    """
+    Find the working reference models closest in structure to a draft model:
+    pass MorpheusML text, or a run id / run folder whose model.xml is used.
+
+    Similarity is the MinHash estimate of the Jaccard overlap of element tag
+    paths, attribute names and plugin names. Results with source "references"
+    can be opened with read_reference(category, name); results with source
+    "model_repository" with read_reference_section("model_repository", name).
+    """
+    if "<" in xml_or_run_id:
+        xml = xml_or_run_id
+        xml_path = None
+    else:
+        run_path = _existing_run_dir(xml_or_run_id)
+        if run_path is None:
+            return {"ok": False, "error": f"Run folder not found under RUNS_ROOT, morpheus_results/ or results/: {xml_or_run_id}"}
+        xml_path = run_path / "model.xml"
+        if not xml_path.exists():
+            return {"ok": False, "error": f"model.xml not found in {run_path}"}
+        xml = xml_path.read_text(encoding="utf-8", errors="ignore")
+    try:
+        res = STRUCTURE_INDEX.query(xml, k=max(1, min(k, MAX_SEARCH_RESULTS)))
+    except ReferenceLookupError as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "xml_path": str(xml_path) if xml_path else None, **res}
+
+
+@mcp.tool()
+def get_reference_cache_stats() -> Dict[str, Any]:
+    """
+    Hit/miss/invalidation/eviction counters and current size of the in-memory
+    cache behind list_references, read_reference and suggest_references.
+    """
+    return {"ok": True, **REFERENCE_CACHE.stats()}
+
+
+@mcp.tool()
+def read_reference_section(
+    doc: str,
+    section: Optional[str] = None,
+    max_chars: int = 20000
+) -> Dict[str, Any]:
+    """
+    Read one section of a consolidated reference document by heading.
+
+    doc: model_repository or morpheusml_doc.
+    section: a heading title ("VolumeConstraint", "CellSorting_2D.xml") or a
+    "Parent > Section" path when a title repeats ("VolumeConstraint > Example").
+    Without a section, returns the document outline instead.
+    """
+    if doc not in SECTIONED_DOCS:
+        return {
+            "ok": False,
+            "error": f"Unknown reference document: {doc}. "
+                     f"Valid options: {list(SECTIONED_DOCS.keys())}"
+        }
+    document = SECTIONED_DOCS[doc]
+    try:
+        if not section:
+            return {"ok": True, "doc": doc, "outline": document.outline()}
+        res = document.read(section, max_chars=max_chars)
+    except FileNotFoundError:
+        return {"ok": False, "error": f"Reference file not found: {document.path}"}
+    except ReferenceLookupError as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "doc": doc, **res}
+
+
 @mcp.tool()
 def generate_xml_from_text(
     model_xml: str,
@@ -550,105 +959,431 @@ def save_model_xml(xml_content: str, run_id: Optional[str] = None, file_name: st
     }
 
 @mcp.tool()
-def run_morpheus(xml_path: str, run_id: Optional[str] = None) -> Dict[str, Any]:
+async def run_morpheus(
+    xml_path: str,
+    run_id: Optional[str] = None,
+    watchdog: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    threads: Optional[int] = None,
+    smoke_first: bool = False,
+    plots: str = "inline",
+) -> Dict[str, Any]:
     """
     GUARANTEED Morpheus execution:
     - runs morpheus model.xml
     - captures stdout/stderr
     - waits for completion
     - writes logs
-    - never blocks MCP
+
+    The simulation itself runs on the background job loop and is awaited,
+    so other tools (get_job_status, get_run_progress, cancel_job) keep
+    answering meanwhile; use start_morpheus_job to submit without waiting.
+
+    A watchdog stops runs that stall, spam stderr errors, flood the disk,
+    cannot finish before the timeout, or write NaN/Inf or values that grew
+    by numeric_blowup_orders (default 6) orders of magnitude to a logger CSV
+    or field snapshot. Override its limits with e.g.
+    watchdog={"stall_seconds": 300, "max_output_bytes": 0} (0/None disables a rule,
+    {"enabled": false} disables all).
+
+    If an identical model (ignoring formatting) was already simulated with the
+    same Morpheus binary, its outputs are reused and the result has
+    cached=True. Pass use_cache=False to force a fresh simulation.
+
+    `threads` sets OpenMP threads / pinned cores (default MORPHEUS_THREADS_PER_JOB);
+    the run waits in the scheduler queue while the cores are busy.
+
+    With smoke_first=True a shortened copy (see smoke_run) runs first and the
+    full simulation only starts if it passes.
+
+    `plots` takes plotting off the simulation loop:
+      - "inline" (default): plots are drawn by Morpheus as the model says
+      - "thin": every Gnuplotter/Logger plot time-step is 10x longer
+      - "posthoc": plots that can be redrawn from logger CSVs and field
+        snapshots are removed from the run and drawn afterwards on a process
+        pool as posthoc_*.png (result["posthoc_plots"]); the others are thinned.
+        Rendering runs in a worker thread, so the server keeps answering.
+        Field snapshots are written at the plot time-step, coarsened so that
+        at most MAX_POSTHOC_FRAMES are written; posthoc_plots.json records
+        save_interval and expected_snapshots
+    model.xml stays as submitted; the simulated copy is model.<plots>.xml.
     """
+    policy = _watchdog_policy(watchdog)
+    if not policy.get("ok"):
+        return policy
+
+    prepared = _prepare_morpheus_run(xml_path, run_id)
+    if not prepared.get("ok"):
+        return prepared
+    applied = _apply_plot_mode(prepared, plots)
+    if not applied.get("ok"):
+        return applied
+
+    if use_cache:
+        cached = await asyncio.to_thread(_cached_run_result, prepared)
+        if cached is not None:
+            if plots == "posthoc":
+                cached["posthoc_plots"] = await asyncio.to_thread(_render_plots, prepared["run_path"])
+            return cached
+
+    if smoke_first:
+        smoke = await _run_smoke(prepared["run_xml"], prepared["run_id"], threads=threads)
+        if smoke.get("ok") and not smoke["passed"]:
+            return {
+                "ok": False,
+                "status": "smoke_failed",
+                "run_id": prepared["run_id"],
+                "xml_path": str(prepared["run_xml"]),
+                "stderr": smoke["stderr"],
+                "smoke": smoke,
+                "message": f"{smoke['message']}. Full run not started; fix model.xml and retry.",
+            }
 
-    xml_file = Path(xml_path).expanduser()
-    if not xml_file.exists():
-        return {"ok": False, "error": f"XML file not found: {xml_path}"}
+    job = _submit_morpheus_job(prepared, watchdog=policy["policy"], threads=threads)
+    await JOBS.wait_async(job.job_id)
+    result = _job_result_or_error(job)
+    if plots == "posthoc" and job.result is not None:
+        result["posthoc_plots"] = await asyncio.to_thread(_render_plots, prepared["run_path"])
+    return result
 
-    # Infer run_id safely
-    if run_id is None:
-        run_id = xml_file.parent.name
 
-    run_path = _run_dir(run_id)
+@mcp.tool()
+def start_morpheus_job(
+    xml_path: str,
+    run_id: Optional[str] = None,
+    watchdog: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    threads: Optional[int] = None,
+    plots: str = "inline",
+) -> Dict[str, Any]:
+    """
+    Start Morpheus in the background and return immediately with a job_id.
+    Poll with get_job_status, block with wait_job, stop with cancel_job.
+    `watchdog`, `threads` and `plots` work as in run_morpheus; the job stays
+    pending while the scheduler waits for free cores (see get_scheduler_status).
+    With plots="posthoc", call render_plots(run_id) once the job has finished.
+    On a result-cache hit nothing is started and the result is returned directly.
+    """
+    policy = _watchdog_policy(watchdog)
+    if not policy.get("ok"):
+        return policy
+
+    prepared = _prepare_morpheus_run(xml_path, run_id)
+    if not prepared.get("ok"):
+        return prepared
+    applied = _apply_plot_mode(prepared, plots)
+    if not applied.get("ok"):
+        return applied
+
+    if use_cache:
+        cached = _cached_run_result(prepared)
+        if cached is not None:
+            return {
+                "ok": True,
+                "job_id": None,
+                "run_id": cached["run_id"],
+                "run_dir": cached["run_dir"],
+                "xml_path": cached["xml_path"],
+                "status": "finished",
+                "cached": True,
+                "result": cached,
+                "message": cached["message"],
+            }
 
-    # Ensure model.xml is inside run folder
-    run_xml = run_path / "model.xml"
-    if xml_file.resolve() != run_xml.resolve():
-        shutil.copy2(xml_file, run_xml)
+    job = _submit_morpheus_job(prepared, watchdog=policy["policy"], threads=threads)
+    return {
+        "ok": True,
+        "job_id": job.job_id,
+        "run_id": job.run_id,
+        "run_dir": str(prepared["run_path"]),
+        "xml_path": str(prepared["run_xml"]),
+        "status": job.state.value,
+        "threads": job.threads,
+        "watchdog": job.watchdog.to_dict(),
+        "message": "Morpheus job submitted. Use get_job_status or wait_job to follow it.",
+    }
 
-    stdout_path = run_path / "stdout.log"
-    stderr_path = run_path / "stderr.log"
 
-    # ABSOLUTE CLI PATH REQUIRED
-    morpheus_bin = MORPHEUS_BIN
+@mcp.tool()
+def get_job_status(job_id: str) -> Dict[str, Any]:
+    """Return the state of a Morpheus job, plus the run result once it has finished."""
+    job = JOBS.get(job_id)
+    if job is None:
+        return {"ok": False, "error": f"Unknown job_id: {job_id}"}
 
-    cmd = [
-        MORPHEUS_BIN,
-        "--file",
-        run_xml.name,
-        "--outdir",
-        str(run_path),
-    #    "--model-graph",
-    #    "dot"
-    ]
+    status = {"ok": True, **job.to_dict()}
+    if job.done:
+        status["result"] = _job_result_or_error(job)
+    return status
 
 
-    try:
-        proc = subprocess.Popen(
-            cmd,
-            cwd=str(run_path),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            env=os.environ.copy(),
-        )
+@mcp.tool()
+def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a pending or running Morpheus job (the process is killed)."""
+    job = JOBS.get(job_id)
+    if job is None:
+        return {"ok": False, "error": f"Unknown job_id: {job_id}"}
+    if job.done:
+        return {
+            "ok": False,
+            "job_id": job_id,
+            "status": job.state.value,
+            "error": "Job has already finished",
+        }
 
-        try:
-            stdout, stderr = proc.communicate(timeout=600)  # 10 min hard cap
-            timed_out = False
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            stdout, stderr = proc.communicate()
-            timed_out = True
+    JOBS.cancel(job_id)
+    return {
+        "ok": True,
+        "job_id": job_id,
+        "status": job.state.value,
+        "cancel_requested": True,
+        "message": "Cancellation requested",
+    }
 
-    except Exception as e:
-        _write_text(stderr_path, str(e))
+
+@mcp.tool()
+async def wait_job(job_id: str, timeout: float = MORPHEUS_TIMEOUT) -> Dict[str, Any]:
+    """
+    Wait up to `timeout` seconds for a Morpheus job to finish.
+    Returns the run result if it finished, otherwise the current status.
+    Other tool calls keep being served while this waits.
+    """
+    job = await JOBS.wait_async(job_id, timeout=timeout)
+    if job is None:
+        return {"ok": False, "error": f"Unknown job_id: {job_id}"}
+
+    if not job.done:
         return {
-            "ok": False,
-            "status": "launch_error",
-            "error": str(e),
-            "run_id": run_id,
+            "ok": True,
+            **job.to_dict(),
+            "message": f"Job still {job.state.value} after waiting {timeout}s",
         }
+    return {"ok": True, **job.to_dict(), "result": _job_result_or_error(job)}
 
-    _write_text(stdout_path, stdout)
-    _write_text(stderr_path, stderr)
 
-    outputs = _list_outputs(run_path)
+@mcp.tool()
+def get_scheduler_status() -> Dict[str, Any]:
+    """
+    Show how the machine's cores are shared between Morpheus jobs:
+    total/busy/free cores, which job is pinned to which cores and the queue
+    of jobs waiting for cores.
+    """
+    status = JOBS.scheduler.status()
+    jobs = {j.job_id: j for j in JOBS.jobs()}
+    for entry in status["running"] + status["queued"]:
+        job = jobs.get(entry["job_id"])
+        if job is not None:
+            entry["run_id"] = job.run_id
+            entry["queued_seconds"] = job.queued_seconds()
+            entry["elapsed_seconds"] = job.elapsed()
+    return {"ok": True, **status}
 
-    success = (proc.returncode == 0) and not timed_out
+
+@mcp.tool()
+def get_run_progress(run_id: str) -> Dict[str, Any]:
+    """
+    Report how far a Morpheus run has got: latest simulated time vs the
+    StopTime in model.xml, percent complete, sim-time per wall-second and ETA.
+    Use it to decide whether to keep waiting on a job or cancel it.
+    """
+    run_path = RUNS_ROOT / run_id
+    if not run_path.exists():
+        return {"ok": False, "error": f"Run not found: {run_id}"}
+
+    job = JOBS.latest_for_run(run_id)
+    if job is not None:
+        # The job's own tracker supersedes any stand-alone one
+        _RUN_PROGRESS.pop(run_id, None)
+        progress = {**job.progress.snapshot(), "numeric_hits": job.numeric_hits}
+        status = job.state.value
+        job_id = job.job_id
+        elapsed = job.elapsed()
+    else:
+        xml_path = run_path / "model.xml"
+        tracker = _RUN_PROGRESS.get(run_id)
+        if tracker is None:
+            tracker = ProgressTracker(
+                run_path / "stdout.log",
+                stop_time=_extract_stop_time(xml_path),
+                start_time=_extract_start_time(xml_path) or 0.0,
+            )
+            _RUN_PROGRESS[run_id] = tracker
+            while len(_RUN_PROGRESS) > MAX_RUN_PROGRESS_TRACKERS:
+                _RUN_PROGRESS.popitem(last=False)
+        else:
+            _RUN_PROGRESS.move_to_end(run_id)
+        tracker.tail()
+        progress = tracker.snapshot()
+        status = "not_running"
+        job_id = None
+        elapsed = None
 
     return {
-        "ok": success,
-        "status": "success" if success else "error",
-        "timed_out": timed_out,
-        "returncode": proc.returncode,
+        "ok": True,
         "run_id": run_id,
-        "run_dir": str(run_path),
-        "xml_path": str(run_xml),
-        "stdout_log": str(stdout_path),
-        "stderr_log": str(stderr_path),
-        "stdout": stdout[:MAX_STDOUT_CHARS],
-        "stderr": stderr[:MAX_STDERR_CHARS],
-        "outputs": outputs,
-        "message": (
-            "Morpheus run completed successfully"
-            if success
-            else "Morpheus run failed or timed out"
+        "job_id": job_id,
+        "status": status,
+        "wall_elapsed_seconds": elapsed,
+        **progress,
+    }
+
+
+@mcp.tool()
+async def smoke_run(
+    run_id: str,
+    fraction: float = SMOKE_FRACTION,
+    start_full_on_pass: bool = False,
+    threads: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Quickly check a model before the full run: simulate a copy of model.xml
+    with StopTime shortened to `fraction` of the original span and
+    Gnuplotter/Logger time-steps coarsened, in <run_id>_smoke.
+
+    Passes if Morpheus exits cleanly, the model comes up, the shortened
+    StopTime is reached and PNG/CSV outputs appear. With
+    start_full_on_pass=True the full run is then started as a background
+    job (follow it with wait_job / get_run_progress).
+    """
+    run_xml = RUNS_ROOT / run_id / "model.xml"
+    if not run_xml.exists():
+        return {"ok": False, "error": f"model.xml not found for run: {run_id}"}
+
+    smoke = await _run_smoke(run_xml, run_id, fraction=fraction, threads=threads)
+    if smoke.get("ok") and smoke["passed"] and start_full_on_pass:
+        smoke["full_run"] = start_morpheus_job(xml_path=str(run_xml), run_id=run_id, threads=threads)
+    return smoke
+
+
+@mcp.tool()
+async def run_parameter_sweep(
+    run_id: str,
+    grid: Optional[Dict[str, List[Any]]] = None,
+    samples: Optional[List[Dict[str, Any]]] = None,
+    metrics: Optional[List[str]] = None,
+    threads_per_variant: Optional[int] = None,
+    use_cache: bool = True,
+    watchdog: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Run variants of a run's model.xml and return a table of their scores.
+
+    Parameters are either a declared symbol (Constant/Variable/Property value),
+    e.g. {"grid": {"v0": [0.1, 0.5], "Time/StopTime@value": [500, 1000]}},
+    or an explicit list of samples, e.g. {"samples": [{"v0": 0.1}, {"v0": 0.3}]}.
+    `metrics` are logger.csv columns, reported as an aggregate over the cells
+    of the last logged time point: "cell.volume" (mean) or "cell.volume:max";
+    aggregates are mean, std, min, max, count and valid. Table columns are
+    named "column:aggregate".
+
+    Variants run concurrently through the core scheduler, each pinned to
+    `threads_per_variant` cores (default MORPHEUS_THREADS_PER_JOB); extra
+    variants queue until cores free up. Results are also written to sweep.json / sweep.csv in the sweep folder.
+    """
+    base_path = RUNS_ROOT / run_id
+    xml_path = base_path / "model.xml"
+    if not xml_path.exists():
+        return {"ok": False, "error": f"model.xml not found for run: {run_id}"}
+
+    policy = _watchdog_policy(watchdog)
+    if not policy.get("ok"):
+        return policy
+
+    try:
+        metrics = [metric_key(m) for m in metrics or []]
+        variants = expand_variants(grid, samples)
+        tree = load_model(xml_path)
+        param_names = list(dict.fromkeys(k for v in variants for k in v))
+        validate_params(tree, param_names)
+    except SweepError as e:
+        return {"ok": False, "error": str(e)}
+
+    sweep_id = uuid.uuid4().hex[:6]
+    sweep_name = f"{run_id}_sweep_{sweep_id}"
+    sweep_path = _run_dir(sweep_name)
+
+    # Submit every variant up front; the scheduler decides how many run at once
+    pending = []
+    for index, overrides in enumerate(variants):
+        variant_id = f"{sweep_name}_{index:03d}"
+        variant_path = _run_dir(variant_id)
+        write_variant(tree, overrides, variant_path / "model.xml")
+
+        prepared = _prepare_morpheus_run(str(variant_path / "model.xml"), variant_id)
+        cached = await asyncio.to_thread(_cached_run_result, prepared) if use_cache else None
+        job = None
+        if cached is None:
+            job = _submit_morpheus_job(prepared, watchdog=policy["policy"], threads=threads_per_variant)
+        pending.append((index, overrides, variant_id, variant_path, job, cached))
+
+    rows = []
+    for index, overrides, variant_id, variant_path, job, cached in pending:
+        if job is not None:
+            await JOBS.wait_async(job.job_id)
+            result = _job_result_or_error(job)
+            scores = await asyncio.to_thread(evaluation, variant_id)
+            elapsed = job.elapsed()
+            cpus = job.cpus
+        else:
+            result = cached
+            scores = cached["evaluation"]
+            elapsed = 0.0
+            cpus = None
+
+        rows.append({
+            "variant": index,
+            "run_id": variant_id,
+            **overrides,
+            "ok": result.get("ok", False),
+            "status": result.get("status"),
+            "returncode": result.get("returncode"),
+            "cached": result.get("cached", False),
+            "elapsed_seconds": elapsed,
+            "cpus": " ".join(map(str, cpus)) if cpus else "",
+            "total_score": scores.get("total_score"),
+            "max_possible_score": scores.get("max_possible_score"),
+            "score_percentage": scores.get("score_percentage"),
+            **logger_final_values(variant_path, metrics),
+        })
+
+    sweep_json = sweep_path / "sweep.json"
+    sweep_csv = sweep_path / "sweep.csv"
+    sweep_json.write_text(
+        json.dumps(
+            {
+                "sweep_id": sweep_id,
+                "base_run_id": run_id,
+                "parameters": param_names,
+                "metrics": metrics,
+                "threads_per_variant": JOBS.scheduler.threads_for(threads_per_variant),
+                "rows": rows,
+            },
+            indent=2,
         ),
+        encoding="utf-8",
+    )
+    fieldnames = list(dict.fromkeys(k for row in rows for k in row))
+    with open(sweep_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    return {
+        "ok": True,
+        "base_run_id": run_id,
+        "sweep_id": sweep_id,
+        "sweep_dir": str(sweep_path),
+        "variants": len(rows),
+        "succeeded": sum(1 for r in rows if r["ok"]),
+        "threads_per_variant": JOBS.scheduler.threads_for(threads_per_variant),
+        "table": rows,
+        "sweep_json": str(sweep_json),
+        "sweep_csv": str(sweep_csv),
     }
 
 
 @mcp.tool()
-def run_xml_once(xml_content: str) -> Dict[str, Any]:
+async def run_xml_once(xml_content: str) -> Dict[str, Any]:
     """
     Convenience: create run folder, save xml, run Morpheus.
     Returns logs and outputs.
@@ -656,11 +1391,134 @@ def run_xml_once(xml_content: str) -> Dict[str, Any]:
     saved = save_model_xml(xml_content=xml_content)
     if not saved.get("ok"):
         return saved
-    return run_morpheus(xml_path=saved["xml_path"], run_id=saved["run_id"])
+    return await run_morpheus(xml_path=saved["xml_path"], run_id=saved["run_id"])
+
+@mcp.tool()
+def analyze_logger(
+    run_id: str,
+    columns: Optional[List[str]] = None,
+    file_name: Optional[str] = None,
+    quantiles: Optional[List[float]] = None,
+    max_time_points: int = 50,
+) -> Dict[str, Any]:
+    """
+    Per-time-point statistics of Morpheus Logger output (logger*.csv).
+
+    For every time point: the row (cell) count and, per column, valid count,
+    mean, std, min, max and quantiles (default 0.25/0.5/0.75, keys q25/q50/q75).
+    columns: column names as in the CSV header, e.g. ["cell.center.x"];
+      default is every column. Files without any requested column are skipped.
+    file_name: analyze only this file (default: all logger*.csv in the run).
+    max_time_points: the time axis is evenly thinned to this many points.
+    """
+    run_path = _run_dir(run_id)
+    if file_name:
+        files = [run_path / file_name]
+        if not files[0].is_file():
+            return {"ok": False, "error": f"{file_name} not found in run {run_id}"}
+    else:
+        files = sorted(run_path.glob("logger*.csv"))
+        if not files:
+            return {"ok": False, "error": f"No logger*.csv files in run {run_id}"}
+
+    results = {}
+    skipped = {}
+    for path in files:
+        try:
+            if columns:
+                available = set(read_header(path)[1])
+                wanted = [c for c in columns if c in available]
+                if not wanted:
+                    skipped[path.name] = "none of the requested columns"
+                    continue
+            else:
+                wanted = None
+            analysis = analyze_logger_file(
+                path,
+                columns=wanted,
+                quantiles=quantiles or DEFAULT_QUANTILES,
+                chunk_bytes=LOGGER_CHUNK_BYTES,
+            )
+        except (LoggerError, OSError) as e:
+            skipped[path.name] = str(e)
+            continue
+        results[path.name] = summarize_for_json(analysis, max_time_points)
+
+    if not results:
+        return {"ok": False, "error": "No logger file could be analyzed", "skipped": skipped}
+    return {"ok": True, "run_id": run_id, "files": results, "skipped": skipped}
+
+
+def _existing_run_dir(run: str) -> Optional[Path]:
+    """
+    A run id under RUNS_ROOT, or a run folder path (relative paths resolve
+    against the server directory). Only folders strictly inside RUNS_ROOT or
+    RESULT_FOLDERS are accepted, so a tool never walks an arbitrary tree.
+    """
+    roots = [RUNS_ROOT.resolve()] + [folder.resolve() for folder in RESULT_FOLDERS]
+    path = Path(run).expanduser()
+    for candidate in (RUNS_ROOT / run, path if path.is_absolute() else Path(__file__).parent / path):
+        candidate = candidate.resolve()
+        if candidate.is_dir() and any(candidate != root and candidate.is_relative_to(root) for root in roots):
+            return candidate
+    return None
+
+
+@mcp.tool()
+def compare_runs(run_a: str, run_b: str) -> Dict[str, Any]:
+    """
+    Compare two runs, e.g. an auto-fix attempt against the previous one or
+    the case1/case2/case3 runs of the same paper. Differences read from a to b.
+
+    run_a / run_b: run ids under RUNS_ROOT or run folder paths inside
+      RUNS_ROOT, morpheus_results/ or results/, e.g.
+      "morpheus_results/morpheus_results_case3_final/1_Szabo2010_results/1_Szabo2010_clean".
+    Nothing is written to either run folder.
+
+    Returns:
+      model: elements added/removed and attribute/text changes in model.xml,
+        addressed like "MorpheusModel/CellTypes/CellType[@name='amoeba']".
+      evaluation: total score and differing breakdown entries (a, b, delta).
+      outputs: files only in one run, per-extension counts.
+      loggers: per logger*.csv in both runs and per shared column, max_abs_diff
+        and rmse. basis "rows" compares row by row (same time column in both);
+        "time_means" compares per-time-point means on the common time points.
+    """
+    paths = []
+    for run in (run_a, run_b):
+        path = _existing_run_dir(run)
+        if path is None:
+            return {"ok": False, "error": f"Run folder not found under RUNS_ROOT, morpheus_results/ or results/: {run}"}
+        paths.append(path)
+
+    result = compare_run_dirs(paths[0], paths[1], chunk_bytes=LOGGER_CHUNK_BYTES)
+    return {"ok": True, "run_a": str(paths[0]), "run_b": str(paths[1]), **result}
+
+
+@mcp.tool()
+async def render_plots(run_id: str) -> Dict[str, Any]:
+    """
+    Draw the plots a plots="posthoc" run left to posthoc_plots.json, from its
+    logger CSVs and field snapshots, on a process pool (run_morpheus does this
+    itself; use it after start_morpheus_job or to redraw).
+
+    Returns per plot its source element (e.g. "Gnuplotter[1]/Plot[2]"), the
+    written posthoc_*.png files, layers not redrawn (CellArrows, ...) and an
+    error if it could not be drawn.
+    """
+    run_path = _existing_run_dir(run_id)
+    if run_path is None:
+        return {"ok": False, "error": f"Run folder not found under RUNS_ROOT, morpheus_results/ or results/: {run_id}"}
+    return {"run_id": run_id, "run_dir": str(run_path), **await asyncio.to_thread(_render_plots, run_path)}
+
 
 @mcp.tool()
 def get_run_summary(run_id: str) -> Dict[str, Any]:
-    """Return logs and output file lists for a run."""
+    """
+    Return logs and output file lists for a run, plus a digest of its
+    gnuplot_error_*.log files: deduplicated, counted messages attributed to
+    the <Gnuplotter>/<Logger> <Plot> that most likely caused them.
+    """
     run_path = _run_dir(run_id)
     stdout_path = run_path / "stdout.log"
     stderr_path = run_path / "stderr.log"
@@ -671,6 +1529,7 @@ def get_run_summary(run_id: str) -> Dict[str, Any]:
         "stdout": _read_text(stdout_path, limit=MAX_STDOUT_CHARS),
         "stderr": _read_text(stderr_path, limit=MAX_STDERR_CHARS),
         "outputs": _list_outputs(run_path),
+        "gnuplot_errors": digest_gnuplot_logs(run_path),
     }
 
 @mcp.tool()
@@ -696,12 +1555,19 @@ def auto_fix_and_rerun(run_id: str) -> Dict[str, Any]:
     stderr = _read_text(run_path / "stderr.log")
     stdout = _read_text(run_path / "stdout.log")
 
+    # Closest working examples by structure, as templates for the fix
+    try:
+        similar = STRUCTURE_INDEX.query(xml_path.read_text(encoding="utf-8", errors="ignore"), k=3)["results"]
+    except (OSError, ReferenceLookupError):
+        similar = []
+
     return {
         "ok": True,
         "run_id": run_id,
         "xml_path": str(xml_path),
         "stdout": stdout,
         "stderr": stderr,
+        "similar_references": similar,
         "instruction": (
             "Fix the Morpheus XML based on stderr. "
             "Return ONLY corrected XML."
@@ -757,251 +1623,111 @@ def evaluation(run_id: str) -> Dict[str, Any]:
     Evaluate a Morpheus run based on execution artifacts and
     store the results as evaluation.json in the run directory.
     
-    Scoring Criteria:
-    1. XML errors in model.xml.err or stderr.log: negative score per error (best = 0)
-    2. model_graph.dot exists: +1
-    3. Time step progression (graduated scoring):
+    Scoring uses the shared rules in morpheus_eval (SCORING_RULES), so every
+    server variant gives the same score:
+    1. xml_errors: -1 per error line on stderr.log (best = 0)
+    2. model_graph: model_graph.dot exists: +1
+    3. time_progression: "Time:" lines after "model is up" (graduated scoring):
        - 0 lines:     +0
        - 1-10 lines:  +1
        - 11-50 lines: +2
        - 51+ lines:   +3
-    4. StopTime matches last Time in output: +1
-    5. Result files (png/csv) generated: +1
-    6. BONUS: Many results generated (10+ PNGs): +1
-    
+    4. stop_time: StopTime matches last Time in output: +1
+    5. results: Result files (png/csv) generated: +1
+    6. many_results (BONUS): 10+ informative PNGs, i.e. not blank and not a
+       repeat of the previous frame of their series: +1
+    Unscored rules add resources, gnuplot_errors, numerical_health and
+    model_sections to the breakdown.
+
     Maximum possible score: 7 (with 0 errors)
     """
     run_path = _run_dir(run_id)
 
-    xml_path = run_path / "model.xml"
-    stdout_path = run_path / "stdout.log"      # ← FIXED: Use stdout.log
-    stderr_path = run_path / "stderr.log"      # ← FIXED: Use stderr.log
-    eval_json_path = run_path / "evaluation.json"
-    eval_txt_path = run_path / "evaluation.txt"
-
-    score = 0
-    breakdown: Dict[str, Any] = {}
+    # One directory walk + one streaming pass over the logs (morpheus_eval),
+    # reusing per-input results cached under a fingerprint of their files.
+    # evaluation.json/evaluation.txt are only rewritten if a scored value changed.
+    report = evaluate_and_report(run_path, run_id)
+    score = report["total_score"]
+    max_score = report["max_possible_score"]
 
-    try:
-        # -------------------------------------------------
-        # 1. XML error penalty (best score = 0)
-        #    Check stderr.log for errors
-        # -------------------------------------------------
-        error_count = 0
-        if stderr_path.exists():
-            stderr_content = stderr_path.read_text(errors="ignore").strip()
-            if stderr_content:
-                # Count error lines
-                error_lines = [l for l in stderr_content.split('\n') if l.strip()]
-                error_count = len(error_lines)
-        
-        breakdown["xml_error_count"] = error_count
-        breakdown["xml_error_penalty"] = -error_count
-        breakdown["stderr_file_exists"] = stderr_path.exists()
-        score -= error_count
-
-        # -------------------------------------------------
-        # 2. Model graph existence check (+1 if exists)
-        # -------------------------------------------------
-        has_graph, graph_files = _check_model_graph(run_path)
-        breakdown["model_graph_present"] = has_graph
-        breakdown["model_graph_files"] = graph_files
-
-        if has_graph:
-            score += 1
-            breakdown["model_graph_score"] = 1
-        else:
-            breakdown["model_graph_score"] = 0
-
-        # -------------------------------------------------
-        # 3. Time-step progression check (graduated scoring)
-        #    Count lines starting with "Time:" in stdout.log
-        # -------------------------------------------------
-        time_line_count = 0
-        time_values = []
-        
-        if stdout_path.exists():
-            stdout_content = stdout_path.read_text(errors="ignore")
-            # Find "model is up" marker
-            model_up_idx = stdout_content.lower().find("model is up")
-            if model_up_idx >= 0:
-                # Only look at content after "model is up"
-                after_model_up = stdout_content[model_up_idx:]
-            else:
-                after_model_up = stdout_content
-            
-            # Count Time: lines
-            time_pattern = re.compile(r'Time:\s*<?(\d+\.?\d*)', re.IGNORECASE)
-            for match in time_pattern.finditer(after_model_up):
-                try:
-                    time_values.append(float(match.group(1)))
-                    time_line_count += 1
-                except ValueError:
-                    continue
-        
-        # Calculate time score with adjusted thresholds
-        if time_line_count == 0:
-            time_score = 0
-        elif time_line_count <= 10:
-            time_score = 1
-        elif time_line_count <= 50:
-            time_score = 2
-        else:
-            time_score = 3
-        
-        breakdown["time_lines_count"] = time_line_count
-        breakdown["time_score"] = time_score
-        breakdown["time_values_sample"] = time_values[:5] if time_values else []
-        breakdown["last_time_value"] = time_values[-1] if time_values else None
-        breakdown["stdout_file_exists"] = stdout_path.exists()
-        
-        score += time_score
-
-        # -------------------------------------------------
-        # 4. StopTime consistency check (+1 if matches)
-        # -------------------------------------------------
-        stop_time = _extract_stop_time(xml_path)
-        last_time = time_values[-1] if time_values else None
-        
-        # Check if last time matches stop time (with tolerance)
-        stop_time_match = False
-        if stop_time is not None and last_time is not None:
-            stop_time_match = abs(stop_time - last_time) < 1.0
-        
-        breakdown["stop_time"] = stop_time
-        breakdown["last_simulation_time"] = last_time
-        breakdown["stop_time_match"] = stop_time_match
-
-        if stop_time_match:
-            score += 1
-            breakdown["stop_time_score"] = 1
-        else:
-            breakdown["stop_time_score"] = 0
-
-        # -------------------------------------------------
-        # 5. Result file generation check (+1 if png or csv exists)
-        # -------------------------------------------------
-        outputs = _list_outputs(run_path)
-        png_count = len(outputs.get("png", []))
-        csv_count = len(outputs.get("csv", []))
-        has_png = png_count > 0
-        has_csv = csv_count > 0
-        has_results = has_png or has_csv
-
-        breakdown["results_generated"] = has_results
-        breakdown["has_png_files"] = has_png
-        breakdown["has_csv_files"] = has_csv
-        breakdown["png_files"] = outputs.get("png", [])[:20]  # Limit to first 20 for display
-        breakdown["csv_files"] = outputs.get("csv", [])
-        breakdown["png_count"] = png_count
-        breakdown["csv_count"] = csv_count
-
-        if has_results:
-            score += 1
-            breakdown["results_score"] = 1
-        else:
-            breakdown["results_score"] = 0
-
-        # -------------------------------------------------
-        # 6. BONUS: Many results generated (+1 if 10+ PNGs)
-        # -------------------------------------------------
-        if png_count >= 10:
-            score += 1
-            breakdown["bonus_many_results"] = 1
-        else:
-            breakdown["bonus_many_results"] = 0
+    return {
+        "ok": True,
+        "run_id": run_id,
+        "total_score": score,
+        "max_possible_score": max_score,
+        "score_percentage": report["score_percentage"],
+        "evaluation_json_path": report["evaluation_json_path"],
+        "evaluation_txt_path": report["evaluation_txt_path"],
+        "breakdown": report["breakdown"],
+        "cache": report["cache"],
+        "message": (
+            "Evaluation completed and saved to evaluation.json and evaluation.txt"
+            if report["written"]
+            else "Inputs unchanged since the last evaluation; evaluation.json and evaluation.txt are up to date"
+        ),
+    }
 
-    except Exception as e:
-        breakdown["evaluation_exception"] = str(e)
-        breakdown["evaluation_failed"] = True
 
-    finally:
-        # -------------------------------------------------
-        # Calculate maximum possible score
-        # -------------------------------------------------
-        max_score = 7  # 0 errors + 1 graph + 3 time + 1 stoptime + 1 results + 1 bonus
-        
-        # -------------------------------------------------
-        # Final evaluation object
-        # -------------------------------------------------
-        evaluation_result = {
-            "run_id": run_id,
-            "total_score": score,
-            "max_possible_score": max_score,
-            "score_percentage": round((score / max_score) * 100, 2) if max_score > 0 else 0,
-            "breakdown": breakdown,
-            "timestamp": datetime.now().isoformat(),
-        }
-
-        eval_json_path.write_text(
-            json.dumps(evaluation_result, indent=2),
-            encoding="utf-8"
-        )
+@mcp.tool()
+def evaluate_all(
+    root: Optional[str] = None,
+    pattern: str = "*",
+    table_format: str = "csv",
+    workers: Optional[int] = None,
+    write_reports: bool = True,
+    check_frames: bool = False,
+) -> Dict[str, Any]:
+    """
+    Evaluate every run folder under `root` in parallel and write one table.
+
+    root: folder to search (default RUNS_ROOT); relative paths are resolved
+      against the server directory, e.g. "morpheus_results/morpheus_results_case1".
+    pattern: glob matched against each run folder's path relative to root
+      (or its name), e.g. "4_*/*" or "*_smoke".
+    table_format: "csv" or "parquet" (needs pandas + pyarrow).
+    workers: processes to use (default: all cores).
+    write_reports: also refresh each run's evaluation.json / evaluation.txt.
+    check_frames: decode PNG frames for the many-results bonus (slow on runs
+      with many new frames); by default cached frame checks are reused and
+      the bonus otherwise counts PNG files.
+
+    Writes <root>/evaluation_summary.json and evaluation_summary.<table_format>.
+    """
+    if table_format not in ("csv", "parquet"):
+        return {"ok": False, "error": "table_format must be 'csv' or 'parquet'"}
+    base = RUNS_ROOT if root is None else Path(root).expanduser()
+    if not base.is_absolute():
+        base = Path(__file__).parent / base
+    if not base.is_dir():
+        return {"ok": False, "error": f"Not a directory: {base}"}
 
-        # Create human-readable summary
-        eval_txt_path.write_text(
-            (
-                f"{'='*60}\n"
-                f"MORPHEUS EVALUATION REPORT\n"
-                f"{'='*60}\n"
-                f"Run ID: {run_id}\n"
-                f"Timestamp: {datetime.now().isoformat()}\n"
-                f"\n"
-                f"TOTAL SCORE: {score} / {max_score} ({round((score / max_score) * 100, 2) if max_score > 0 else 0}%)\n"
-                f"\n"
-                f"{'-'*60}\n"
-                f"SCORING BREAKDOWN:\n"
-                f"{'-'*60}\n"
-                f"\n"
-                f"1. XML/Stderr Errors (penalty, best=0):\n"
-                f"   - Error count: {breakdown.get('xml_error_count', 'N/A')}\n"
-                f"   - Score: {breakdown.get('xml_error_penalty', 0)}\n"
-                f"\n"
-                f"2. Model Graph (model_graph.dot):\n"
-                f"   - Present: {breakdown.get('model_graph_present', False)}\n"
-                f"   - Files: {breakdown.get('model_graph_files', [])}\n"
-                f"   - Score: {breakdown.get('model_graph_score', 0)} / 1\n"
-                f"\n"
-                f"3. Time Step Progression (from stdout.log):\n"
-                f"   - Time lines count: {breakdown.get('time_lines_count', 0)}\n"
-                f"   - Scoring: 0->+0, 1-10->+1, 11-50->+2, 51+->+3\n"
-                f"   - Score: {breakdown.get('time_score', 0)} / 3\n"
-                f"\n"
-                f"4. StopTime Match:\n"
-                f"   - StopTime in XML: {breakdown.get('stop_time', 'N/A')}\n"
-                f"   - Last simulation time: {breakdown.get('last_simulation_time', 'N/A')}\n"
-                f"   - Match: {breakdown.get('stop_time_match', False)}\n"
-                f"   - Score: {breakdown.get('stop_time_score', 0)} / 1\n"
-                f"\n"
-                f"5. Result Files Generated:\n"
-                f"   - PNG files: {breakdown.get('png_count', 0)}\n"
-                f"   - CSV files: {breakdown.get('csv_count', 0)}\n"
-                f"   - Score: {breakdown.get('results_score', 0)} / 1\n"
-                f"\n"
-                f"6. BONUS - Many Results (10+ PNGs):\n"
-                f"   - Score: {breakdown.get('bonus_many_results', 0)} / 1\n"
-                f"\n"
-                f"{'='*60}\n"
-            ),
-            encoding="utf-8"
+    try:
+        rows = evaluate_many(
+            base, pattern=pattern, workers=workers, write_reports=write_reports, check_frames=check_frames
         )
-
+        if not rows:
+            return {"ok": False, "error": f"No run folders matching '{pattern}' under {base}"}
+        paths = write_summary_table(rows, base, table_format=table_format, root=base)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+
+    failed = [r["run_dir"] for r in rows if r["error"]]
+    scores = [r["score_percentage"] for r in rows if r["score_percentage"] is not None]
     return {
         "ok": True,
-        "run_id": run_id,
-        "total_score": score,
-        "max_possible_score": max_score,
-        "score_percentage": round((score / max_score) * 100, 2) if max_score > 0 else 0,
-        "evaluation_json_path": str(eval_json_path),
-        "evaluation_txt_path": str(eval_txt_path),
-        "breakdown": breakdown,
-        "message": "Evaluation completed and saved to evaluation.json and evaluation.txt",
+        "root": str(base),
+        "runs_evaluated": len(rows),
+        "failed": failed,
+        "mean_score_percentage": round(sum(scores) / len(scores), 2) if scores else None,
+        "summary_json_path": paths["json"],
+        "summary_table_path": paths["table"],
+        "scores": {r["run_dir"]: r["total_score"] for r in rows},
     }
 
 
 
 @mcp.tool()
-def run_full_pipeline(
+async def run_full_pipeline(
     pdf_path: str,
     model_xml: Optional[str] = None
 ) -> Dict[str, Any]:
@@ -1035,7 +1761,7 @@ def run_full_pipeline(
                 raise RuntimeError(save_res.get("error"))
 
             # 4. Run Morpheus
-            morpheus_result = run_morpheus(
+            morpheus_result = await run_morpheus(
                 xml_path=save_res["xml_path"],
                 run_id=run_id
             )
@@ -82,7 +82,7 @@ def run_benchmark_suite(
                 eval_res = evaluation(paper_result["run_id"])
                 paper_result["evaluation"] = {
                     "total_score": eval_res.get("total_score"),
-                    "evaluation_path": eval_res.get("evaluation_path"),
+                    "evaluation_path": eval_res.get("evaluation_json_path"),
                 }
             else:
                 paper_result["evaluation"] = None
@@ -139,6 +139,8 @@ from pypdf import PdfReader
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 
+from morpheus_eval import evaluate_and_report
+
 load_dotenv()
 
 # -----------------------
@@ -422,35 +424,6 @@ def _get_analysis_template() -> str:
 '''
 
 
-# Evaluation helpers (not MCP tools)
-def _count_xml_errors(run_path: Path) -> int:
-    err_file = run_path / "model.xml.err"
-    if not err_file.exists():
-        return 0
-    return len([
-        line for line in err_file.read_text(errors="ignore").splitlines()
-        if line.strip()
-    ])
-
-
-def _extract_times(out_text: str) -> List[float]:
-    times = []
-    for line in out_text.splitlines():
-        if line.startswith("Time:"):
-            try:
-                times.append(float(line.split("Time:")[1].strip()))
-            except Exception:
-                continue
-    return times
-
-
-def _extract_stop_time(xml_text: str) -> Optional[float]:
-    match = re.search(r"<StopTime\s+value=\"([0-9.]+)\"", xml_text)
-    if match:
-        return float(match.group(1))
-    return None
-
-
 # -----------------------
 # Benchmark State Management
 # -----------------------
@@ -1003,160 +976,47 @@ def evaluation(run_id: str) -> Dict[str, Any]:
     """
     Evaluate a Morpheus run based on execution artifacts and
     store the results as evaluation.json in the run directory.
+    
+    Scoring uses the shared rules in morpheus_eval (SCORING_RULES), so every
+    server variant gives the same score:
+    1. xml_errors: -1 per error line on stderr.log (best = 0)
+    2. model_graph: model_graph.dot exists: +1
+    3. time_progression: "Time:" lines after "model is up" (graduated scoring):
+       - 0 lines:     +0
+       - 1-10 lines:  +1
+       - 11-50 lines: +2
+       - 51+ lines:   +3
+    4. stop_time: StopTime matches last Time in output: +1
+    5. results: Result files (png/csv) generated: +1
+    6. many_results (BONUS): 10+ informative PNGs, i.e. not blank and not a
+       repeat of the previous frame of their series: +1
+    Unscored rules add resources, gnuplot_errors, numerical_health and
+    model_sections to the breakdown.
+
+    Maximum possible score: 7 (with 0 errors)
     """
     run_path = _run_dir(run_id)
 
-    xml_path = run_path / "model.xml"
-    out_path = run_path / "model.xml.out"
-    eval_json_path = run_path / "evaluation.json"
-    eval_txt_path = run_path / "evaluation.txt"
-
-    score = 0
-    breakdown: Dict[str, Any] = {}
-
-    try:
-        # -------------------------------------------------
-        # 1. XML error penalty (best score = 0)
-        # -------------------------------------------------
-        error_count = _count_xml_errors(run_path)
-        breakdown["xml_error_count"] = error_count
-        breakdown["xml_error_penalty"] = -error_count
-        score -= error_count
-
-        # -------------------------------------------------
-        # 2. Model graph existence check
-        # -------------------------------------------------
-        graph_files = list(run_path.rglob("model_graph.dot"))
-        has_graph = len(graph_files) > 0
-        breakdown["model_graph_present"] = has_graph
-        breakdown["model_graph_files"] = [str(p.name) for p in graph_files]
-
-        if has_graph:
-            score += 1
-
-        # -------------------------------------------------
-        # 3. Time-step progression check
-        # -------------------------------------------------
-        if out_path.exists():
-            out_text = out_path.read_text(errors="ignore")
-            times = _extract_times(out_text)
-        else:
-            times = []
-
-        breakdown["time_steps_detected"] = len(times)
-
-        if len(times) > 5:
-            score += 1
-            breakdown["time_step_score"] = 1
-        else:
-            breakdown["time_step_score"] = 0
-
-        # -------------------------------------------------
-        # 4. Metadata presence check
-        # -------------------------------------------------
-        meta_path = run_path / "metadata.json"
-        has_metadata = meta_path.exists()
-
-        breakdown["metadata_present"] = has_metadata
-        if has_metadata:
-            score += 1
-
-        # -------------------------------------------------
-        # 5. Result file generation check (CRITICAL)
-        # -------------------------------------------------
-        outputs = _list_outputs(run_path)
-        png_files = outputs.get("png", [])
-        csv_files = outputs.get("csv", [])
-        
-        has_png = len(png_files) > 0
-        has_csv = len(csv_files) > 0
-        has_results = has_png or has_csv
-
-        breakdown["results_generated"] = has_results
-        breakdown["png_files"] = png_files
-        breakdown["png_count"] = len(png_files)
-        breakdown["csv_files"] = csv_files
-        breakdown["csv_count"] = len(csv_files)
-
-        if has_results:
-            score += 1
-        
-        # Bonus for having many graphs
-        if len(png_files) >= 10:
-            score += 1
-            breakdown["many_graphs_bonus"] = 1
-        else:
-            breakdown["many_graphs_bonus"] = 0
-        
-        # -------------------------------------------------
-        # 6. XML Analysis section check
-        # -------------------------------------------------
-        if xml_path.exists():
-            xml_content = xml_path.read_text(errors="ignore")
-            validation = _validate_xml_completeness(xml_content)
-            breakdown["xml_has_analysis"] = validation["has_analysis"]
-            breakdown["xml_has_gnuplotter"] = validation["has_gnuplotter"]
-            breakdown["xml_has_logger"] = validation["has_logger"]
-            
-            if validation["has_gnuplotter"]:
-                score += 1
-                breakdown["gnuplotter_bonus"] = 1
-            else:
-                breakdown["gnuplotter_bonus"] = 0
-                breakdown["missing_gnuplotter_warning"] = "XML missing Gnuplotter - this is why no graphs were generated!"
-
-    except Exception as e:
-        # Capture catastrophic failure without aborting evaluation
-        breakdown["evaluation_exception"] = str(e)
-        breakdown["evaluation_failed"] = True
-
-    finally:
-        # -------------------------------------------------
-        # Final evaluation object (ALWAYS CREATED)
-        # -------------------------------------------------
-        evaluation_result = {
-            "run_id": run_id,
-            "total_score": score,
-            "max_possible_score": 7,  # Updated max score
-            "breakdown": breakdown,
-            "timestamp": datetime.now().isoformat(),
-        }
-
-        eval_json_path.write_text(
-            json.dumps(evaluation_result, indent=2),
-            encoding="utf-8"
-        )
-
-        eval_txt_path.write_text(
-            (
-                f"Run ID: {run_id}\n"
-                f"Total Score: {score}/7\n\n"
-                f"XML Errors: {breakdown.get('xml_error_count', 'N/A')}\n"
-                f"Model Graph Present: {breakdown.get('model_graph_present', False)}\n"
-                f"Time Steps Detected: {breakdown.get('time_steps_detected', 0)}\n"
-                f"Metadata Present: {breakdown.get('metadata_present', False)}\n"
-                f"Results Generated: {breakdown.get('results_generated', False)}\n"
-                f"PNG Count: {breakdown.get('png_count', 0)}\n"
-                f"CSV Count: {breakdown.get('csv_count', 0)}\n"
-                f"Has Gnuplotter: {breakdown.get('xml_has_gnuplotter', False)}\n"
-                f"Many Graphs Bonus: {breakdown.get('many_graphs_bonus', 0)}\n"
-            ),
-            encoding="utf-8"
-        )
+    # Shared scoring rules (morpheus_eval), identical across server variants
+    report = evaluate_and_report(run_path, run_id)
+    score = report["total_score"]
+    max_score = report["max_possible_score"]
 
     return {
         "ok": True,
         "run_id": run_id,
         "total_score": score,
-        "max_possible_score": 7,
-        "evaluation_path": str(eval_json_path),
-        "evaluation_txt_path": str(eval_txt_path),
-        "breakdown": breakdown,
-        "message": "Evaluation completed and saved to evaluation.json",
+        "max_possible_score": max_score,
+        "score_percentage": report["score_percentage"],
+        "evaluation_json_path": report["evaluation_json_path"],
+        "evaluation_txt_path": report["evaluation_txt_path"],
+        "breakdown": report["breakdown"],
+        "cache": report["cache"],
+        "message": "Evaluation completed and saved to evaluation.json and evaluation.txt",
         "graph_warning": (
-            None if breakdown.get("png_count", 0) > 0
+            None if report["breakdown"].get("png_count", 0) > 0
             else "NO PNG GRAPHS GENERATED! Ensure XML has <Gnuplotter> in <Analysis> section."
-        )
+        ),
     }
 
 
@@ -1315,7 +1175,7 @@ def run_benchmark_suite(
                 eval_res = evaluation(paper_result["run_id"])
                 paper_result["evaluation"] = {
                     "total_score": eval_res.get("total_score"),
-                    "evaluation_path": eval_res.get("evaluation_path"),
+                    "evaluation_path": eval_res.get("evaluation_json_path"),
                 }
             else:
                 paper_result["evaluation"] = None